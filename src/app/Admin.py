@@ -6,11 +6,15 @@ import streamlit as st
 
 from database.analisis_datos import validar_datos_analiticos
 from database.db_init import DB_PATH, create_database
+from database.conexion import cerrar_conexiones
+from database.snapshot_analitico import eliminar_snapshot
+from modules.mallas import importar_mallas_directorio
 
 
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
 EXPORTS_TEMP = PROJECT_ROOT / "exports" / "temp"
 BACKUPS_TEMP = PROJECT_ROOT / "backups" / "tmp"
+MALLAS_DIR = PROJECT_ROOT / "data" / "mallas"
 
 
 def _limpiar_directorio_temporal(path: Path) -> int:
@@ -39,6 +43,7 @@ def mostrar_admin():
     Este módulo permite realizar tareas de mantenimiento y diagnóstico:
     - **Reiniciar completamente la base de datos (sia.db)**
     - **Validar la calidad y cantidad de datos cargados (análisis analítico)**
+    - **Importar en bloque las mallas curriculares (archivos JSON) de una carpeta**
     - **Liberar archivos temporales generados por exportes o respaldos**
     """)
 
@@ -54,6 +59,12 @@ def mostrar_admin():
     if st.button("🗑️ Eliminar y recrear base de datos"):
         if confirm_text.strip().upper() == "BORRAR TODO":
             try:
+                # Cerrar el pool antes de borrar; en WAL también van -wal y -shm
+                cerrar_conexiones(DB_PATH)
+                for auxiliar in (Path(f"{DB_PATH}-wal"), Path(f"{DB_PATH}-shm")):
+                    if auxiliar.exists():
+                        os.remove(auxiliar)
+                eliminar_snapshot(DB_PATH)
                 if DB_PATH.exists():
                     os.remove(DB_PATH)
                     st.success("✅ Base de datos eliminada correctamente.")
@@ -81,6 +92,27 @@ def mostrar_admin():
             except Exception as e:
                 st.error(f"❌ Error durante el análisis: {e}")
 
+    st.divider()
+    st.subheader("📚 Importación de mallas curriculares")
+    st.write(
+        "Valida y guarda en la base (MallaCurricular / MallaCurso) cada archivo JSON de la "
+        "carpeta, uno por programa. Una malla ya guardada con el mismo contenido no se reescribe."
+    )
+    carpeta_mallas = st.text_input("Carpeta de mallas JSON", value=str(MALLAS_DIR))
+
+    if st.button("📥 Importar mallas"):
+        try:
+            resumen = importar_mallas_directorio(carpeta_mallas)
+        except Exception as e:
+            st.error(f"❌ Error importando mallas: {e}")
+        else:
+            st.success(
+                f"✅ {len(resumen['guardadas'])} mallas guardadas, "
+                f"{len(resumen['sin_cambios'])} sin cambios."
+            )
+            for error in resumen["errores"]:
+                st.warning(f"⚠️ {error['archivo']}: {error['error']}")
+
     st.divider()
     st.subheader("🧹 Limpieza de caché y temporales")
     st.write(
@@ -1,10 +1,12 @@
 import streamlit as st
 import pandas as pd
-import sqlite3
 from pathlib import Path
 from datetime import datetime
-from database.queries import listar_eventos_auditoria
+from database.queries import listar_eventos_auditoria_pagina
 from database.db_init import DB_PATH
+from database.upsert import DIAS_RETENCION_AUDITORIA, archivar_auditoria
+from database.conexion import conexion
+from paginacion import controles_paginacion, token_actual
 
 BACKUP_DIR = Path("backups")
 BACKUP_DIR.mkdir(exist_ok=True)
@@ -16,8 +18,8 @@ def exportar_auditoria_csv():
         fecha = datetime.now().strftime("%Y%m%d_%H%M%S")
         ruta_salida = BACKUP_DIR / f"auditoria_snapshot_{fecha}.csv"
 
-        with sqlite3.connect(DB_PATH) as conn:
-            df = pd.read_sql_query("SELECT * FROM Auditoria ORDER BY fecha_evento DESC;", conn)
+        with conexion(DB_PATH) as conn:
+            df = pd.read_sql_query("SELECT * FROM Auditoria ORDER BY fecha_ts DESC;", conn)
             if not df.empty:
                 df.to_csv(ruta_salida, index=False, encoding="utf-8-sig")
                 return str(ruta_salida)
@@ -49,25 +51,27 @@ def mostrar_auditoria():
 
     col1, col2 = st.columns([3, 1])
     filtro = col1.text_input("🔍 Buscar por palabra clave (ej: fallido, ARGOS, coordinador):", "")
-    limite = col2.number_input("Número de registros a mostrar:", min_value=10, max_value=500, value=100, step=10)
+    tamano = col2.number_input("Registros por página:", min_value=10, max_value=500, value=100, step=10)
+    filtro = filtro.strip() or None
 
     with st.spinner("Cargando eventos de auditoría..."):
-        eventos = listar_eventos_auditoria(limit=limite, filtro=filtro.strip() or None)
+        pagina = listar_eventos_auditoria_pagina(
+            tamano, despues=token_actual("pag_auditoria", (tamano, filtro)), filtro=filtro
+        )
+    df = pagina["filas"]
 
-    if not eventos:
+    if df.empty:
         st.info("No se encontraron eventos en la auditoría con los filtros actuales.")
         return
 
-    df = pd.DataFrame(eventos)
-    df["fecha_evento"] = pd.to_datetime(df["fecha_evento"], errors="coerce")
-
     # 🔹 Resaltado de transferencias
     df["resaltado"] = df["accion"].apply(
         lambda x: "background-color: #FFF9C4" if "transferencia" in str(x).lower() else ""
     )
 
-    st.metric("Eventos totales cargados", len(df))
+    st.metric("Eventos en esta página", len(df))
     st.dataframe(df.style.apply(lambda x: df["resaltado"], axis=0), use_container_width=True)
+    controles_paginacion("pag_auditoria", pagina["siguiente"])
 
     st.divider()
     seleccion = st.selectbox("Selecciona un evento para ver detalle:", df["id_evento"].astype(str))
@@ -78,5 +82,20 @@ def mostrar_auditoria():
     st.write(f"**Fecha:** {evento_sel['fecha_evento']}")
     st.code(evento_sel["accion"], language="json")
 
+    st.divider()
+    with st.expander("🗄️ Archivo de eventos antiguos"):
+        st.write(
+            "Los eventos más antiguos que el horizonte de retención pasan a `AuditoriaArchivo` "
+            "(con resumen diario por usuario en `AuditoriaDiaria`). Se archiva automáticamente "
+            f"tras cada cargue con un horizonte de {DIAS_RETENCION_AUDITORIA} días."
+        )
+        dias = st.number_input(
+            "Archivar eventos con más de (días):", min_value=1, value=DIAS_RETENCION_AUDITORIA, step=30
+        )
+        if st.button("Archivar ahora"):
+            with conexion(DB_PATH) as conn:
+                resultado = archivar_auditoria(conn, int(dias))
+            st.success(f"🗄️ {resultado['archivados']} eventos archivados (anteriores a {resultado['corte']} UTC).")
+
     st.caption("💾 Los eventos se registran automáticamente en cada operación crítica del sistema.")
     st.caption("🗂️ Se genera un respaldo CSV de la auditoría al abrir este módulo.")
@@ -1,5 +1,4 @@
 import sys
-import sqlite3
 import json
 from pathlib import Path
 
@@ -9,15 +8,33 @@ ROOT_DIR = Path(__file__).resolve().parent.parent
 if str(ROOT_DIR) not in sys.path:
     sys.path.append(str(ROOT_DIR))
 
-from modules.argos_loader import cargar_y_validar_excel, procesar_argos, cargar_a_bd
+from modules.argos_loader import (
+    cargar_archivos_argos,
+    iterar_bloques_argos,
+    procesar_argos_por_bloques,
+    validar_excel_por_bloques,
+)
+from modules.argos_transform import ESTRATEGIAS_DUPLICADOS
+from modules.validators import MOTIVOS_FILA
 from database.db_init import DB_PATH
+from database.conexion import conexion
 from database.upsert import registrar_evento
+from modules.trabajos_cargue import (
+    ESTADOS_ACTIVOS,
+    iniciar_trabajo_cargue,
+    listar_trabajos,
+    obtener_trabajo,
+    reanudar_trabajo,
+)
 from utils.cargue_historial import obtener_historial, registrar_cargue
 
 
 MODO_SIMULADO = "Simulación (sin escritura)"
 MODO_REAL = "Cargue real a la base de datos"
 
+CARGUE_UNICO = "Un archivo"
+CARGUE_MULTIPLE = "Varios archivos (cierre de periodo)"
+
 
 def _obtener_tamano_mb(uploaded_file) -> float:
     """Obtiene el tamaño del archivo cargado en megabytes."""
@@ -61,7 +78,7 @@ def registrar_error_auditoria(nombre_archivo: str, errores: dict):
     """Registra en la tabla Auditoria los intentos fallidos de cargue ARGOS."""
 
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with conexion(DB_PATH) as conn:
             descripcion_error = json.dumps(errores, ensure_ascii=False)
             accion = f"❌ Cargue fallido: {nombre_archivo} – {descripcion_error[:480]}"
             registrar_evento(conn, "coordinador_academico", accion)
@@ -69,6 +86,216 @@ def registrar_error_auditoria(nombre_archivo: str, errores: dict):
         print(f"⚠️ No se pudo registrar el evento de error: {e}")
 
 
+def _render_errores_por_tipo(errores_por_tipo: dict) -> None:
+    """Tabla con la cantidad de filas por código de motivo."""
+
+    filas = [
+        {"Código": codigo, "Motivo": MOTIVOS_FILA.get(codigo, codigo), "Filas": cantidad}
+        for codigo, cantidad in (errores_por_tipo or {}).items()
+        if cantidad
+    ]
+    if not filas:
+        return
+    st.markdown("**🚩 Filas con problemas por tipo** (las bloqueantes se omiten del cargue):")
+    st.dataframe(filas, use_container_width=True, hide_index=True)
+
+
+def _seleccionar_estrategia_duplicados(clave: str) -> str:
+    """Selector de la regla que decide qué fila gana ante claves repetidas."""
+
+    return st.selectbox(
+        "Duplicados en el archivo (misma clave estudiante + NRC + periodo):",
+        list(ESTRATEGIAS_DUPLICADOS),
+        format_func=ESTRATEGIAS_DUPLICADOS.get,
+        key=clave,
+        help="Los duplicados se colapsan antes de escribir: cada inscripción se escribe una sola vez por cargue.",
+    )
+
+
+ICONOS_ESTADO = {
+    "pendiente": "🕓",
+    "validando": "🔍",
+    "cargando": "⏳",
+    "completado": "✅",
+    "omitido": "♻️",
+    "error": "❌",
+    "interrumpido": "⏸️",
+}
+
+
+@st.fragment(run_every=2)
+def _panel_trabajo_activo(id_trabajo: int) -> None:
+    """Avance de un trabajo en curso; se refresca solo cada 2 segundos."""
+
+    trabajo = obtener_trabajo(id_trabajo)
+    if trabajo is None:
+        return
+
+    if trabajo["estado"] not in ESTADOS_ACTIVOS:
+        # Terminó: se redibuja la página completa con el resultado final
+        st.rerun()
+
+    total = trabajo["total_registros"] or 0
+    procesadas = trabajo["filas_procesadas"] or 0
+    if trabajo["estado"] == "cargando" and total:
+        texto = f"Cargando bloques: {procesadas:,} de {total:,} registros"
+        st.progress(min(procesadas / total, 1.0), text=texto)
+    else:
+        st.progress(0, text="Validando estructura y datos del archivo...")
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Nuevos", trabajo["nuevos"])
+    col2.metric("Actualizados", trabajo["actualizados"])
+    col3.metric("Sin cambios", trabajo["sin_cambios"])
+    col4.metric("Errores", trabajo["errores"])
+
+
+def _render_resultado_trabajo(trabajo: dict) -> None:
+    """Resumen final de un trabajo terminado."""
+
+    if trabajo["estado"] == "completado":
+        col1, col2, col3, col4, col5, col6, col7 = st.columns(7)
+        col1.metric("Total registros", trabajo["filas_procesadas"])
+        col2.metric("Nuevos", trabajo["nuevos"])
+        col3.metric("Actualizados", trabajo["actualizados"])
+        col4.metric("Sin cambios", trabajo["sin_cambios"])
+        col5.metric("Duplicados resueltos", trabajo["duplicados_resueltos"])
+        col6.metric("Errores", trabajo["errores"])
+        col7.metric("Transferencias detectadas", trabajo["transferencias"])
+        _render_errores_por_tipo(trabajo["errores_por_tipo"])
+        st.caption("✅ Datos cargados en la base de datos sia.db")
+    elif trabajo["estado"] == "omitido":
+        st.info(f"♻️ {trabajo['detalle']}. No hay cambios que aplicar.")
+    elif trabajo["estado"] == "error":
+        st.error("❌ No se pudo cargar el archivo. Se detectaron errores de estructura o datos.")
+        with st.expander("Detalle del error"):
+            st.code(trabajo["detalle"] or "Sin detalle")
+        _render_errores_por_tipo(trabajo["errores_por_tipo"])
+    elif trabajo["estado"] == "interrumpido":
+        st.warning(
+            f"⏸️ Cargue interrumpido tras {trabajo['filas_procesadas']:,} registros "
+            f"({trabajo['bloques_confirmados']} bloques confirmados)."
+        )
+        if st.button("▶️ Reanudar desde el último bloque", key=f"reanudar_{trabajo['id_trabajo']}"):
+            if reanudar_trabajo(trabajo["id_trabajo"]):
+                st.session_state["trabajo_cargue"] = trabajo["id_trabajo"]
+                st.rerun()
+            else:
+                st.error("No se pudo reanudar: el archivo del trabajo ya no está disponible.")
+
+
+def _render_trabajos_cargue() -> None:
+    """Trabajos de cargue en segundo plano (actual y recientes)."""
+
+    trabajos = listar_trabajos(limite=5)
+    if not trabajos:
+        return
+
+    st.divider()
+    st.subheader("🧵 Trabajos de cargue")
+
+    # Trabajo a seguir: el de esta sesión o, tras recargar la página, el activo más reciente
+    id_actual = st.session_state.get("trabajo_cargue")
+    if id_actual is None:
+        activos = [t for t in trabajos if t["estado"] in ESTADOS_ACTIVOS]
+        id_actual = activos[0]["id_trabajo"] if activos else None
+
+    for trabajo in trabajos:
+        icono = ICONOS_ESTADO.get(trabajo["estado"], "•")
+        titulo = (
+            f"{icono} #{trabajo['id_trabajo']} – {trabajo['nombre_archivo']} "
+            f"({trabajo['estado']}, {trabajo['fecha_creacion']})"
+        )
+        with st.expander(titulo, expanded=trabajo["id_trabajo"] == id_actual):
+            if trabajo["estado"] in ESTADOS_ACTIVOS:
+                _panel_trabajo_activo(trabajo["id_trabajo"])
+            else:
+                _render_resultado_trabajo(trabajo)
+
+
+def _mostrar_cargue_multiple() -> None:
+    """Cargue de varios archivos ARGOS (una o más hojas por archivo)."""
+
+    archivos = st.file_uploader(
+        "Selecciona los archivos ARGOS (.xlsx):",
+        type=["xlsx"],
+        accept_multiple_files=True,
+        help=(
+            "Un archivo por sede/programa. Se cargan todas las hojas con layout ARGOS (A–W); "
+            "las demás hojas se omiten."
+        ),
+    )
+
+    if not archivos:
+        st.warning("Por favor, selecciona uno o más archivos para continuar.")
+        return
+
+    tamano_mb = sum(_obtener_tamano_mb(archivo) for archivo in archivos)
+    st.info(f"📚 {len(archivos)} archivos seleccionados ({tamano_mb:.2f} MB en total).")
+
+    estrategia = _seleccionar_estrategia_duplicados("estrategia_duplicados_multiple")
+
+    if not st.button("🚀 Procesar archivos"):
+        return
+
+    with st.spinner("Validando en paralelo y cargando archivos..."):
+        try:
+            resultado = cargar_archivos_argos(
+                [(archivo.name, archivo.getvalue()) for archivo in archivos],
+                estrategia_duplicados=estrategia,
+            )
+        except Exception as e:
+            st.error(f"❌ El cargue múltiple se detuvo: {e}")
+            registrar_error_auditoria(", ".join(a.name for a in archivos), {"detalle": str(e)})
+            return
+
+    st.subheader("📄 Resultado por archivo")
+    filas_tabla = []
+    for item in resultado["archivos"]:
+        resumen = item["resumen"] or {}
+        hojas = item.get("hojas") or []
+        filas_tabla.append({
+            "Archivo": item["archivo"],
+            "Estado": item["estado"],
+            "Hojas cargadas": sum(h["estado"] == "Válida" for h in hojas),
+            "Registros": resumen.get("total", 0),
+            "Nuevos": resumen.get("nuevos", 0),
+            "Actualizados": resumen.get("actualizados", 0),
+            "Sin cambios": resumen.get("sin_cambios", 0),
+            "Duplicados resueltos": resumen.get("duplicados_resueltos", 0),
+            "Errores": resumen.get("errores", 0),
+            "Detalle": item.get("detalle") or "",
+        })
+
+        if item["resumen"] is None:
+            registrar_error_auditoria(
+                item["archivo"], {"detalle": item.get("detalle"), "hojas": hojas}
+            )
+        registrar_cargue(item["archivo"], "Carga real (múltiple)", item["estado"])
+
+    st.dataframe(filas_tabla, use_container_width=True, hide_index=True)
+
+    combinado = resultado["combinado"]
+    st.subheader("📊 Resumen combinado")
+    col1, col2, col3, col4, col5, col6 = st.columns(6)
+    col1.metric("Archivos cargados", f"{combinado['archivos_cargados']}/{combinado['archivos']}")
+    col2.metric("Total registros", combinado["total"])
+    col3.metric("Nuevos", combinado["nuevos"])
+    col4.metric("Actualizados", combinado["actualizados"])
+    col5.metric("Sin cambios", combinado["sin_cambios"])
+    col6.metric("Duplicados resueltos", combinado["duplicados_resueltos"])
+    _render_errores_por_tipo(combinado["errores_por_tipo"])
+
+    if combinado["archivos_con_error"]:
+        st.error(
+            f"❌ {combinado['archivos_con_error']} archivo(s) no se cargaron "
+            "(validación o escritura fallida); ver el detalle por archivo."
+        )
+        st.toast("⚠️ Cargue múltiple completado con errores.")
+    else:
+        st.toast("🎉 Cargue múltiple completado correctamente.")
+
+
 def mostrar_cargue():
     st.title("📥 Módulo de Cargue y Validación ARGOS")
     st.markdown("""
@@ -80,6 +307,11 @@ def mostrar_cargue():
 
     _render_historial_sidebar()
 
+    tipo_cargue = st.radio("Tipo de cargue:", [CARGUE_UNICO, CARGUE_MULTIPLE], horizontal=True)
+    if tipo_cargue == CARGUE_MULTIPLE:
+        _mostrar_cargue_multiple()
+        return
+
     uploaded_file = st.file_uploader(
         "Selecciona un archivo ARGOS (.xlsx):",
         type=["xlsx"],
@@ -102,21 +334,34 @@ def mostrar_cargue():
             [MODO_SIMULADO, MODO_REAL]
         )
 
+        estrategia = _seleccionar_estrategia_duplicados("estrategia_duplicados")
+
         procesar = st.button("🚀 Procesar archivo")
 
-        if procesar:
-            modo_resumido = "Simulación" if modo == MODO_SIMULADO else "Carga real"
+        if procesar and modo == MODO_REAL:
+            # El cargue real corre en segundo plano: valida, carga por bloques y
+            # persiste su avance en TrabajoCargue (sobrevive a recargas de página).
+            id_trabajo = iniciar_trabajo_cargue(
+                uploaded_file.name, uploaded_file.getvalue(), estrategia_duplicados=estrategia
+            )
+            st.session_state["trabajo_cargue"] = id_trabajo
+            registrar_cargue(uploaded_file.name, "Carga real", "En segundo plano")
+            st.toast(f"⏳ Trabajo de cargue #{id_trabajo} iniciado en segundo plano.")
+
+        elif procesar:
+            modo_resumido = "Simulación"
             progreso = st.progress(5, text="Inicializando validación...")
             paso_texto = st.empty()
 
             with st.spinner("Validando y procesando archivo..."):
                 paso_texto.info("🔍 Validando estructura y datos del archivo...")
-                df, resultados = cargar_y_validar_excel(uploaded_file)
+                # Sondeo del encabezado + validación por bloques (memoria acotada)
+                es_valido, resultados = validar_excel_por_bloques(uploaded_file)
                 progreso.progress(35, text="Validación completada")
 
-                if df is None:
+                if not es_valido:
                     progreso.progress(100, text="Proceso finalizado con errores")
-                    st.error("❌ No se puede procesar el archivo. Se detectaron errores de estructura o datos.")
+                    st.error("❌ No se puede procesar el archivo. La estructura (encabezados A–W) no corresponde a ARGOS.")
                     detalle = resultados.get("detalle", resultados)
                     registrar_error_auditoria(uploaded_file.name, detalle)
                     registrar_cargue(uploaded_file.name, modo_resumido, "Error en validación")
@@ -128,44 +373,39 @@ def mostrar_cargue():
                 st.subheader("📋 Resumen del archivo:")
                 st.json({
                     "Registros totales": resultados["total_registros"],
-                    "Duplicados detectados": resultados.get("duplicados"),
+                    "Duplicados detectados": resultados.get("duplicados_resueltos"),
                     "Columnas válidas": resultados.get("columnas_validas"),
                     "Notas válidas": resultados.get("notas_validas"),
                     "Periodos válidos": resultados.get("periodos_validos"),
+                    "Filas inválidas (se omitirán)": resultados.get("filas_invalidas"),
                 })
+                _render_errores_por_tipo(resultados.get("errores_por_tipo"))
 
                 progreso.progress(55, text="Analizando registros")
 
                 if modo == MODO_SIMULADO:
                     st.subheader("⚙️ Procesamiento simulado")
-                    resumen = procesar_argos(df)
+                    resumen = procesar_argos_por_bloques(
+                        iterar_bloques_argos(uploaded_file), estrategia
+                    )
                     progreso.progress(80, text="Simulación completada")
-                    col1, col2, col3, col4 = st.columns(4)
+                    col1, col2, col3, col4, col5, col6 = st.columns(6)
                     col1.metric("Total registros", resumen["total"])
                     col2.metric("Nuevos", resumen["nuevos"])
                     col3.metric("Actualizados", resumen["actualizados"])
-                    col4.metric("Errores", resumen["errores"])
+                    col4.metric("Sin cambios", resumen["sin_cambios"])
+                    col5.metric("Duplicados resueltos", resumen["duplicados_resueltos"])
+                    col6.metric("Errores", resumen["errores"])
+                    _render_errores_por_tipo(resumen["errores_por_tipo"])
                     st.caption("🧪 Modo simulado – sin escritura en la base de datos.")
                     registrar_cargue(uploaded_file.name, modo_resumido, "Éxito")
                     st.toast("✅ Simulación completada correctamente.")
 
-                elif modo == MODO_REAL:
-                    st.subheader("💾 Cargue real a la base de datos")
-                    resumen = cargar_a_bd(df)
-                    progreso.progress(85, text="Escritura en base de datos finalizada")
-                    col1, col2, col3, col4, col5 = st.columns(5)
-                    col1.metric("Total registros", resumen["total"])
-                    col2.metric("Nuevos", resumen["nuevos"])
-                    col3.metric("Actualizados", resumen["actualizados"])
-                    col4.metric("Errores", resumen["errores"])
-                    col5.metric("Transferencias detectadas", resumen.get("transferencias", 0))
-                    st.caption("✅ Datos cargados en la base de datos sia.db")
-                    registrar_cargue(uploaded_file.name, modo_resumido, "Éxito")
-                    st.toast("🎉 Cargue real completado correctamente.")
-
                 progreso.progress(100, text="Proceso completado")
                 paso_texto.empty()
 
     else:
         st.warning("Por favor, selecciona un archivo para continuar.")
+
+    _render_trabajos_cargue()
         
\ No newline at end of file
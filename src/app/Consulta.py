@@ -11,7 +11,7 @@ if str(ROOT_DIR) not in sys.path:
     sys.path.append(str(ROOT_DIR))
 
 # --- Importaciones internas ---
-from database.queries import buscar_estudiantes, historial_estudiante, datos_estudiante
+from database.queries import AYUDA_BUSQUEDA, buscar_estudiantes, historial_estudiante, datos_estudiante
 from modules.reports import exportar_excel, exportar_pdf  # Exportes a disco
 
 # --- Claves de estado para esta vista ---
@@ -42,7 +42,7 @@ def mostrar_consulta():
     st.write("Busca un estudiante por **ID** o **nombre** y visualiza su historial académico.")
 
     # Input y botón de búsqueda
-    q = st.text_input("ID del estudiante o nombre:", key=KEY_Q)
+    q = st.text_input("ID del estudiante o nombre:", key=KEY_Q, help=AYUDA_BUSQUEDA)
     col_buscar, col_reset = st.columns([1, 1])
     buscar = col_buscar.button("Buscar", type="primary")
     limpiar = col_reset.button("Limpiar")
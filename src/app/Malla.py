@@ -10,12 +10,19 @@ ROOT_DIR = Path(__file__).resolve().parent.parent
 if str(ROOT_DIR) not in sys.path:
     sys.path.append(str(ROOT_DIR))
 
-from database.queries import buscar_estudiantes, historial_estudiante, datos_estudiante
+from database.queries import (
+    AYUDA_BUSQUEDA,
+    buscar_estudiantes,
+    datos_estudiante,
+    historial_estudiante,
+    listar_mallas_guardadas,
+)
 from modules.load_data import (
+    compilar_malla,
     mapear_malla_con_historico,
     obtener_malla_isov_virtual,
-    validar_y_normalizar_malla,
 )
+from modules.mallas import guardar_malla_programa, indice_malla_guardada
 from modules.reports import exportar_excel_malla, exportar_pdf_malla
 
 
@@ -66,7 +73,11 @@ def mostrar_malla():
 
     origen = st.radio(
         "Origen de la malla a utilizar:",
-        ["Malla por defecto (ISOF)", "Cargar malla desde archivo JSON"],
+        [
+            "Malla por defecto (ISOF)",
+            "Malla guardada en la base",
+            "Cargar malla desde archivo JSON",
+        ],
         key="malla_origen",
     )
 
@@ -78,13 +89,14 @@ def mostrar_malla():
         ):
             base = obtener_malla_isov_virtual()
             try:
-                malla_norm = validar_y_normalizar_malla(base)
+                indice = compilar_malla(base, normalizar=True)
             except Exception as e:  # pragma: no cover - solo mensaje en UI
                 st.error(f"Error al preparar la malla por defecto: {e}")
             else:
-                plan = malla_norm.get("plan") or []
-                total_cuat = len(plan)
-                total_cursos = sum(len(b.get("cursos", [])) for b in plan)
+                # La malla queda compilada (y en caché) para los cruces siguientes
+                malla_norm = indice.malla
+                total_cuat = len(indice.bloques)
+                total_cursos = len(indice)
 
                 st.session_state[MALLA_CFG_KEY] = malla_norm
                 st.session_state[MALLA_RESUMEN_KEY] = {
@@ -101,6 +113,43 @@ def mostrar_malla():
                     f"para programa {malla_norm['codigo_programa']} lista para usar."
                 )
 
+    # Malla guardada en la base (MallaCurricular / MallaCurso)
+    elif origen == "Malla guardada en la base":
+        guardadas = listar_mallas_guardadas()
+        if not guardadas:
+            st.info(
+                "Aún no hay mallas guardadas. Carga una desde archivo JSON o impórtalas "
+                "en bloque desde la página de Administración."
+            )
+        else:
+            opciones = {
+                f"{m['codigo_programa']} – {m['nombre_malla']} ({m['cursos']} cursos)": m[
+                    "codigo_programa"
+                ]
+                for m in guardadas
+            }
+            etiqueta = st.selectbox("Malla:", list(opciones), key="malla_guardada_sel")
+            if st.button("Usar malla guardada", key="btn_malla_guardada"):
+                indice = indice_malla_guardada(opciones[etiqueta])
+                if indice is None:
+                    st.error("La malla seleccionada ya no está en la base.")
+                else:
+                    malla_norm = indice.malla
+                    st.session_state[MALLA_CFG_KEY] = malla_norm
+                    st.session_state[MALLA_RESUMEN_KEY] = {
+                        "codigo_programa": malla_norm["codigo_programa"],
+                        "nombre_malla": malla_norm["nombre_malla"],
+                        "creditos_totales": malla_norm.get("creditos_totales", 0),
+                        "cuatrimestres": len(indice.bloques),
+                        "total_cursos": len(indice),
+                    }
+                    malla_cfg = malla_norm
+                    malla_resumen = st.session_state[MALLA_RESUMEN_KEY]
+                    st.success(
+                        f"Malla guardada '{malla_norm['nombre_malla']}' para programa "
+                        f"{malla_norm['codigo_programa']} lista para usar."
+                    )
+
     # Malla desde JSON
     else:
         archivo_json = st.file_uploader(
@@ -109,12 +158,18 @@ def mostrar_malla():
             key="malla_json",
             help="Debe contener 'codigo_programa', 'nombre_malla', 'creditos_totales' y 'plan'.",
         )
+        guardar_en_bd = st.checkbox(
+            "Guardar también en la base (queda disponible para todas las sesiones y "
+            "para el reporte de avance en créditos)",
+            value=True,
+            key="malla_json_guardar",
+        )
         if archivo_json is not None and st.button(
             "Validar y usar malla JSON", key="btn_validar_malla_json"
         ):
             try:
                 data = json.load(archivo_json)
-                malla_norm = validar_y_normalizar_malla(data)
+                indice = compilar_malla(data, normalizar=True)
             except Exception as e:  # pragma: no cover - solo mensaje en UI
                 st.error(f"No se pudo validar la malla: {e}")
                 st.session_state.pop(MALLA_CFG_KEY, None)
@@ -122,9 +177,10 @@ def mostrar_malla():
                 malla_cfg = None
                 malla_resumen = None
             else:
-                plan = malla_norm.get("plan") or []
-                total_cuat = len(plan)
-                total_cursos = sum(len(b.get("cursos", [])) for b in plan)
+                # La malla queda compilada (y en caché) para los cruces siguientes
+                malla_norm = indice.malla
+                total_cuat = len(indice.bloques)
+                total_cursos = len(indice)
 
                 st.session_state[MALLA_CFG_KEY] = malla_norm
                 st.session_state[MALLA_RESUMEN_KEY] = {
@@ -140,6 +196,16 @@ def mostrar_malla():
                     f"Malla '{malla_norm['nombre_malla']}' para programa "
                     f"{malla_norm['codigo_programa']} lista para usar."
                 )
+                if guardar_en_bd:
+                    try:
+                        resultado = guardar_malla_programa(malla_norm, usuario="coordinador_academico")
+                    except Exception as e:  # pragma: no cover - solo mensaje en UI
+                        st.error(f"No se pudo guardar la malla en la base: {e}")
+                    else:
+                        if resultado["estado"] == "guardada":
+                            st.success("💾 Malla guardada en la base.")
+                        else:
+                            st.info("La base ya tenía exactamente esta malla.")
 
     if malla_cfg and malla_resumen:
         with st.expander("📋 Malla seleccionada", expanded=True):
@@ -161,7 +227,7 @@ def mostrar_malla():
     # -------------------------------------------------
     # Búsqueda de estudiante
     # -------------------------------------------------
-    q = st.text_input("ID del estudiante o nombre:")
+    q = st.text_input("ID del estudiante o nombre:", help=AYUDA_BUSQUEDA)
     col_buscar, col_reset = st.columns([1, 1])
     buscar = col_buscar.button("Buscar", type="primary")
     limpiar = col_reset.button("Limpiar")
@@ -7,7 +7,8 @@ if str(ROOT_DIR) not in sys.path:
     sys.path.append(str(ROOT_DIR))
 
 import streamlit as st
-from database.queries import obtener_kpis_programa, listar_estudiantes
+from database.queries import obtener_kpis_programa, listar_ambitos_kpi, listar_estudiantes_pagina
+from paginacion import controles_paginacion, token_actual
 
 
 def mostrar_tablero():
@@ -16,9 +17,20 @@ def mostrar_tablero():
         "Este tablero muestra los indicadores clave de desempeño académico (KPIs) y el listado de estudiantes activos en el Sistema de Inteligencia Académica (SIA)."
     )
 
-    # KPIs
-    kpis = obtener_kpis_programa()
-    st.subheader("🎯 Indicadores globales del programa")
+    # KPIs (AgregadoKPI: lectura por clave, sin recorrer las tablas)
+    ambitos = listar_ambitos_kpi()
+    f1, f2 = st.columns(2)
+    programa = f1.selectbox("Programa:", ["Todos"] + ambitos["programas"])
+    periodo = f2.selectbox("Periodo:", ["Todos"] + ambitos["periodos"])
+    codigo_programa = None if programa == "Todos" else programa
+    id_periodo = None if periodo == "Todos" else periodo
+
+    kpis = obtener_kpis_programa(codigo_programa, id_periodo)
+    if codigo_programa or id_periodo:
+        ambito = " · ".join(v for v in (codigo_programa, id_periodo) if v)
+        st.subheader(f"🎯 Indicadores de {ambito}")
+    else:
+        st.subheader("🎯 Indicadores globales del programa")
     c1, c2, c3, c4 = st.columns(4)
     c1.metric("Total de estudiantes", f"{kpis['total_estudiantes']}")
     prom_txt = f"{kpis['promedio_general']}" if kpis["promedio_general"] is not None else "—"
@@ -30,11 +42,13 @@ def mostrar_tablero():
 
     # Listado de estudiantes
     st.subheader("👩‍🎓 Listado de estudiantes registrados")
-    limite = st.slider("Límite de filas a mostrar:", min_value=50, max_value=1000, value=200, step=50)
-    data = listar_estudiantes(limit=limite)
+    tamano = st.selectbox("Filas por página:", [50, 100, 200, 500, 1000], index=2)
+    pagina = listar_estudiantes_pagina(tamano, despues=token_actual("pag_estudiantes", tamano))
+    data = pagina["filas"]
 
     if data:
         st.dataframe(data, use_container_width=True, hide_index=True)
+        controles_paginacion("pag_estudiantes", pagina["siguiente"])
     else:
         st.info("No hay estudiantes registrados para mostrar en este momento.")
 
@@ -18,6 +18,17 @@ from Auditoria import mostrar_auditoria  # 👈 Nuevo módulo agregado
 from Home import main as mostrar_inicio
 from Malla import mostrar_malla          # 👈 NUEVO: módulo de malla curricular
 from utils.cargue_historial import obtener_historial
+from database.db_init import create_database
+
+
+# ---- ESQUEMA: crea la base o aplica migraciones pendientes (una vez por proceso) ----
+@st.cache_resource(show_spinner=False)
+def _inicializar_base_datos() -> bool:
+    create_database()
+    return True
+
+
+_inicializar_base_datos()
 
 # ---- ESTILOS PERSONALIZADOS ----
 st.markdown(
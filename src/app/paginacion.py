@@ -0,0 +1,41 @@
+"""Controles de paginación por clave (keyset) para las páginas de Streamlit.
+
+Las consultas paginadas (`listar_estudiantes_pagina`,
+`listar_eventos_auditoria_pagina`) devuelven un token opaco para la página
+siguiente. Aquí se guarda en `st.session_state` la pila de tokens ya
+visitados, de modo que "Anterior" vuelve a la página previa sin recalcularla
+desde el principio.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Optional
+
+import streamlit as st
+
+
+def token_actual(clave: str, firma: Any = None) -> Optional[str]:
+    """
+    Token de la página que se debe mostrar (None = primera página).
+    Si `firma` (tamaño de página, filtros…) cambió, vuelve a la primera.
+    """
+    estado = st.session_state.get(clave)
+    if estado is None or estado["firma"] != firma:
+        estado = st.session_state[clave] = {"firma": firma, "pila": [None]}
+    return estado["pila"][-1]
+
+
+def controles_paginacion(clave: str, siguiente: Optional[str]) -> None:
+    """Botones ◀ Anterior / Siguiente ▶ y número de página actual."""
+    pila = st.session_state[clave]["pila"]
+    c1, c2, c3 = st.columns([1, 2, 1])
+
+    if c1.button("◀ Anterior", key=f"{clave}_anterior", disabled=len(pila) == 1):
+        pila.pop()
+        st.rerun()
+
+    c2.caption(f"Página {len(pila)}")
+
+    if c3.button("Siguiente ▶", key=f"{clave}_siguiente", disabled=siguiente is None):
+        pila.append(siguiente)
+        st.rerun()
@@ -1,20 +1,100 @@
-import sqlite3
 from pathlib import Path
+import numpy as np
 import pandas as pd
 
+from database.conexion import conexion
+from database.snapshot_analitico import snapshot_vigente
+
 # Ruta base del proyecto
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 DB_PATH = BASE_DIR / "data" / "sia.db"
 
+
+def _notas_desde_snapshot(snapshot: dict) -> dict | None:
+    """
+    Métricas de notas calculadas sobre el snapshot memmap (sin consultar
+    SQLite ni armar un DataFrame): solo se recorren las columnas necesarias.
+    """
+    columnas = snapshot["columnas"]
+    nota = columnas["nota"]
+    con_nota = ~np.isnan(nota)
+    if not con_nota.any():
+        return None
+
+    notas = np.asarray(nota[con_nota])
+    periodos = np.asarray(columnas["id_periodo"][con_nota])
+    versiones = np.asarray(columnas["version_periodo"][con_nota])
+
+    cantidad = np.bincount(periodos, minlength=len(snapshot["diccionarios"]["id_periodo"]))
+    presentes = np.flatnonzero(cantidad)
+    suma = np.bincount(periodos, weights=notas, minlength=len(cantidad))
+    minimos = np.full(len(cantidad), np.inf)
+    maximos = np.full(len(cantidad), -np.inf)
+    np.minimum.at(minimos, periodos, notas)
+    np.maximum.at(maximos, periodos, notas)
+
+    etiquetas = snapshot["diccionarios"]["id_periodo"]
+    orden = presentes[np.argsort(etiquetas[presentes].astype(str))]
+    notas_por_periodo = [
+        {
+            "id_periodo": etiquetas[p],
+            "count": int(cantidad[p]),
+            "mean": round(float(suma[p] / cantidad[p]), 2),
+            "min": round(float(minimos[p]), 2),
+            "max": round(float(maximos[p]), 2),
+        }
+        for p in orden
+    ]
+    return {
+        "promedio_general": round(float(notas.mean()), 2),
+        "rango_notas": (float(notas.min()), float(notas.max())),
+        "desviacion": round(float(notas.std(ddof=1)), 2) if len(notas) > 1 else float("nan"),
+        "total_periodos": int(len(presentes)),
+        "versiones_distintas": int(len(np.unique(versiones[versiones != 0]))),
+        "notas_por_periodo": notas_por_periodo,
+    }
+
+
+def _notas_desde_sqlite(conn) -> dict | None:
+    """Mismas métricas leyendo Inscripcion con pandas (sin snapshot vigente)."""
+    df_notas = pd.read_sql_query("""
+        SELECT nota, id_periodo, version_periodo
+        FROM Inscripcion
+        WHERE nota IS NOT NULL;
+    """, conn)
+
+    if df_notas.empty:
+        return None
+
+    return {
+        "promedio_general": round(float(df_notas["nota"].mean()), 2),
+        "rango_notas": (float(df_notas["nota"].min()), float(df_notas["nota"].max())),
+        "desviacion": round(float(df_notas["nota"].std()), 2),
+        "total_periodos": df_notas["id_periodo"].nunique(),
+        "versiones_distintas": df_notas["version_periodo"].nunique(),
+        # ---- Distribución por periodo ----
+        "notas_por_periodo": (
+            df_notas.groupby("id_periodo")["nota"]
+            .agg(["count", "mean", "min", "max"])
+            .round(2)
+            .reset_index()
+            .to_dict(orient="records")
+        ),
+    }
+
+
 def validar_datos_analiticos():
     """
     Valida la integridad y suficiencia de los datos para análisis.
     Retorna un diccionario con métricas descriptivas.
+    Las métricas de notas salen del snapshot analítico si está al día.
     """
     if not DB_PATH.exists():
         return {"error": f"No se encontró la base de datos en {DB_PATH}"}
 
-    with sqlite3.connect(DB_PATH) as conn:
+    snapshot = snapshot_vigente(DB_PATH)
+
+    with conexion(DB_PATH) as conn:
         # ---- 1️⃣ Conteos básicos ----
         cur = conn.cursor()
         cur.execute("SELECT COUNT(*) FROM Estudiante;")
@@ -27,40 +107,20 @@ def validar_datos_analiticos():
         total_inscripciones = cur.fetchone()[0]
 
         # ---- 2️⃣ Análisis de notas ----
-        df_notas = pd.read_sql_query("""
-            SELECT nota, id_periodo, version_periodo
-            FROM Inscripcion
-            WHERE nota IS NOT NULL;
-        """, conn)
-
-        if df_notas.empty:
-            return {"error": "No hay registros de notas en la tabla Inscripcion."}
-
-        rango_notas = (float(df_notas["nota"].min()), float(df_notas["nota"].max()))
-        promedio_general = round(float(df_notas["nota"].mean()), 2)
-        desviacion = round(float(df_notas["nota"].std()), 2)
-        total_periodos = df_notas["id_periodo"].nunique()
-        versiones_distintas = df_notas["version_periodo"].nunique()
-
-        # ---- 3️⃣ Distribución por periodo ----
-        notas_por_periodo = (
-            df_notas.groupby("id_periodo")["nota"]
-            .agg(["count", "mean", "min", "max"])
-            .round(2)
-            .reset_index()
-            .to_dict(orient="records")
-        )
+        if snapshot is not None:
+            notas = _notas_desde_snapshot(snapshot)
+        else:
+            notas = _notas_desde_sqlite(conn)
+
+    if notas is None:
+        return {"error": "No hay registros de notas en la tabla Inscripcion."}
 
     return {
         "total_estudiantes": total_estudiantes,
         "total_cursos": total_cursos,
         "total_inscripciones": total_inscripciones,
-        "promedio_general": promedio_general,
-        "rango_notas": rango_notas,
-        "desviacion": desviacion,
-        "total_periodos": total_periodos,
-        "versiones_distintas": versiones_distintas,
-        "notas_por_periodo": notas_por_periodo,
+        **notas,
+        "origen_notas": "snapshot" if snapshot is not None else "sqlite",
     }
 
 # ---- Prueba local ----
@@ -0,0 +1,198 @@
+"""Caché de dimensiones (Programa, Curso, Estudiante, PeriodoAcademico) por cargue.
+
+Dentro de un mismo archivo ARGOS el mismo programa, NRC, estudiante y periodo
+se repiten miles de veces. `CacheDimensiones` vive lo que dura un cargue:
+deduplica esas entidades en memoria, las compara con lo que ya guarda la base
+de datos y escribe cada fila de dimensión como máximo una vez, y solo si es
+nueva o cambió. Así el volumen de escritura de dimensiones pasa de O(filas) a
+O(entidades distintas).
+
+Semántica (la misma del cargue fila a fila):
+- Programa y Curso: gana el último valor del archivo (upsert).
+- Estudiante y PeriodoAcademico: gana el primero; una clave existente no se toca.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+
+# Por dimensión:
+# - clave / columnas: columnas de la tabla
+# - gana_ultima: True → upsert (último valor); False → INSERT OR IGNORE (primero)
+# - seleccion_staging: SELECT sobre stg_argos con (clave, *columnas) una vez por clave
+DIMENSIONES: dict[str, dict] = {
+    "Programa": {
+        "tabla": "Programa",
+        "clave": "codigo_programa",
+        "columnas": (
+            "descripcion_programa",
+            "rectoria",
+            "descripcion_rectoria",
+            "sede",
+            "descripcion_sede",
+            "facultad",
+            "descripcion_facultad",
+            "nivel",
+            "descripcion_nivel",
+        ),
+        "gana_ultima": True,
+        "seleccion_staging": """
+            SELECT codigo_programa, descripcion_programa, rectoria, descripcion_rectoria,
+                   sede, descripcion_sede, facultad, descripcion_facultad,
+                   nivel, descripcion_nivel
+              FROM stg_argos
+             WHERE rn IN (
+                    SELECT MAX(rn) FROM stg_argos
+                     WHERE codigo_programa IS NOT NULL
+                     GROUP BY codigo_programa
+                   )
+        """,
+    },
+    "Estudiante": {
+        "tabla": "Estudiante",
+        "clave": "id_estudiante",
+        "columnas": ("nombre", "programa", "correo_institucional"),
+        "gana_ultima": False,
+        "seleccion_staging": """
+            SELECT id_estudiante, nombre_estudiante, programa_visible, NULL
+              FROM stg_argos
+             WHERE rn IN (SELECT MIN(rn) FROM stg_argos GROUP BY id_estudiante)
+        """,
+    },
+    "Curso": {
+        "tabla": "Curso",
+        "clave": "id_curso",
+        "columnas": ("nombre", "creditos", "codigo_alfanumerico", "codigo_programa"),
+        "gana_ultima": True,
+        "seleccion_staging": """
+            SELECT id_curso, nombre_curso, NULL, codigo_alfanumerico, codigo_programa
+              FROM stg_argos
+             WHERE rn IN (SELECT MAX(rn) FROM stg_argos GROUP BY id_curso)
+        """,
+    },
+    "PeriodoAcademico": {
+        "tabla": "PeriodoAcademico",
+        "clave": "id_periodo",
+        "columnas": ("anio", "periodo"),
+        "gana_ultima": False,
+        "seleccion_staging": """
+            SELECT id_periodo, anio, periodo
+              FROM stg_argos
+             WHERE rn IN (SELECT MIN(rn) FROM stg_argos GROUP BY id_periodo)
+        """,
+    },
+}
+"""Orden de escritura: Programa antes que Curso (clave foránea)."""
+
+_LOTE_CONSULTA = 500
+"""Claves por consulta IN (...) al leer lo que ya existe en la base de datos."""
+
+
+class CacheDimensiones:
+    """
+    Caché de dimensiones con alcance de un cargue (uno o varios archivos).
+
+    `conocidos[tabla]` guarda, por clave, la tupla de columnas que la base de
+    datos tiene (o tendrá al confirmar la transacción). Nunca hace commit.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.conocidos: dict[str, dict[str, tuple]] = {nombre: {} for nombre in DIMENSIONES}
+        self.escrituras: dict[str, int] = {nombre: 0 for nombre in DIMENSIONES}
+
+    def reiniciar(self) -> None:
+        """
+        Olvida todo lo conocido. Obligatorio tras un rollback: la caché podría
+        dar por existentes filas que la transacción deshecha había escrito.
+        """
+        for tabla in self.conocidos:
+            self.conocidos[tabla].clear()
+
+    # -------------------------------------------------
+    # LECTURA DE LO EXISTENTE
+    # -------------------------------------------------
+    def _precargar(self, dimension: dict, claves) -> None:
+        """Trae de la BD las filas de las claves que la caché aún no conoce."""
+        conocidos = self.conocidos[dimension['tabla']]
+        faltantes = [clave for clave in dict.fromkeys(claves) if clave not in conocidos]
+        cursor = self.conn.cursor()
+        for inicio in range(0, len(faltantes), _LOTE_CONSULTA):
+            lote = faltantes[inicio:inicio + _LOTE_CONSULTA]
+            cursor.execute(
+                f"""
+                SELECT {dimension['clave']}, {", ".join(dimension['columnas'])}
+                  FROM {dimension['tabla']}
+                 WHERE {dimension['clave']} IN ({", ".join("?" for _ in lote)})
+                """,
+                lote,
+            )
+            for clave, *valores in cursor.fetchall():
+                conocidos[clave] = tuple(valores)
+
+    def _pendientes(self, dimension: dict, filas) -> list[tuple]:
+        """Filas (clave, *columnas) que hay que escribir; actualiza la caché."""
+        conocidos = self.conocidos[dimension['tabla']]
+        pendientes = []
+        for clave, *valores in filas:
+            valores = tuple(valores)
+            actual = conocidos.get(clave)
+            if actual is None or (dimension['gana_ultima'] and actual != valores):
+                conocidos[clave] = valores
+                pendientes.append((clave, *valores))
+        return pendientes
+
+    # -------------------------------------------------
+    # ESCRITURA
+    # -------------------------------------------------
+    def _escribir(self, dimension: dict, filas: list[tuple]) -> int:
+        if not filas:
+            return 0
+        columnas = (dimension['clave'], *dimension['columnas'])
+        placeholders = ", ".join("?" for _ in columnas)
+        if dimension['gana_ultima']:
+            sentencia = f"""
+                INSERT INTO {dimension['tabla']} ({", ".join(columnas)})
+                VALUES ({placeholders})
+                ON CONFLICT({dimension['clave']}) DO UPDATE SET
+                    {", ".join(f"{c} = excluded.{c}" for c in dimension['columnas'])}
+            """
+        else:
+            sentencia = f"""
+                INSERT OR IGNORE INTO {dimension['tabla']} ({", ".join(columnas)})
+                VALUES ({placeholders})
+            """
+        self.conn.executemany(sentencia, filas)
+        self.escrituras[dimension['tabla']] += len(filas)
+        return len(filas)
+
+    def registrar(self, tabla: str, clave: str | None, valores: tuple) -> bool:
+        """
+        Registra UNA fila de dimensión (cargue fila a fila). Escribe solo si la
+        clave es nueva o, en dimensiones de último valor, si cambió.
+        Retorna True si hubo escritura.
+        """
+        if not clave:
+            return False
+        dimension = DIMENSIONES[tabla]
+        if clave not in self.conocidos[tabla]:
+            self._precargar(dimension, [clave])
+        return self._escribir(dimension, self._pendientes(dimension, [(clave, *valores)])) > 0
+
+    def sincronizar_staging(self) -> dict[str, int]:
+        """
+        Escribe las dimensiones presentes en `stg_argos` (cargue masivo).
+        Lee una fila por entidad distinta, la compara con la caché / BD y
+        escribe solo las nuevas o modificadas. Retorna escrituras por tabla.
+        """
+        escritas = {}
+        cursor = self.conn.cursor()
+        for nombre, dimension in DIMENSIONES.items():
+            cursor.execute(dimension['seleccion_staging'])
+            filas = cursor.fetchall()
+            self._precargar(dimension, (fila[0] for fila in filas))
+            escritas[nombre] = self._escribir(dimension, self._pendientes(dimension, filas))
+        return escritas
+
+
+__all__ = ["CacheDimensiones", "DIMENSIONES"]
@@ -0,0 +1,144 @@
+"""Gestión centralizada de conexiones SQLite.
+
+Todos los módulos (consultas, cargue ARGOS, auditoría, análisis) obtienen sus
+conexiones aquí en lugar de abrir `sqlite3.connect(DB_PATH)` por su cuenta:
+
+- Una conexión reutilizable por hilo y por archivo de base de datos (pool).
+- WAL: los lectores (Tablero, Consulta) no se bloquean con un cargue en curso
+  y el cargue no espera a los lectores.
+- `busy_timeout` para esperar en lugar de fallar con "database is locked".
+- `synchronous=NORMAL`, caché de páginas y mmap. `temp_store` queda en su
+  valor por defecto (archivo): la tabla TEMP `stg_argos` de un archivo grande
+  no debe vivir entera en RAM.
+
+Uso:
+
+    with conexion(DB_PATH) as conn:
+        conn.execute(...)
+
+Al salir del bloque más externo se hace commit (o rollback si hubo
+excepción), igual que `with sqlite3.connect(...)`; los bloques anidados del
+mismo hilo comparten la transacción del bloque externo.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+from database import db_init
+
+# PRAGMAs aplicados a cada conexión nueva (orden relevante: journal_mode primero)
+PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -64000,       # ~64 MB de caché de páginas (negativo = KiB)
+    "mmap_size": 268435456,     # 256 MB de E/S mapeada en memoria
+    "busy_timeout": 30000,      # ms de espera ante un bloqueo de escritura
+}
+
+_LOCAL = threading.local()
+_BLOQUEO = threading.Lock()
+# Pool: conexión por (id de hilo, ruta). Un hilo nuevo que recibe el id de uno
+# ya terminado reutiliza su conexión en vez de abrir otra.
+_ABIERTAS: dict[tuple[int, str], sqlite3.Connection] = {}
+
+
+def _ruta(ruta: str | Path | None) -> str:
+    """Ruta absoluta normalizada (clave del pool)."""
+    return str(Path(ruta if ruta is not None else db_init.DB_PATH).resolve())
+
+
+def _abrir(ruta: str) -> sqlite3.Connection:
+    """Abre una conexión nueva con los PRAGMAs de rendimiento."""
+    Path(ruta).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(
+        ruta,
+        timeout=PRAGMAS["busy_timeout"] / 1000,
+        # Solo la usa su hilo; se permite cerrarla desde otro (cerrar_conexiones)
+        check_same_thread=False,
+    )
+    for nombre, valor in PRAGMAS.items():
+        conn.execute(f"PRAGMA {nombre} = {valor};")
+    return conn
+
+
+def obtener_conexion(ruta: str | Path | None = None) -> sqlite3.Connection:
+    """
+    Conexión del hilo actual para `ruta` (por defecto DB_PATH), creada la
+    primera vez y reutilizada después. No cerrarla: la administra el pool.
+    """
+    clave = (threading.get_ident(), _ruta(ruta))
+    with _BLOQUEO:
+        conn = _ABIERTAS.get(clave)
+    if conn is None:
+        conn = _abrir(clave[1])
+        with _BLOQUEO:
+            _ABIERTAS[clave] = conn
+    return conn
+
+
+@contextmanager
+def conexion(ruta: str | Path | None = None) -> Iterator[sqlite3.Connection]:
+    """
+    Conexión del pool como contexto transaccional: commit al salir del bloque
+    más externo del hilo, rollback si hubo excepción.
+    """
+    conn = obtener_conexion(ruta)
+    profundidades = getattr(_LOCAL, "profundidad", None)
+    if profundidades is None:
+        profundidades = _LOCAL.profundidad = {}
+    clave = id(conn)
+    profundidades[clave] = profundidades.get(clave, 0) + 1
+    try:
+        yield conn
+    except BaseException:
+        if profundidades[clave] == 1:
+            conn.rollback()
+        raise
+    else:
+        if profundidades[clave] == 1:
+            conn.commit()
+    finally:
+        profundidades[clave] -= 1
+        if profundidades[clave] == 0:
+            # Quien cambió row_factory no afecta al siguiente usuario del pool
+            conn.row_factory = None
+
+
+def cerrar_conexion_hilo() -> None:
+    """Cierra las conexiones del hilo actual (fin de un hilo de trabajo)."""
+    ident = threading.get_ident()
+    with _BLOQUEO:
+        cerrar = [_ABIERTAS.pop(c) for c in list(_ABIERTAS) if c[0] == ident]
+    for conn in cerrar:
+        conn.close()
+
+
+def cerrar_conexiones(ruta: str | Path | None = None) -> None:
+    """
+    Cierra todas las conexiones del pool (de todos los hilos) hacia `ruta`,
+    o hacia cualquier base si `ruta` es None. Necesario antes de borrar o
+    recrear el archivo de base de datos.
+    """
+    objetivo = _ruta(ruta) if ruta is not None else None
+    with _BLOQUEO:
+        claves = [c for c in _ABIERTAS if objetivo is None or c[1] == objetivo]
+        cerrar = [_ABIERTAS.pop(c) for c in claves]
+    for conn in cerrar:
+        try:
+            conn.close()
+        except sqlite3.ProgrammingError:
+            pass
+
+
+__all__ = [
+    "PRAGMAS",
+    "cerrar_conexion_hilo",
+    "cerrar_conexiones",
+    "conexion",
+    "obtener_conexion",
+]
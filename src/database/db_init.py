@@ -7,23 +7,40 @@ DB_PATH = BASE_DIR / "data" / "sia.db"
 SCHEMA_PATH = BASE_DIR / "src" / "database" / "schema.sql"
 
 def create_database():
-    """Crea la base de datos SQLite desde el archivo schema.sql."""
-    if DB_PATH.exists():
-        print(f"🔸 Base de datos ya existe: {DB_PATH}")
-        return
+    """
+    Crea la base de datos SQLite si no existe y, en cualquier caso, aplica las
+    migraciones pendientes (una base ya existente también recibe los cambios
+    de esquema e índices nuevos).
+    """
+    # Imports diferidos: conexion y migraciones dependen de este módulo
+    from database.conexion import conexion
+    from database.migraciones import aplicar_migraciones
+
+    existia = DB_PATH.exists()
 
     # Crear carpeta /data si no existe
     DB_PATH.parent.mkdir(parents=True, exist_ok=True)
 
-    # Leer esquema
-    with open(SCHEMA_PATH, "r", encoding="utf-8") as schema_file:
-        schema_sql = schema_file.read()
+    with conexion(DB_PATH) as conn:
+        aplicadas = aplicar_migraciones(conn)
+
+    if not existia:
+        print(f"✅ Base de datos creada correctamente en: {DB_PATH}")
+    elif aplicadas:
+        print(f"🔸 Base de datos existente actualizada ({len(aplicadas)} migraciones): {DB_PATH}")
+    else:
+        print(f"🔸 Base de datos ya existe y está al día: {DB_PATH}")
+
 
-    # Conectar y ejecutar
-    with sqlite3.connect(DB_PATH) as conn:
-        conn.executescript(schema_sql)
+def asegurar_esquema(conn: sqlite3.Connection) -> None:
+    """
+    Lleva una base existente al esquema actual sin perder datos aplicando las
+    migraciones pendientes (ver database.migraciones). Si la base ya está al
+    día solo consulta `PRAGMA user_version`.
+    """
+    from database.migraciones import aplicar_migraciones
 
-    print(f"✅ Base de datos creada correctamente en: {DB_PATH}")
+    aplicar_migraciones(conn)
 
 if __name__ == "__main__":
     create_database()
@@ -1,22 +1,21 @@
-import sqlite3
-from pathlib import Path
+"""
+Migración histórica de `Curso.codigo_alfanumerico`.
 
-# Ruta de la base de datos
-BASE_DIR = Path(__file__).resolve().parent.parent.parent
-DB_PATH = BASE_DIR / "data" / "sia.db"
+Se conserva por compatibilidad con instrucciones de despliegue anteriores:
+la columna ahora la agrega la migración versionada 2 (database.migraciones),
+que se aplica automáticamente al iniciar la aplicación. Ejecutar este script
+equivale a aplicar las migraciones pendientes.
+"""
 
-print(f"📘 Conectando a la base de datos: {DB_PATH}")
+from database.conexion import conexion
+from database.db_init import DB_PATH
+from database.migraciones import aplicar_migraciones, version_actual
 
-with sqlite3.connect(DB_PATH) as conn:
-    cur = conn.cursor()
-    # Revisar columnas existentes
-    cur.execute("PRAGMA table_info(Curso);")
-    columnas = [r[1] for r in cur.fetchall()]
-
-    # Si la columna no existe, la crea
-    if "codigo_alfanumerico" not in columnas:
-        cur.execute("ALTER TABLE Curso ADD COLUMN codigo_alfanumerico TEXT;")
-        conn.commit()
-        print("✅ Columna 'codigo_alfanumerico' agregada correctamente.")
-    else:
-        print("ℹ️ La columna 'codigo_alfanumerico' ya existe, no se realizó ningún cambio.")
+if __name__ == "__main__":
+    print(f"📘 Conectando a la base de datos: {DB_PATH}")
+    with conexion(DB_PATH) as conn:
+        aplicadas = aplicar_migraciones(conn)
+        if aplicadas:
+            print(f"✅ Migraciones aplicadas: {aplicadas} (versión {version_actual(conn)}).")
+        else:
+            print("ℹ️ El esquema ya está al día, no se realizó ningún cambio.")
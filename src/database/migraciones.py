@@ -0,0 +1,817 @@
+"""Migraciones versionadas del esquema SIA.
+
+La versión del esquema se guarda en `PRAGMA user_version` del propio archivo
+sia.db. `aplicar_migraciones` ejecuta, en orden y una sola vez, las
+migraciones con número mayor a esa versión; cada una corre en su propia
+transacción junto con la actualización de `user_version`, de modo que una
+falla deja la base en la última versión completa.
+
+Las migraciones son idempotentes (IF NOT EXISTS, verificación de columnas):
+una base creada antes de existir este módulo (user_version = 0) las recibe
+todas sin error aunque ya tenga parte del esquema.
+
+Para cambiar el esquema: agregar una función `_mNNN_...` y su entrada al
+final de MIGRACIONES. Nunca renumerar ni editar una migración ya publicada.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+
+from database.db_init import SCHEMA_PATH
+
+
+# -------------------------------------------------
+# UTILIDADES
+# -------------------------------------------------
+def _columnas(conn: sqlite3.Connection, tabla: str) -> set[str]:
+    return {fila[1] for fila in conn.execute(f"PRAGMA table_info({tabla});")}
+
+
+def _agregar_columnas(conn: sqlite3.Connection, tabla: str, columnas) -> None:
+    """ALTER TABLE ADD COLUMN solo para las columnas que aún no existen."""
+    existentes = _columnas(conn, tabla)
+    for nombre, tipo in columnas:
+        if nombre not in existentes:
+            conn.execute(f"ALTER TABLE {tabla} ADD COLUMN {nombre} {tipo};")
+
+
+def _ejecutar_script(conn: sqlite3.Connection, script: str) -> None:
+    """
+    Ejecuta un script SQL sentencia por sentencia dentro de la transacción en
+    curso (executescript haría commit y rompería la atomicidad).
+    """
+    sentencia = ""
+    for linea in script.splitlines(keepends=True):
+        sentencia += linea
+        if sqlite3.complete_statement(sentencia):
+            conn.execute(sentencia)
+            sentencia = ""
+
+
+# -------------------------------------------------
+# MIGRACIONES
+# -------------------------------------------------
+def _m001_esquema_base(conn: sqlite3.Connection) -> None:
+    """Tablas e índices de schema.sql (no hace nada si ya existen)."""
+    with open(SCHEMA_PATH, "r", encoding="utf-8") as schema_file:
+        _ejecutar_script(conn, schema_file.read())
+
+
+def _m002_columnas_agregadas(conn: sqlite3.Connection) -> None:
+    """Columnas añadidas a tablas existentes (antes asegurar_esquema y scripts sueltos)."""
+    _agregar_columnas(conn, "Curso", [("codigo_alfanumerico", "TEXT")])
+    _agregar_columnas(conn, "Inscripcion", [("huella_fila", "INTEGER")])
+    _agregar_columnas(
+        conn,
+        "TrabajoCargue",
+        [
+            ("duplicados_resueltos", "INTEGER DEFAULT 0"),
+            ("estrategia_duplicados", "TEXT DEFAULT 'ultima'"),
+        ],
+    )
+
+
+def _m003_indices_consultas(conn: sqlite3.Connection) -> None:
+    """Índices de las consultas frecuentes."""
+    _ejecutar_script(
+        conn,
+        """
+        -- Historial por programa: cursos del programa → inscripciones de esos cursos
+        CREATE INDEX IF NOT EXISTS idx_curso_programa
+            ON Curso(codigo_programa, id_curso);
+        CREATE INDEX IF NOT EXISTS idx_insc_curso
+            ON Inscripcion(id_curso, id_estudiante);
+
+        -- Auditoría: listado y filtros por fecha (más recientes primero)
+        CREATE INDEX IF NOT EXISTS idx_auditoria_fecha
+            ON Auditoria(fecha_evento);
+        """,
+    )
+
+
+def _m004_busqueda_estudiantes(conn: sqlite3.Connection) -> None:
+    """
+    Índice de texto completo EstudianteFTS (FTS5, contenido externo sobre
+    Estudiante) con plegado de tildes y mayúsculas; triggers lo mantienen
+    sincronizado con cualquier escritura sobre Estudiante.
+    Si SQLite no trae FTS5, la búsqueda sigue funcionando con LIKE.
+    """
+    try:
+        conn.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS EstudianteFTS USING fts5(
+                id_estudiante,
+                nombre,
+                content='Estudiante',
+                content_rowid='rowid',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+            """
+        )
+    except sqlite3.OperationalError as e:
+        print(f"⚠️ FTS5 no disponible, la búsqueda de estudiantes usará LIKE: {e}")
+        return
+
+    _ejecutar_script(
+        conn,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_estudiante_fts_ins AFTER INSERT ON Estudiante
+        BEGIN
+            INSERT INTO EstudianteFTS(rowid, id_estudiante, nombre)
+            VALUES (new.rowid, new.id_estudiante, new.nombre);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_estudiante_fts_del AFTER DELETE ON Estudiante
+        BEGIN
+            INSERT INTO EstudianteFTS(EstudianteFTS, rowid, id_estudiante, nombre)
+            VALUES ('delete', old.rowid, old.id_estudiante, old.nombre);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_estudiante_fts_upd
+            AFTER UPDATE OF id_estudiante, nombre ON Estudiante
+        BEGIN
+            INSERT INTO EstudianteFTS(EstudianteFTS, rowid, id_estudiante, nombre)
+            VALUES ('delete', old.rowid, old.id_estudiante, old.nombre);
+            INSERT INTO EstudianteFTS(rowid, id_estudiante, nombre)
+            VALUES (new.rowid, new.id_estudiante, new.nombre);
+        END;
+
+        -- Indexa los estudiantes que ya existían
+        INSERT INTO EstudianteFTS(EstudianteFTS) VALUES ('rebuild');
+        """,
+    )
+
+
+_CANONICOS_M005 = """
+    codigo_canonico = NULLIF(UPPER(TRIM(COALESCE(
+        NULLIF(TRIM(Inscripcion.codigo_alfanumerico), ''),
+        (SELECT c.codigo_alfanumerico FROM Curso c WHERE c.id_curso = Inscripcion.id_curso),
+        ''
+    ))), ''),
+    nombre_canonico = COALESCE(
+        NULLIF(TRIM(Inscripcion.nombre_curso), ''),
+        (SELECT c.nombre FROM Curso c WHERE c.id_curso = Inscripcion.id_curso)
+    )
+"""
+
+
+def _m005_codigo_canonico(conn: sqlite3.Connection) -> None:
+    """
+    Inscripcion.codigo_canonico / nombre_canonico: snapshot o, si está vacío,
+    catálogo Curso (código en mayúsculas). El cargue los llena por lote
+    (upsert.SQL_CANONICOS); aquí se completan las filas existentes y se crean
+    los triggers que los refrescan si cambia el curso de una fila sin snapshot.
+    """
+    _agregar_columnas(
+        conn, "Inscripcion", [("codigo_canonico", "TEXT"), ("nombre_canonico", "TEXT")]
+    )
+    conn.execute(f"UPDATE Inscripcion SET {_CANONICOS_M005};")
+    _ejecutar_script(
+        conn,
+        f"""
+        CREATE INDEX IF NOT EXISTS idx_insc_est_codigo
+            ON Inscripcion(id_estudiante, codigo_canonico);
+
+        CREATE TRIGGER IF NOT EXISTS trg_curso_canonicos_ins AFTER INSERT ON Curso
+        BEGIN
+            UPDATE Inscripcion SET {_CANONICOS_M005}
+             WHERE id_curso = new.id_curso
+               AND (NULLIF(TRIM(codigo_alfanumerico), '') IS NULL
+                    OR NULLIF(TRIM(nombre_curso), '') IS NULL);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_curso_canonicos_upd
+            AFTER UPDATE OF codigo_alfanumerico, nombre ON Curso
+        BEGIN
+            UPDATE Inscripcion SET {_CANONICOS_M005}
+             WHERE id_curso = new.id_curso
+               AND (NULLIF(TRIM(codigo_alfanumerico), '') IS NULL
+                    OR NULLIF(TRIM(nombre_curso), '') IS NULL);
+        END;
+        """,
+    )
+
+
+def _m006_estudiante_programa(conn: sqlite3.Connection) -> None:
+    """
+    EstudiantePrograma: membresía estudiante–programa (tiene al menos una
+    inscripción en un curso del programa) con primer y último periodo.
+    El cargue la mantiene por lote; el trigger recalcula a los estudiantes de
+    un curso que cambia de programa.
+    """
+    _ejecutar_script(
+        conn,
+        """
+        CREATE TABLE IF NOT EXISTS EstudiantePrograma (
+            codigo_programa TEXT NOT NULL,
+            id_estudiante TEXT NOT NULL,
+            primer_periodo TEXT,
+            ultimo_periodo TEXT,
+            PRIMARY KEY (codigo_programa, id_estudiante)
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_estprog_estudiante
+            ON EstudiantePrograma(id_estudiante);
+
+        INSERT OR REPLACE INTO EstudiantePrograma
+            (codigo_programa, id_estudiante, primer_periodo, ultimo_periodo)
+        SELECT c.codigo_programa, i.id_estudiante, MIN(i.id_periodo), MAX(i.id_periodo)
+          FROM Inscripcion i
+          JOIN Curso c ON c.id_curso = i.id_curso
+         WHERE c.codigo_programa IS NOT NULL
+         GROUP BY c.codigo_programa, i.id_estudiante;
+
+        CREATE TRIGGER IF NOT EXISTS trg_curso_programa_upd
+            AFTER UPDATE OF codigo_programa ON Curso
+            WHEN old.codigo_programa IS NOT new.codigo_programa
+        BEGIN
+            DELETE FROM EstudiantePrograma
+             WHERE id_estudiante IN (
+                    SELECT id_estudiante FROM Inscripcion WHERE id_curso = new.id_curso
+                   );
+            INSERT INTO EstudiantePrograma
+                (codigo_programa, id_estudiante, primer_periodo, ultimo_periodo)
+            SELECT c.codigo_programa, i.id_estudiante, MIN(i.id_periodo), MAX(i.id_periodo)
+              FROM Inscripcion i
+              JOIN Curso c ON c.id_curso = i.id_curso
+             WHERE i.id_estudiante IN (
+                    SELECT id_estudiante FROM Inscripcion WHERE id_curso = new.id_curso
+                   )
+               AND c.codigo_programa IS NOT NULL
+             GROUP BY c.codigo_programa, i.id_estudiante;
+        END;
+        """,
+    )
+
+
+# Conflicto común de los triggers de AgregadoKPI: cada evento suma su delta
+_SUMAR_KPI_M007 = """
+    ON CONFLICT(codigo_programa, id_periodo) DO UPDATE SET
+        inscripciones = inscripciones + excluded.inscripciones,
+        notas = notas + excluded.notas,
+        suma_notas = suma_notas + excluded.suma_notas,
+        estudiantes = estudiantes + excluded.estudiantes,
+        cursos = cursos + excluded.cursos
+"""
+
+
+def _delta_inscripcion_m007(fila: str, signo: int) -> str:
+    """
+    Suma (signo=1) o resta (signo=-1) la inscripción `fila` (new / old) en
+    sus cuatro ámbitos: global, periodo, programa y programa × periodo.
+    Estudiantes y cursos de un periodo son distintos: cuentan solo si no queda
+    otra inscripción del mismo estudiante / curso en ese ámbito.
+
+    Los índices van fijados (INDEXED BY / CROSS JOIN): en el primer cargue las
+    estadísticas son de tablas vacías y el planificador recorrería el periodo
+    completo (idx_insc_per) por cada fila insertada.
+    """
+    return f"""
+        INSERT INTO AgregadoKPI
+            (codigo_programa, id_periodo, inscripciones, notas, suma_notas, estudiantes, cursos)
+        SELECT a.codigo_programa, a.id_periodo,
+               {signo}, {signo} * ({fila}.nota IS NOT NULL), {signo} * COALESCE({fila}.nota, 0),
+               {signo} * a.estudiante_unico, {signo} * a.curso_unico
+          FROM (
+                SELECT '*' AS codigo_programa, '*' AS id_periodo,
+                       0 AS estudiante_unico, 0 AS curso_unico
+                UNION ALL
+                SELECT '*', {fila}.id_periodo,
+                       NOT EXISTS (
+                           SELECT 1 FROM Inscripcion o INDEXED BY uq_insc_clave
+                            WHERE o.id_estudiante = {fila}.id_estudiante
+                              AND o.id_periodo = {fila}.id_periodo
+                              AND o.id_inscripcion <> {fila}.id_inscripcion),
+                       NOT EXISTS (
+                           SELECT 1 FROM Inscripcion o INDEXED BY idx_insc_curso
+                            WHERE o.id_curso = {fila}.id_curso
+                              AND o.id_periodo = {fila}.id_periodo
+                              AND o.id_inscripcion <> {fila}.id_inscripcion)
+                UNION ALL
+                SELECT c.codigo_programa, '*', 0, 0
+                  FROM Curso c
+                 WHERE c.id_curso = {fila}.id_curso AND c.codigo_programa IS NOT NULL
+                UNION ALL
+                SELECT c.codigo_programa, {fila}.id_periodo,
+                       NOT EXISTS (
+                           SELECT 1 FROM Inscripcion o INDEXED BY uq_insc_clave
+                            CROSS JOIN Curso oc ON oc.id_curso = o.id_curso
+                            WHERE o.id_estudiante = {fila}.id_estudiante
+                              AND o.id_periodo = {fila}.id_periodo
+                              AND o.id_inscripcion <> {fila}.id_inscripcion
+                              AND oc.codigo_programa = c.codigo_programa),
+                       NOT EXISTS (
+                           SELECT 1 FROM Inscripcion o INDEXED BY idx_insc_curso
+                            WHERE o.id_curso = {fila}.id_curso
+                              AND o.id_periodo = {fila}.id_periodo
+                              AND o.id_inscripcion <> {fila}.id_inscripcion)
+                  FROM Curso c
+                 WHERE c.id_curso = {fila}.id_curso AND c.codigo_programa IS NOT NULL
+               ) a
+         WHERE 1
+        {_SUMAR_KPI_M007};
+    """
+
+
+def _mover_curso_m007(curso: str, programa: str, signo: int) -> str:
+    """
+    Suma (signo=1) o resta (signo=-1) en `programa` las inscripciones ya
+    registradas del curso `curso` (un curso que cambia de programa, aparece
+    después de sus inscripciones o desaparece). Solo recorre las inscripciones
+    de ese curso; un estudiante cuenta en (programa, periodo) si no tiene otra
+    inscripción del programa en el periodo.
+    """
+    return f"""
+        INSERT INTO AgregadoKPI
+            (codigo_programa, id_periodo, inscripciones, notas, suma_notas, estudiantes, cursos)
+        SELECT {programa}, '*', {signo} * COUNT(*), {signo} * COUNT(i.nota),
+               {signo} * TOTAL(i.nota), 0, 0
+          FROM Inscripcion i INDEXED BY idx_insc_curso
+         WHERE i.id_curso = {curso} AND {programa} IS NOT NULL
+         GROUP BY i.id_curso
+        UNION ALL
+        SELECT {programa}, i.id_periodo, {signo} * COUNT(*), {signo} * COUNT(i.nota),
+               {signo} * TOTAL(i.nota),
+               {signo} * SUM(NOT EXISTS (
+                   SELECT 1 FROM Inscripcion o INDEXED BY uq_insc_clave
+                    CROSS JOIN Curso oc ON oc.id_curso = o.id_curso
+                    WHERE o.id_estudiante = i.id_estudiante
+                      AND o.id_periodo = i.id_periodo
+                      AND o.id_curso <> {curso}
+                      AND oc.codigo_programa = {programa})),
+               {signo}
+          FROM Inscripcion i INDEXED BY idx_insc_curso
+         WHERE i.id_curso = {curso} AND {programa} IS NOT NULL
+         GROUP BY i.id_periodo
+        {_SUMAR_KPI_M007};
+    """
+
+
+def _m007_agregados_kpi(conn: sqlite3.Connection) -> None:
+    """
+    AgregadoKPI: totales del Tablero por ámbito (codigo_programa, id_periodo),
+    con '*' como "todos". Los triggers los mantienen en la misma transacción
+    que cada escritura (cargue masivo, fila a fila o edición manual), así que
+    leer un KPI es una búsqueda por clave primaria.
+
+    - ('*', '*'): estudiantes y cursos del catálogo (Estudiante, Curso).
+    - (programa, '*'): estudiantes de EstudiantePrograma y cursos del programa.
+    - (…, periodo): estudiantes y cursos distintos con inscripción en el periodo.
+    """
+    _ejecutar_script(
+        conn,
+        f"""
+        CREATE TABLE IF NOT EXISTS AgregadoKPI (
+            codigo_programa TEXT NOT NULL,   -- '*' = todos los programas
+            id_periodo TEXT NOT NULL,        -- '*' = todos los periodos
+            inscripciones INTEGER NOT NULL DEFAULT 0,
+            notas INTEGER NOT NULL DEFAULT 0,        -- inscripciones con nota
+            suma_notas REAL NOT NULL DEFAULT 0,
+            estudiantes INTEGER NOT NULL DEFAULT 0,
+            cursos INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (codigo_programa, id_periodo)
+        );
+
+        DELETE FROM AgregadoKPI;
+
+        INSERT INTO AgregadoKPI
+            (codigo_programa, id_periodo, inscripciones, notas, suma_notas, estudiantes, cursos)
+        SELECT '*', '*', COUNT(*), COUNT(nota), TOTAL(nota),
+               (SELECT COUNT(*) FROM Estudiante), (SELECT COUNT(*) FROM Curso)
+          FROM Inscripcion;
+
+        INSERT INTO AgregadoKPI
+            (codigo_programa, id_periodo, inscripciones, notas, suma_notas, estudiantes, cursos)
+        SELECT '*', id_periodo, COUNT(*), COUNT(nota), TOTAL(nota),
+               COUNT(DISTINCT id_estudiante), COUNT(DISTINCT id_curso)
+          FROM Inscripcion
+         GROUP BY id_periodo;
+
+        INSERT INTO AgregadoKPI
+            (codigo_programa, id_periodo, inscripciones, notas, suma_notas, estudiantes, cursos)
+        SELECT p.codigo_programa, '*',
+               COALESCE(SUM(i.n), 0), COALESCE(SUM(i.notas), 0), COALESCE(SUM(i.suma), 0),
+               (SELECT COUNT(*) FROM EstudiantePrograma ep
+                 WHERE ep.codigo_programa = p.codigo_programa),
+               COUNT(*)
+          FROM Curso p
+          LEFT JOIN (
+                SELECT id_curso, COUNT(*) AS n, COUNT(nota) AS notas, TOTAL(nota) AS suma
+                  FROM Inscripcion
+                 GROUP BY id_curso
+               ) i ON i.id_curso = p.id_curso
+         WHERE p.codigo_programa IS NOT NULL
+         GROUP BY p.codigo_programa;
+
+        INSERT INTO AgregadoKPI
+            (codigo_programa, id_periodo, inscripciones, notas, suma_notas, estudiantes, cursos)
+        SELECT c.codigo_programa, i.id_periodo, COUNT(*), COUNT(i.nota), TOTAL(i.nota),
+               COUNT(DISTINCT i.id_estudiante), COUNT(DISTINCT i.id_curso)
+          FROM Inscripcion i
+          JOIN Curso c ON c.id_curso = i.id_curso
+         WHERE c.codigo_programa IS NOT NULL
+         GROUP BY c.codigo_programa, i.id_periodo;
+
+        -- Inscripcion: delta por fila (las claves no se reescriben en el
+        -- cargue, pero un cambio de clave se trata como baja + alta)
+        CREATE TRIGGER IF NOT EXISTS trg_kpi_insc_ins AFTER INSERT ON Inscripcion
+        BEGIN
+            {_delta_inscripcion_m007("new", 1)}
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_kpi_insc_del AFTER DELETE ON Inscripcion
+        BEGIN
+            {_delta_inscripcion_m007("old", -1)}
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_kpi_insc_upd
+            AFTER UPDATE OF nota, id_estudiante, id_curso, id_periodo ON Inscripcion
+            WHEN old.nota IS NOT new.nota
+              OR old.id_estudiante IS NOT new.id_estudiante
+              OR old.id_curso IS NOT new.id_curso
+              OR old.id_periodo IS NOT new.id_periodo
+        BEGIN
+            {_delta_inscripcion_m007("old", -1)}
+            {_delta_inscripcion_m007("new", 1)}
+        END;
+
+        -- Catálogos: totales de estudiantes y cursos
+        CREATE TRIGGER IF NOT EXISTS trg_kpi_estudiante_ins AFTER INSERT ON Estudiante
+        BEGIN
+            INSERT INTO AgregadoKPI (codigo_programa, id_periodo, estudiantes)
+            VALUES ('*', '*', 1) {_SUMAR_KPI_M007};
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_kpi_estudiante_del AFTER DELETE ON Estudiante
+        BEGIN
+            INSERT INTO AgregadoKPI (codigo_programa, id_periodo, estudiantes)
+            VALUES ('*', '*', -1) {_SUMAR_KPI_M007};
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_kpi_estprog_ins AFTER INSERT ON EstudiantePrograma
+        BEGIN
+            INSERT INTO AgregadoKPI (codigo_programa, id_periodo, estudiantes)
+            VALUES (new.codigo_programa, '*', 1) {_SUMAR_KPI_M007};
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_kpi_estprog_del AFTER DELETE ON EstudiantePrograma
+        BEGIN
+            INSERT INTO AgregadoKPI (codigo_programa, id_periodo, estudiantes)
+            VALUES (old.codigo_programa, '*', -1) {_SUMAR_KPI_M007};
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_kpi_curso_ins AFTER INSERT ON Curso
+        BEGIN
+            INSERT INTO AgregadoKPI (codigo_programa, id_periodo, cursos)
+            SELECT '*', '*', 1
+            UNION ALL
+            SELECT new.codigo_programa, '*', 1 WHERE new.codigo_programa IS NOT NULL
+            {_SUMAR_KPI_M007};
+        END;
+
+        -- Un curso que aparece, desaparece o cambia de programa con
+        -- inscripciones ya registradas mueve esas cifras entre programas
+        CREATE TRIGGER IF NOT EXISTS trg_kpi_curso_ins_insc AFTER INSERT ON Curso
+            WHEN new.codigo_programa IS NOT NULL
+             AND EXISTS (SELECT 1 FROM Inscripcion WHERE id_curso = new.id_curso)
+        BEGIN
+            {_mover_curso_m007("new.id_curso", "new.codigo_programa", 1)}
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_kpi_curso_del AFTER DELETE ON Curso
+        BEGIN
+            INSERT INTO AgregadoKPI (codigo_programa, id_periodo, cursos)
+            SELECT '*', '*', -1
+            UNION ALL
+            SELECT old.codigo_programa, '*', -1 WHERE old.codigo_programa IS NOT NULL
+            {_SUMAR_KPI_M007};
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_kpi_curso_del_insc AFTER DELETE ON Curso
+            WHEN old.codigo_programa IS NOT NULL
+             AND EXISTS (SELECT 1 FROM Inscripcion WHERE id_curso = old.id_curso)
+        BEGIN
+            {_mover_curso_m007("old.id_curso", "old.codigo_programa", -1)}
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_kpi_curso_programa_upd
+            AFTER UPDATE OF codigo_programa ON Curso
+            WHEN old.codigo_programa IS NOT new.codigo_programa
+        BEGIN
+            INSERT INTO AgregadoKPI (codigo_programa, id_periodo, cursos)
+            SELECT old.codigo_programa, '*', -1 WHERE old.codigo_programa IS NOT NULL
+            UNION ALL
+            SELECT new.codigo_programa, '*', 1 WHERE new.codigo_programa IS NOT NULL
+            {_SUMAR_KPI_M007};
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_kpi_curso_programa_upd_insc
+            AFTER UPDATE OF codigo_programa ON Curso
+            WHEN old.codigo_programa IS NOT new.codigo_programa
+             AND EXISTS (SELECT 1 FROM Inscripcion WHERE id_curso = new.id_curso)
+        BEGIN
+            {_mover_curso_m007("new.id_curso", "old.codigo_programa", -1)}
+            {_mover_curso_m007("new.id_curso", "new.codigo_programa", 1)}
+        END;
+        """,
+    )
+
+
+def _m008_auditoria_fecha_ts(conn: sqlite3.Connection) -> None:
+    """
+    Auditoria.fecha_ts: instante del evento en segundos epoch (UTC), entero y
+    normalizado, para filtrar y ordenar por rango con idx_auditoria_ts
+    (reemplaza al índice sobre el texto fecha_evento). Un trigger lo completa
+    en cada inserción.
+
+    AuditoriaArchivo guarda los eventos que salen de la tabla activa
+    (upsert.archivar_auditoria) y AuditoriaDiaria su resumen por día y usuario.
+    """
+    _agregar_columnas(conn, "Auditoria", [("fecha_ts", "INTEGER")])
+    _ejecutar_script(
+        conn,
+        """
+        UPDATE Auditoria
+           SET fecha_ts = CAST(strftime('%s', COALESCE(fecha_evento, 'now')) AS INTEGER)
+         WHERE fecha_ts IS NULL;
+
+        DROP INDEX IF EXISTS idx_auditoria_fecha;
+        CREATE INDEX IF NOT EXISTS idx_auditoria_ts ON Auditoria(fecha_ts);
+
+        CREATE TRIGGER IF NOT EXISTS trg_auditoria_fecha_ts
+            AFTER INSERT ON Auditoria
+            WHEN new.fecha_ts IS NULL
+        BEGIN
+            UPDATE Auditoria
+               SET fecha_ts = CAST(strftime('%s', COALESCE(new.fecha_evento, 'now')) AS INTEGER)
+             WHERE id_evento = new.id_evento;
+        END;
+
+        CREATE TABLE IF NOT EXISTS AuditoriaArchivo (
+            id_evento INTEGER PRIMARY KEY,
+            usuario TEXT,
+            accion TEXT,
+            fecha_evento TEXT,
+            fecha_ts INTEGER,
+            fecha_archivo TEXT DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_auditoria_archivo_ts
+            ON AuditoriaArchivo(fecha_ts);
+
+        CREATE TABLE IF NOT EXISTS AuditoriaDiaria (
+            dia TEXT NOT NULL,               -- 'YYYY-MM-DD' (UTC)
+            usuario TEXT NOT NULL,
+            eventos INTEGER NOT NULL DEFAULT 0,
+            primer_ts INTEGER,
+            ultimo_ts INTEGER,
+            PRIMARY KEY (dia, usuario)
+        );
+        """,
+    )
+
+
+def _m009_mallas_persistidas(conn: sqlite3.Connection) -> None:
+    """
+    Columnas para guardar mallas completas en MallaCurricular/MallaCurso
+    (upsert.guardar_malla): nombre visible del programa, huella del contenido
+    y fecha en la malla; posición del curso en el plan y orden del alias en
+    cada fila de MallaCurso (un curso con varios códigos ocupa una fila por
+    código, todas con la misma posición).
+    """
+    _agregar_columnas(
+        conn,
+        "MallaCurricular",
+        [("programa", "TEXT"), ("huella", "TEXT"), ("fecha_actualizacion", "TEXT")],
+    )
+    _agregar_columnas(conn, "MallaCurso", [("posicion", "INTEGER"), ("orden_alias", "INTEGER")])
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_malla_curso_posicion "
+        "ON MallaCurso(id_malla, posicion, orden_alias);"
+    )
+
+
+def _m010_avance_estudiante(conn: sqlite3.Connection) -> None:
+    """
+    AvanceEstudiante: avance en créditos de cada estudiante frente a la malla
+    de un programa (credit_progress.actualizar_avance_programa), con la huella
+    de la malla usada. Los triggers marcan `pendiente = 1` las filas de los
+    estudiantes cuyo historial, nombre o programa de curso cambia, y la
+    actualización recalcula solo esas.
+    """
+    _ejecutar_script(
+        conn,
+        """
+        CREATE TABLE IF NOT EXISTS AvanceEstudiante (
+            codigo_programa TEXT NOT NULL,          -- programa de la malla
+            id_estudiante TEXT NOT NULL,
+            nombre TEXT,
+            programa TEXT,
+            codigo_programa_curso TEXT,             -- programa del curso de su primera inscripción
+            cred_aprob_transf INTEGER NOT NULL DEFAULT 0,
+            cred_perdidos INTEGER NOT NULL DEFAULT 0,
+            cred_pendientes INTEGER NOT NULL DEFAULT 0,
+            cred_totales_malla INTEGER NOT NULL DEFAULT 0,
+            porc_aproba_malla REAL NOT NULL DEFAULT 0,
+            huella_malla TEXT,
+            pendiente INTEGER NOT NULL DEFAULT 0,   -- 1 = recalcular
+            fecha_calculo TEXT DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (codigo_programa, id_estudiante)
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_avance_estudiante
+            ON AvanceEstudiante(id_estudiante);
+
+        CREATE INDEX IF NOT EXISTS idx_avance_porcentaje
+            ON AvanceEstudiante(codigo_programa, porc_aproba_malla);
+
+        CREATE TRIGGER IF NOT EXISTS trg_avance_insc_ins AFTER INSERT ON Inscripcion
+        BEGIN
+            UPDATE AvanceEstudiante
+               SET pendiente = 1
+             WHERE id_estudiante = new.id_estudiante AND pendiente = 0;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_avance_insc_del AFTER DELETE ON Inscripcion
+        BEGIN
+            UPDATE AvanceEstudiante
+               SET pendiente = 1
+             WHERE id_estudiante = old.id_estudiante AND pendiente = 0;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_avance_insc_upd
+            AFTER UPDATE OF id_estudiante, id_curso, id_periodo, nota, codigo_canonico
+            ON Inscripcion
+            WHEN old.id_estudiante IS NOT new.id_estudiante
+              OR old.id_curso IS NOT new.id_curso
+              OR old.id_periodo IS NOT new.id_periodo
+              OR old.nota IS NOT new.nota
+              OR old.codigo_canonico IS NOT new.codigo_canonico
+        BEGIN
+            UPDATE AvanceEstudiante
+               SET pendiente = 1
+             WHERE id_estudiante IN (old.id_estudiante, new.id_estudiante) AND pendiente = 0;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_avance_estudiante_upd
+            AFTER UPDATE OF nombre, programa ON Estudiante
+            WHEN old.nombre IS NOT new.nombre OR old.programa IS NOT new.programa
+        BEGIN
+            UPDATE AvanceEstudiante
+               SET pendiente = 1
+             WHERE id_estudiante = new.id_estudiante AND pendiente = 0;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_avance_curso_programa_upd
+            AFTER UPDATE OF codigo_programa ON Curso
+            WHEN old.codigo_programa IS NOT new.codigo_programa
+        BEGIN
+            UPDATE AvanceEstudiante
+               SET pendiente = 1
+             WHERE pendiente = 0
+               AND id_estudiante IN (
+                   SELECT i.id_estudiante
+                     FROM Inscripcion i INDEXED BY idx_insc_curso
+                    WHERE i.id_curso = new.id_curso
+               );
+        END;
+        """,
+    )
+
+
+def _m011_trabajo_propietario(conn: sqlite3.Connection) -> None:
+    """
+    TrabajoCargue.propietario: token del ejecutor (host, pid y lanzamiento)
+    que corre el trabajo. Junto con `fecha_actualizacion`, que el ejecutor
+    refresca en cada bloque, permite saber si un trabajo activo sigue vivo
+    aunque lo haya lanzado otro proceso del servidor.
+    """
+    _agregar_columnas(conn, "TrabajoCargue", [("propietario", "TEXT")])
+
+
+def _m012_generacion_inscripcion(conn: sqlite3.Connection) -> None:
+    """
+    GeneracionInscripcion: contador de una sola fila que los triggers suben
+    con cada alta, baja o cambio de nota, periodo o versión en Inscripcion.
+    Es la firma del snapshot analítico (snapshot_analitico.firma_inscripciones).
+    """
+    _ejecutar_script(
+        conn,
+        """
+        CREATE TABLE IF NOT EXISTS GeneracionInscripcion (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            generacion INTEGER NOT NULL DEFAULT 0
+        );
+
+        INSERT OR IGNORE INTO GeneracionInscripcion (id, generacion) VALUES (1, 0);
+
+        CREATE TRIGGER IF NOT EXISTS trg_generacion_insc_ins AFTER INSERT ON Inscripcion
+        BEGIN
+            UPDATE GeneracionInscripcion SET generacion = generacion + 1 WHERE id = 1;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_generacion_insc_del AFTER DELETE ON Inscripcion
+        BEGIN
+            UPDATE GeneracionInscripcion SET generacion = generacion + 1 WHERE id = 1;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_generacion_insc_upd
+            AFTER UPDATE OF nota, id_periodo, version_periodo ON Inscripcion
+            WHEN old.nota IS NOT new.nota
+              OR old.id_periodo IS NOT new.id_periodo
+              OR old.version_periodo IS NOT new.version_periodo
+        BEGIN
+            UPDATE GeneracionInscripcion SET generacion = generacion + 1 WHERE id = 1;
+        END;
+        """,
+    )
+
+
+# (versión, descripción, función) en orden estrictamente creciente
+MIGRACIONES = [
+    (1, "Esquema base", _m001_esquema_base),
+    (2, "Columnas agregadas a Curso, Inscripcion y TrabajoCargue", _m002_columnas_agregadas),
+    (3, "Índices de Curso(codigo_programa), Inscripcion(id_curso) y Auditoria(fecha_evento)", _m003_indices_consultas),
+    (4, "Búsqueda de estudiantes con FTS5 (EstudianteFTS)", _m004_busqueda_estudiantes),
+    (5, "Código y nombre canónicos en Inscripcion", _m005_codigo_canonico),
+    (6, "Membresía EstudiantePrograma", _m006_estudiante_programa),
+    (7, "Agregados KPI del Tablero (AgregadoKPI)", _m007_agregados_kpi),
+    (8, "Auditoria.fecha_ts indexada, AuditoriaArchivo y AuditoriaDiaria", _m008_auditoria_fecha_ts),
+    (9, "Mallas persistidas: posición y alias en MallaCurso", _m009_mallas_persistidas),
+    (10, "Avance en créditos persistido (AvanceEstudiante)", _m010_avance_estudiante),
+    (11, "Propietario de los trabajos de cargue (TrabajoCargue.propietario)", _m011_trabajo_propietario),
+    (12, "Contador de cambios de Inscripcion (GeneracionInscripcion)", _m012_generacion_inscripcion),
+]
+
+VERSION_ESQUEMA = MIGRACIONES[-1][0]
+
+
+# -------------------------------------------------
+# EJECUCIÓN
+# -------------------------------------------------
+LIMITE_ANALISIS = 1000
+"""Filas muestreadas por índice en ANALYZE (PRAGMA analysis_limit): estadísticas
+aproximadas en milisegundos incluso con cientos de miles de filas."""
+
+
+def actualizar_estadisticas(conn: sqlite3.Connection) -> None:
+    """
+    Recalcula sqlite_stat1 con muestreo acotado. Se llama tras las migraciones
+    y al final de cada cargue: estadísticas tomadas con la base vacía harían
+    que el planificador elija planes pésimos cuando las tablas ya son grandes.
+    No hace commit.
+    """
+    conn.execute(f"PRAGMA analysis_limit = {int(LIMITE_ANALISIS)};")
+    conn.execute("ANALYZE;")
+
+
+def version_actual(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version;").fetchone()[0]
+
+
+def aplicar_migraciones(conn: sqlite3.Connection) -> list[int]:
+    """
+    Lleva la base a VERSION_ESQUEMA aplicando las migraciones pendientes.
+    Si aplicó alguna, actualiza las estadísticas para que el planificador use
+    los índices nuevos.
+    Retorna las versiones aplicadas (vacía si la base ya estaba al día).
+    """
+    version = version_actual(conn)
+    if version >= VERSION_ESQUEMA:
+        return []
+
+    conn.commit()  # Sin transacción abierta: cada migración es atómica
+    aplicadas = []
+    for numero, descripcion, migracion in MIGRACIONES:
+        if numero <= version:
+            continue
+        try:
+            # IMMEDIATE: otro proceso que migra en paralelo espera aquí y luego
+            # ve la versión ya actualizada
+            conn.execute("BEGIN IMMEDIATE")
+            if version_actual(conn) >= numero:
+                conn.rollback()
+                continue
+            migracion(conn)
+            conn.execute(f"PRAGMA user_version = {int(numero)};")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        aplicadas.append(numero)
+        print(f"🛠️ Migración {numero} aplicada: {descripcion}")
+
+    if aplicadas:
+        actualizar_estadisticas(conn)
+        conn.commit()
+    return aplicadas
+
+
+if __name__ == "__main__":
+    from database.conexion import conexion
+    from database.db_init import DB_PATH
+
+    with conexion(DB_PATH) as conn:
+        aplicadas = aplicar_migraciones(conn)
+        print(f"📘 Esquema en versión {version_actual(conn)} ({len(aplicadas)} migraciones aplicadas)")
@@ -1,31 +1,49 @@
+import base64
+import json
+import re
 import sqlite3
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 
+import numpy as np
+import pandas as pd
+
+from database.conexion import conexion
+
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 DB_PATH = BASE_DIR / "data" / "sia.db"
 
 
 def _connect():
-    return sqlite3.connect(DB_PATH)
-
-
-def obtener_kpis_programa() -> Dict[str, Any]:
-    with _connect() as conn:
-        cur = conn.cursor()
+    """Conexión del pool compartido (WAL, busy_timeout) como contexto transaccional."""
+    return conexion(DB_PATH)
 
-        cur.execute("SELECT COUNT(*) FROM Estudiante;")
-        total_estudiantes = cur.fetchone()[0] or 0
 
-        cur.execute("SELECT COUNT(*) FROM Curso;")
-        total_cursos = cur.fetchone()[0] or 0
+def obtener_kpis_programa(
+    codigo_programa: Optional[str] = None, id_periodo: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    KPIs del Tablero leídos de AgregadoKPI (una fila por ámbito, mantenida por
+    triggers), sin recorrer Estudiante / Curso / Inscripcion.
 
-        cur.execute("SELECT COUNT(*) FROM Inscripcion;")
-        total_inscripciones = cur.fetchone()[0] or 0
+    - Sin filtros: totales globales.
+    - codigo_programa: estudiantes del programa, sus cursos e inscripciones.
+    - id_periodo: estudiantes y cursos con inscripción en el periodo.
+    """
+    with _connect() as conn:
+        fila = conn.execute(
+            """
+            SELECT estudiantes, cursos, inscripciones, notas, suma_notas
+              FROM AgregadoKPI
+             WHERE codigo_programa = ? AND id_periodo = ?;
+            """,
+            (codigo_programa or "*", id_periodo or "*"),
+        ).fetchone()
 
-        cur.execute("SELECT AVG(nota) FROM Inscripcion WHERE nota IS NOT NULL;")
-        prom = cur.fetchone()[0]
-        promedio_general = round(prom, 2) if prom is not None else None
+    total_estudiantes, total_cursos, total_inscripciones, notas, suma_notas = fila or (
+        0, 0, 0, 0, 0.0
+    )
+    promedio_general = round(suma_notas / notas, 2) if notas else None
 
     return {
         "total_estudiantes": total_estudiantes,
@@ -35,6 +53,28 @@ def obtener_kpis_programa() -> Dict[str, Any]:
     }
 
 
+def listar_ambitos_kpi() -> Dict[str, List[str]]:
+    """Programas y periodos con KPIs disponibles (opciones de filtro del Tablero)."""
+    with _connect() as conn:
+        programas = [
+            r[0]
+            for r in conn.execute(
+                "SELECT codigo_programa FROM AgregadoKPI "
+                "WHERE id_periodo = '*' AND codigo_programa <> '*' "
+                "AND (inscripciones > 0 OR cursos > 0) ORDER BY codigo_programa;"
+            )
+        ]
+        periodos = [
+            r[0]
+            for r in conn.execute(
+                "SELECT id_periodo FROM AgregadoKPI "
+                "WHERE codigo_programa = '*' AND id_periodo <> '*' "
+                "AND inscripciones > 0 ORDER BY id_periodo DESC;"
+            )
+        ]
+    return {"programas": programas, "periodos": periodos}
+
+
 def listar_estudiantes(limit: int = 200) -> List[Dict[str, Any]]:
     with _connect() as conn:
         conn.row_factory = sqlite3.Row
@@ -55,45 +95,160 @@ def listar_estudiantes(limit: int = 200) -> List[Dict[str, Any]]:
     return [dict(r) for r in rows]
 
 
+# -------------------------------------------------
+# Paginación por clave (keyset)
+# -------------------------------------------------
+# En lugar de OFFSET (que recorre y descarta todas las filas anteriores), cada
+# página busca directamente a partir de la última clave de orden entregada:
+# WHERE clave > :ultima ORDER BY clave LIMIT n, resuelto con el índice del
+# orden. Cualquier página cuesta lo mismo. La clave viaja como un token opaco.
+
+
+def _codificar_token(tipo: str, clave: list) -> str:
+    datos = json.dumps({"t": tipo, "k": clave}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(datos.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decodificar_token(tipo: str, token: Optional[str]) -> Optional[list]:
+    """Clave de orden de `token` (None = primera página)."""
+    if not token:
+        return None
+    try:
+        relleno = "=" * (-len(token) % 4)
+        datos = json.loads(base64.urlsafe_b64decode(token + relleno))
+    except (ValueError, TypeError):
+        raise ValueError("Token de página inválido.") from None
+    if not isinstance(datos, dict) or datos.get("t") != tipo or not isinstance(datos.get("k"), list):
+        raise ValueError("Token de página inválido.")
+    return datos["k"]
+
+
+def listar_estudiantes_pagina(
+    tamano: int = 200, despues: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Página de estudiantes ordenados por id_estudiante.
+
+    - despues: token `siguiente` de la página anterior (None = primera página)
+    Retorna {"filas": [dict, ...], "siguiente": token | None}.
+    """
+    clave = _decodificar_token("estudiantes", despues)
+    with _connect() as conn:
+        conn.row_factory = sqlite3.Row
+        rows = conn.execute(
+            f"""
+            SELECT e.id_estudiante,
+                   COALESCE(NULLIF(TRIM(e.nombre), ''), 'Desconocido') AS nombre,
+                   COALESCE(NULLIF(TRIM(e.programa), ''), 'Pendiente') AS programa,
+                   e.correo_institucional
+            FROM Estudiante e
+            {"WHERE e.id_estudiante > ?" if clave else ""}
+            ORDER BY e.id_estudiante
+            LIMIT ?;
+            """,
+            (*(clave or ()), int(tamano) + 1),
+        ).fetchall()
+
+    filas = [dict(r) for r in rows[:tamano]]
+    siguiente = None
+    if len(rows) > tamano:
+        siguiente = _codificar_token("estudiantes", [filas[-1]["id_estudiante"]])
+    return {"filas": filas, "siguiente": siguiente}
+
+
+AYUDA_BUSQUEDA = (
+    "Busca por inicio de palabra sin distinguir tildes ni mayúsculas: "
+    "«nunez jo» encuentra «NÚÑEZ JOSÉ»; un ID parcial lista los que empiezan así."
+)
+
+_COLUMNAS_BUSQUEDA = """
+    e.id_estudiante,
+    COALESCE(NULLIF(TRIM(e.nombre), ''), 'Desconocido') AS nombre,
+    COALESCE(NULLIF(TRIM(e.programa), ''), 'Pendiente') AS programa,
+    e.correo_institucional
+"""
+
+
+def _consulta_fts(texto: str) -> str:
+    """
+    Texto libre → consulta FTS5: cada palabra como prefijo y todas requeridas
+    ("nuñez jo" → '"nuñez"* "jo"*'). Tildes y mayúsculas las pliega el
+    tokenizador unicode61 tanto al indexar como al consultar.
+    """
+    return " ".join(f'"{termino}"*' for termino in re.findall(r"\w+", texto))
+
+
 def buscar_estudiantes(query: str, limit: int = 50) -> List[Dict[str, Any]]:
+    """
+    Busca estudiantes por nombre o ID usando el índice EstudianteFTS:
+    prefijos por palabra, sin distinguir tildes ni mayúsculas ("nunez" encuentra
+    "NÚÑEZ", "jos" encuentra "JOSÉ"), ordenados por relevancia (bm25) con la
+    coincidencia exacta de ID primero. Si la base no tiene FTS5 usa LIKE.
+    """
     q = (query or "").strip()
+    consulta_fts = _consulta_fts(q)
     with _connect() as conn:
         conn.row_factory = sqlite3.Row
         cur = conn.cursor()
-        if q.isdigit():
+        if not consulta_fts:
+            cur.execute(
+                f"SELECT {_COLUMNAS_BUSQUEDA} FROM Estudiante e ORDER BY e.nombre LIMIT ?;",
+                (limit,),
+            )
+            return [dict(r) for r in cur.fetchall()]
+        # rowid del ID exacto (si existe) para listarlo primero
+        cur.execute("SELECT rowid FROM Estudiante WHERE id_estudiante = ?;", (q,))
+        fila_exacta = (cur.fetchone() or [None])[0]
+        try:
+            # 1) Ranking dentro del índice FTS: solo rowid, sin leer Estudiante
             cur.execute(
                 """
-                SELECT e.id_estudiante,
-                       COALESCE(NULLIF(TRIM(e.nombre), ''), 'Desconocido') AS nombre,
-                       COALESCE(NULLIF(TRIM(e.programa), ''), 'Pendiente') AS programa,
-                       e.correo_institucional
-                FROM Estudiante e
-                WHERE e.id_estudiante = ?
+                SELECT rowid FROM EstudianteFTS
+                WHERE EstudianteFTS MATCH ?
+                ORDER BY (rowid IS ?) DESC, bm25(EstudianteFTS)
                 LIMIT ?;
-            """,
-                (q, limit),
+                """,
+                (consulta_fts, fila_exacta, limit),
             )
-        else:
+            orden = [fila[0] for fila in cur.fetchall()]
+        except sqlite3.OperationalError:
+            # Base sin FTS5: búsqueda por subcadena (lenta y sensible a tildes)
             cur.execute(
-                """
-                SELECT e.id_estudiante,
-                       COALESCE(NULLIF(TRIM(e.nombre), ''), 'Desconocido') AS nombre,
-                       COALESCE(NULLIF(TRIM(e.programa), ''), 'Pendiente') AS programa,
-                       e.correo_institucional
+                f"""
+                SELECT {_COLUMNAS_BUSQUEDA}
                 FROM Estudiante e
-                WHERE UPPER(e.nombre) LIKE '%' || UPPER(?) || '%'
-                ORDER BY e.nombre
+                WHERE e.id_estudiante = ?
+                   OR UPPER(e.nombre) LIKE '%' || UPPER(?) || '%'
+                ORDER BY (e.id_estudiante = ?) DESC, e.nombre
                 LIMIT ?;
-            """,
-                (q, limit),
+                """,
+                (q, q, q, limit),
             )
-        rows = cur.fetchall()
-    return [dict(r) for r in rows]
+            return [dict(r) for r in cur.fetchall()]
+
+        if not orden:
+            return []
+        # 2) Datos de esas filas por rowid (búsqueda directa, independiente de
+        #    las estadísticas del planificador), devueltos en el orden del ranking
+        cur.execute(
+            f"""
+            SELECT e.rowid AS fila, {_COLUMNAS_BUSQUEDA}
+            FROM Estudiante e
+            WHERE e.rowid IN ({", ".join("?" for _ in orden)});
+            """,
+            orden,
+        )
+        por_fila = {}
+        for r in cur.fetchall():
+            registro = dict(r)
+            por_fila[registro.pop("fila")] = registro
+    return [por_fila[fila] for fila in orden if fila in por_fila]
 
 
 def historial_estudiante(id_estudiante: str) -> List[Dict[str, Any]]:
     """
-    Historial del estudiante con preferencia por el snapshot de Inscripcion.
+    Historial del estudiante con preferencia por el snapshot de Inscripcion
+    (ya materializado en codigo_canonico / nombre_canonico).
     """
     with _connect() as conn:
         conn.row_factory = sqlite3.Row
@@ -105,8 +260,8 @@ def historial_estudiante(id_estudiante: str) -> List[Dict[str, Any]]:
                 p.anio,
                 p.periodo,
                 i.id_curso AS nrc,
-                COALESCE(NULLIF(TRIM(i.codigo_alfanumerico), ''), c.codigo_alfanumerico) AS codigo_curso,
-                COALESCE(NULLIF(TRIM(i.nombre_curso), ''), c.nombre) AS nombre_curso,
+                i.codigo_canonico AS codigo_curso,
+                i.nombre_canonico AS nombre_curso,
                 c.codigo_programa AS codigo_programa,
                 i.nota,
                 i.version_periodo
@@ -144,25 +299,17 @@ def datos_estudiante(id_estudiante: str) -> Optional[Dict[str, Any]]:
 from database.db_init import DB_PATH
 
 
-def obtener_notas_por_umbral(tipo: str, id_periodo: str, umbral: float):
-    """
-    Retorna inscripciones por umbral, prefiriendo snapshot de Inscripcion.
-    """
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-
+def _sql_notas_por_umbral(tipo: str) -> str:
     operador = "<" if tipo == "bajo" else ">="
-
-    query = f"""
+    return f"""
         SELECT 
             e.id_estudiante,
             e.nombre,
             e.programa,
             i.id_curso,
             c.codigo_programa AS codigo_programa,
-            COALESCE(NULLIF(TRIM(i.codigo_alfanumerico), ''), c.codigo_alfanumerico) AS codigo_alfanumerico,
-            COALESCE(NULLIF(TRIM(i.nombre_curso), ''), c.nombre) AS nombre_curso,
+            i.codigo_canonico AS codigo_alfanumerico,
+            i.nombre_canonico AS nombre_curso,
             i.nota,
             i.version_periodo,
             i.id_periodo
@@ -174,12 +321,39 @@ def obtener_notas_por_umbral(tipo: str, id_periodo: str, umbral: float):
         ORDER BY e.nombre ASC;
     """
 
-    cursor.execute(query, (id_periodo, umbral))
-    resultados = cursor.fetchall()
 
-    df = [dict(row) for row in resultados]
-    conn.close()
-    return df
+def obtener_notas_por_umbral(tipo: str, id_periodo: str, umbral: float):
+    """
+    Retorna inscripciones por umbral, prefiriendo snapshot de Inscripcion.
+    """
+    with _connect() as conn:
+        conn.row_factory = sqlite3.Row
+        resultados = conn.execute(
+            _sql_notas_por_umbral(tipo), (id_periodo, umbral)
+        ).fetchall()
+
+    return [dict(row) for row in resultados]
+
+
+def obtener_archivo_cargado(huella_archivo: str) -> Optional[Dict[str, Any]]:
+    """Devuelve el registro de ArchivoCargado para esa huella SHA-256, o None."""
+    with _connect() as conn:
+        conn.row_factory = sqlite3.Row
+        cur = conn.cursor()
+        try:
+            cur.execute(
+                """
+                SELECT huella_archivo, nombre_archivo, total_registros, fecha_cargue
+                FROM ArchivoCargado
+                WHERE huella_archivo = ?;
+            """,
+                (huella_archivo,),
+            )
+        except sqlite3.OperationalError:
+            # Base anterior a v0.4 (aún sin tabla ArchivoCargado)
+            return None
+        row = cur.fetchone()
+    return dict(row) if row else None
 
 
 def listar_periodos() -> list[str]:
@@ -208,50 +382,92 @@ def listar_eventos_auditoria(
     Devuelve eventos de la tabla Auditoria con filtros opcionales.
     - usuario: substring case-insensitive en la columna 'usuario'
     - filtro:  substring case-insensitive que busca en 'usuario' o 'accion'
-    - desde/hasta: se comparan con datetime(fecha_evento)
+    - desde/hasta: rango sobre fecha_ts (epoch entero, idx_auditoria_ts); el
+      parámetro se convierte una sola vez, la columna queda sin funciones
     - limit: tope de filas
     """
+    sql, params = _sql_eventos_auditoria(limit, usuario, desde, hasta, filtro)
     with _connect() as conn:
         conn.row_factory = sqlite3.Row
-        cur = conn.cursor()
-
-        sql = """
-            SELECT id_evento, usuario, accion, fecha_evento
-            FROM Auditoria
-            WHERE 1=1
-        """
-        params: list[Any] = []
+        rows = conn.execute(sql, params).fetchall()
 
-        if usuario:
-            sql += " AND UPPER(usuario) LIKE '%' || UPPER(?) || '%'"
-            params.append(usuario)
-
-        if filtro:
-            sql += " AND (UPPER(usuario) LIKE '%' || UPPER(?) || '%' OR UPPER(accion) LIKE '%' || UPPER(?) || '%')"
-            params.extend([filtro, filtro])
-
-        if desde:
-            sql += " AND datetime(fecha_evento) >= datetime(?)"
-            params.append(desde)
-
-        if hasta:
-            sql += " AND datetime(fecha_evento) <= datetime(?)"
-            params.append(hasta)
+    return [dict(r) for r in rows]
 
-        sql += " ORDER BY datetime(fecha_evento) DESC LIMIT ?"
-        params.append(int(limit))
 
-        cur.execute(sql, params)
-        rows = cur.fetchall()
+def _sql_eventos_auditoria(
+    limit: int,
+    usuario: Optional[str],
+    desde: Optional[str],
+    hasta: Optional[str],
+    filtro: Optional[str],
+    despues: Optional[list] = None,
+) -> tuple[str, list[Any]]:
+    """
+    SQL y parámetros del listado de auditoría (filtros de listar_eventos_auditoria).
+    Orden: fecha_ts DESC, id_evento DESC (lo recorre idx_auditoria_ts, que
+    incluye el rowid); `despues` = [fecha_ts, id_evento] de la última fila ya
+    mostrada.
+    """
+    sql = """
+        SELECT id_evento, usuario, accion, fecha_evento, fecha_ts
+        FROM Auditoria
+        WHERE 1=1
+    """
+    params: list[Any] = []
+
+    if usuario:
+        sql += " AND UPPER(usuario) LIKE '%' || UPPER(?) || '%'"
+        params.append(usuario)
+
+    if filtro:
+        sql += " AND (UPPER(usuario) LIKE '%' || UPPER(?) || '%' OR UPPER(accion) LIKE '%' || UPPER(?) || '%')"
+        params.extend([filtro, filtro])
+
+    if desde:
+        sql += " AND fecha_ts >= CAST(strftime('%s', ?) AS INTEGER)"
+        params.append(desde)
+
+    if hasta:
+        sql += " AND fecha_ts <= CAST(strftime('%s', ?) AS INTEGER)"
+        params.append(hasta)
+
+    if despues:
+        sql += " AND (fecha_ts, id_evento) < (?, ?)"
+        params.extend(despues)
+
+    sql += " ORDER BY fecha_ts DESC, id_evento DESC LIMIT ?"
+    params.append(int(limit))
+    return sql, params
+
+_SQL_HISTORIAL_PROGRAMA = """
+SELECT
+    i.id_estudiante AS id_estudiante,
+    COALESCE(NULLIF(TRIM(e.nombre), ''), 'Desconocido') AS nombre,
+    COALESCE(NULLIF(TRIM(e.programa), ''), 'Pendiente') AS programa,
+    c.codigo_programa AS codigo_programa,
+    i.id_periodo AS id_periodo,
+    i.id_curso AS nrc,
+    i.codigo_canonico AS codigo_curso,
+    i.nombre_canonico AS nombre_curso,
+    i.nota AS nota,
+    i.version_periodo AS version_periodo
+FROM EstudiantePrograma ep
+JOIN Inscripcion i ON i.id_estudiante = ep.id_estudiante
+JOIN Estudiante e ON i.id_estudiante = e.id_estudiante
+LEFT JOIN Curso c ON i.id_curso = c.id_curso
+WHERE ep.codigo_programa = ?
+ORDER BY i.id_estudiante ASC, i.id_periodo ASC, i.id_curso ASC;
+"""
 
-    return [dict(r) for r in rows]
 
 def obtener_historial_estudiantes_por_programa(
     codigo_programa: str,
 ) -> list[dict]:
     """
     Devuelve el historial académico crudo de todos los estudiantes
-    asociados al programa indicado por `codigo_programa`.
+    asociados al programa indicado por `codigo_programa`. La cohorte sale de
+    EstudiantePrograma (búsqueda por clave primaria), no de recorrer
+    Inscripcion × Curso.
 
     Cada dict de la lista incluye:
     - id_estudiante: str
@@ -268,37 +484,398 @@ def obtener_historial_estudiantes_por_programa(
     with _connect() as conn:
         conn.row_factory = sqlite3.Row
         cur = conn.cursor()
-        cur.execute(
+        cur.execute(_SQL_HISTORIAL_PROGRAMA, (codigo_programa,))
+        rows = cur.fetchall()
+    return [dict(r) for r in rows]
+
+
+# -------------------------------------------------
+# Mallas curriculares guardadas (MallaCurricular / MallaCurso)
+# -------------------------------------------------
+def listar_mallas_guardadas() -> List[Dict[str, Any]]:
+    """Mallas guardadas en la base, una por programa, con su número de cursos."""
+    with _connect() as conn:
+        conn.row_factory = sqlite3.Row
+        filas = conn.execute(
             """
-            SELECT
-                i.id_estudiante AS id_estudiante,
-                COALESCE(NULLIF(TRIM(e.nombre), ''), 'Desconocido') AS nombre,
-                COALESCE(NULLIF(TRIM(e.programa), ''), 'Pendiente') AS programa,
-                c.codigo_programa AS codigo_programa,
-                i.id_periodo AS id_periodo,
-                i.id_curso AS nrc,
-                COALESCE(
-                    NULLIF(TRIM(i.codigo_alfanumerico), ''),
-                    c.codigo_alfanumerico
-                ) AS codigo_curso,
-                COALESCE(
-                    NULLIF(TRIM(i.nombre_curso), ''),
-                    c.nombre
-                ) AS nombre_curso,
-                i.nota AS nota,
-                i.version_periodo AS version_periodo
-            FROM Inscripcion i
-            JOIN Estudiante e ON i.id_estudiante = e.id_estudiante
-            LEFT JOIN Curso c ON i.id_curso = c.id_curso
-            WHERE i.id_estudiante IN (
-                SELECT DISTINCT i2.id_estudiante
-                FROM Inscripcion i2
-                LEFT JOIN Curso c2 ON c2.id_curso = i2.id_curso
-                WHERE c2.codigo_programa = ?
+            SELECT m.codigo_programa,
+                   m.nombre_malla,
+                   COALESCE(NULLIF(TRIM(m.programa), ''), p.descripcion_programa, m.nombre_malla)
+                       AS programa,
+                   m.creditos_totales,
+                   m.huella,
+                   m.fecha_actualizacion,
+                   (SELECT COUNT(DISTINCT mc.posicion)
+                      FROM MallaCurso mc
+                     WHERE mc.id_malla = m.id_malla) AS cursos
+              FROM MallaCurricular m
+              LEFT JOIN Programa p ON p.codigo_programa = m.codigo_programa
+             ORDER BY m.codigo_programa;
+            """
+        ).fetchall()
+    return [dict(f) for f in filas]
+
+
+def huella_malla_guardada(codigo_programa: str) -> Optional[str]:
+    """Huella de la malla guardada del programa (None si no hay)."""
+    with _connect() as conn:
+        fila = conn.execute(
+            "SELECT huella FROM MallaCurricular WHERE codigo_programa = ?;",
+            (codigo_programa,),
+        ).fetchone()
+    return fila[0] if fila else None
+
+
+def obtener_malla_guardada(codigo_programa: str) -> Optional[Dict[str, Any]]:
+    """
+    Malla guardada del programa con la misma estructura que
+    validar_y_normalizar_malla (más "huella"), o None si no hay.
+    """
+    with _connect() as conn:
+        cabecera = conn.execute(
+            """
+            SELECT id_malla, codigo_programa, nombre_malla, programa, creditos_totales, huella
+              FROM MallaCurricular
+             WHERE codigo_programa = ?;
+            """,
+            (codigo_programa,),
+        ).fetchone()
+        if cabecera is None:
+            return None
+        filas = conn.execute(
+            """
+            SELECT posicion, codigo_curso, nombre_oficial, creditos, cuatrimestre
+              FROM MallaCurso
+             WHERE id_malla = ?
+             ORDER BY posicion, orden_alias;
+            """,
+            (cabecera[0],),
+        ).fetchall()
+
+    plan: List[Dict[str, Any]] = []
+    anterior = None
+    for posicion, codigo, nombre, creditos, cuatrimestre in filas:
+        if posicion == anterior:
+            # Otro código del mismo curso (alias)
+            curso = plan[-1]["cursos"][-1]
+            if not isinstance(curso["codigo"], list):
+                curso["codigo"] = [curso["codigo"]]
+            curso["codigo"].append(codigo)
+            continue
+        anterior = posicion
+        if not plan or plan[-1]["cuatrimestre"] != cuatrimestre:
+            plan.append({"cuatrimestre": cuatrimestre, "cursos": []})
+        plan[-1]["cursos"].append({"codigo": codigo, "nombre": nombre, "creditos": creditos})
+
+    return {
+        "codigo_programa": cabecera[1],
+        "nombre_malla": cabecera[2],
+        "programa": cabecera[3] or cabecera[2],
+        "creditos_totales": cabecera[4],
+        "plan": plan,
+        "huella": cabecera[5],
+    }
+
+
+# -------------------------------------------------
+# Variantes columnares (consultas masivas)
+# -------------------------------------------------
+# Las funciones anteriores devuelven una lista de dicts: un objeto Python por
+# fila más un str/float por celda, que luego se vuelve a copiar a un
+# DataFrame. Para cohortes completas y las páginas de auditoría, las lecturas
+# columnares (_leer_columnar) toman el cursor por lotes (fetchmany) y arman cada
+# columna directamente con su tipo: float64 para notas, Int64 para enteros
+# nulables, datetime64 para fechas y `category` para textos repetidos
+# (programa, periodo, código de curso), que se guardan una sola vez.
+
+TAMANO_LOTE_COLUMNAR = 20000
+
+# Tipos por columna: "categoria", "real", "entero", "fecha" o "texto"
+_TIPOS_HISTORIAL_PROGRAMA = {
+    "id_estudiante": "categoria",
+    "nombre": "categoria",
+    "programa": "categoria",
+    "codigo_programa": "categoria",
+    "id_periodo": "categoria",
+    "nrc": "categoria",
+    "codigo_curso": "categoria",
+    "nombre_curso": "categoria",
+    "nota": "real",
+    "version_periodo": "entero",
+}
+
+_TIPOS_EVENTOS_AUDITORIA = {
+    "id_evento": "entero",
+    "usuario": "categoria",
+    "accion": "texto",
+    "fecha_evento": "fecha",
+    "fecha_ts": "entero",
+}
+
+
+def _leer_columnar(
+    sql: str,
+    params: tuple | list,
+    tipos: Dict[str, str],
+    tamano_lote: int = TAMANO_LOTE_COLUMNAR,
+) -> pd.DataFrame:
+    """
+    Ejecuta `sql` y construye un DataFrame columna por columna a partir de
+    lotes del cursor, sin materializar dicts por fila.
+
+    Las categorías se codifican lote a lote contra un diccionario común
+    (valor -> código), así la memoria crece con los códigos (int32) y no con
+    las cadenas repetidas.
+    """
+    with _connect() as conn:
+        conn.row_factory = None
+        cur = conn.execute(sql, params)
+        columnas = [d[0] for d in cur.description]
+        partes: Dict[str, list] = {c: [] for c in columnas}
+        categorias: Dict[str, Dict[Any, int]] = {
+            c: {} for c in columnas if tipos.get(c) == "categoria"
+        }
+
+        while True:
+            lote = cur.fetchmany(tamano_lote)
+            if not lote:
+                break
+            for col, valores in zip(columnas, zip(*lote)):
+                tipo = tipos.get(col, "texto")
+                if tipo == "categoria":
+                    # Códigos locales del lote -> códigos globales (-1 = NULL)
+                    codigos, unicos = pd.factorize(
+                        np.asarray(valores, dtype=object), use_na_sentinel=True
+                    )
+                    mapa = categorias[col]
+                    traduccion = np.fromiter(
+                        (mapa.setdefault(u, len(mapa)) for u in unicos),
+                        dtype=np.int32,
+                        count=len(unicos),
+                    )
+                    globales = np.full(len(codigos), -1, dtype=np.int32)
+                    validos = codigos >= 0
+                    globales[validos] = traduccion[codigos[validos]]
+                    partes[col].append(globales)
+                elif tipo == "real":
+                    partes[col].append(np.array(valores, dtype=np.float64))
+                else:
+                    partes[col].append(valores)
+
+    datos: Dict[str, Any] = {}
+    for col in columnas:
+        tipo = tipos.get(col, "texto")
+        trozos = partes[col]
+        if tipo == "categoria":
+            codigos = (
+                np.concatenate(trozos) if trozos else np.empty(0, dtype=np.int32)
+            )
+            datos[col] = pd.Categorical.from_codes(
+                codigos, categories=list(categorias[col])
             )
-            ORDER BY i.id_estudiante ASC, i.id_periodo ASC, i.id_curso ASC;
+        elif tipo == "real":
+            datos[col] = (
+                np.concatenate(trozos) if trozos else np.empty(0, dtype=np.float64)
+            )
+        else:
+            valores = [v for trozo in trozos for v in trozo]
+            if tipo == "entero":
+                datos[col] = pd.array(valores, dtype="Int64")
+            elif tipo == "fecha":
+                datos[col] = pd.to_datetime(
+                    pd.Series(valores, dtype=object), errors="coerce"
+                )
+            else:
+                datos[col] = pd.Series(valores, dtype=object)
+
+    return pd.DataFrame(datos, columns=columnas)
+
+
+def obtener_historial_programa_columnar(codigo_programa: str) -> pd.DataFrame:
+    """
+    Igual que `obtener_historial_estudiantes_por_programa`, pero como
+    DataFrame columnar (mismas columnas y orden de filas). Pensado para
+    cohortes grandes y cálculos vectorizados.
+    """
+    return _leer_columnar(
+        _SQL_HISTORIAL_PROGRAMA, (codigo_programa,), _TIPOS_HISTORIAL_PROGRAMA
+    )
+
+
+# -------------------------------------------------
+# Créditos de malla por estudiante (cálculo en SQLite)
+# -------------------------------------------------
+# Mismas reglas que credit_progress.calcular_avance_programa_df, pero sin
+# sacar el historial de la base: por cada estudiante de la cohorte y código
+# de la malla se buscan sus inscripciones en idx_insc_est_codigo
+# (id_estudiante, codigo_canonico), se toma la mejor prioridad por curso
+# (TRANSFERENCIA 3 > APROBADO 2 > PERDIDO 1) y se suman créditos. De SQLite
+# sale una sola fila por estudiante. El orden de los CROSS JOIN fija ese
+# plan aunque las estadísticas sean de una base casi vacía.
+_SQL_CREDITOS_MALLA = """
+WITH malla(codigo, posicion) AS ({malla}),
+     cursos(posicion, creditos) AS ({cursos}),
+     cohorte AS MATERIALIZED (
+        SELECT ep.id_estudiante
+          FROM EstudiantePrograma ep
+         WHERE ep.codigo_programa = ?
+           AND TRIM(ep.id_estudiante) <> ''{filtro}
+     ),
+     mejor AS (
+        SELECT i.id_estudiante,
+               m.posicion,
+               MAX(CASE
+                       WHEN TRIM(i.id_curso) LIKE 'TRANSF-%' THEN 3
+                       WHEN COALESCE(i.nota, 0) >= 3.0 THEN 2
+                       ELSE 1
+                   END) AS prioridad
+          FROM cohorte co
+         CROSS JOIN malla m
+         CROSS JOIN Inscripcion i INDEXED BY idx_insc_est_codigo
+         WHERE i.id_estudiante = co.id_estudiante
+           AND m.codigo = i.codigo_canonico
+         GROUP BY i.id_estudiante, m.posicion
+     ),
+     sumas AS (
+        SELECT mj.id_estudiante,
+               SUM(CASE WHEN mj.prioridad >= 2 THEN cu.creditos ELSE 0 END) AS aprob_transf,
+               SUM(CASE WHEN mj.prioridad = 1 THEN cu.creditos ELSE 0 END) AS perdidos
+          FROM mejor mj
+          JOIN cursos cu ON cu.posicion = mj.posicion
+         GROUP BY mj.id_estudiante
+     )
+SELECT co.id_estudiante AS id_estudiante,
+       COALESCE(NULLIF(TRIM(e.nombre), ''), 'Desconocido') AS nombre,
+       COALESCE(NULLIF(TRIM(e.programa), ''), 'Pendiente') AS programa,
+       (SELECT c.codigo_programa
+          FROM Inscripcion p INDEXED BY idx_insc_est_codigo
+          LEFT JOIN Curso c ON c.id_curso = p.id_curso
+         WHERE p.id_estudiante = co.id_estudiante
+         ORDER BY p.id_periodo, p.id_curso
+         LIMIT 1) AS codigo_programa,
+       COALESCE(s.aprob_transf, 0) AS cred_aprob_transf,
+       COALESCE(s.perdidos, 0) AS cred_perdidos
+  FROM cohorte co
+  JOIN Estudiante e ON e.id_estudiante = co.id_estudiante
+  LEFT JOIN sumas s ON s.id_estudiante = co.id_estudiante
+ WHERE EXISTS (SELECT 1 FROM Inscripcion x INDEXED BY idx_insc_est_codigo
+                WHERE x.id_estudiante = co.id_estudiante)
+ ORDER BY co.id_estudiante;
+"""
+
+
+def _valores_sql(filas: list, columnas: int) -> tuple[str, list]:
+    """Cláusula VALUES con parámetros para `filas` (vacía si no hay filas)."""
+    if not filas:
+        return "SELECT " + ", ".join(["NULL"] * columnas) + " WHERE 0", []
+    fila = "(" + ", ".join(["?"] * columnas) + ")"
+    return "VALUES " + ", ".join([fila] * len(filas)), [v for f in filas for v in f]
+
+
+def obtener_creditos_malla_programa(
+    codigo_programa: str,
+    alias: List[str],
+    posiciones: List[int],
+    creditos: List[int],
+    estudiantes: Optional[List[str]] = None,
+) -> pd.DataFrame:
+    """
+    Créditos aprobados/transferidos y perdidos de cada estudiante del programa
+    frente a una malla, calculados en SQLite.
+
+    - alias, posiciones: un par (código, posición del curso) por código de la
+      malla (IndiceMalla.pares_alias).
+    - creditos: créditos por posición.
+    - estudiantes: si se indica, solo esos estudiantes de la cohorte.
+
+    Retorna un DataFrame (un estudiante por fila, ordenado por id) con
+    id_estudiante, nombre, programa, codigo_programa (programa del curso de
+    su primera inscripción), cred_aprob_transf y cred_perdidos.
+    """
+    malla_sql, malla_params = _valores_sql(
+        [(a, int(p)) for a, p in zip(alias, posiciones)], 2
+    )
+    cursos_sql, cursos_params = _valores_sql(
+        [(p, int(c)) for p, c in enumerate(creditos)], 2
+    )
+    filtro, filtro_params = "", []
+    if estudiantes is not None:
+        filtro = "\n           AND ep.id_estudiante IN (SELECT value FROM json_each(?))"
+        filtro_params = [json.dumps(list(estudiantes))]
+    sql = _SQL_CREDITOS_MALLA.format(malla=malla_sql, cursos=cursos_sql, filtro=filtro)
+    columnas = [
+        "id_estudiante",
+        "nombre",
+        "programa",
+        "codigo_programa",
+        "cred_aprob_transf",
+        "cred_perdidos",
+    ]
+    with _connect() as conn:
+        filas = conn.execute(
+            sql, malla_params + cursos_params + [codigo_programa] + filtro_params
+        ).fetchall()
+    return pd.DataFrame.from_records(filas, columns=columnas)
+
+
+def leer_avance_programa(codigo_programa: str) -> pd.DataFrame:
+    """
+    Avance en créditos guardado en AvanceEstudiante para el programa (lectura
+    por la llave primaria, un estudiante por fila ordenado por id), con las
+    columnas de credit_progress.COLUMNAS_AVANCE.
+    """
+    columnas = [
+        "id_estudiante",
+        "nombre",
+        "programa",
+        "codigo_programa",
+        "cred_aprob_transf",
+        "cred_perdidos",
+        "cred_pendientes",
+        "cred_totales_malla",
+        "porc_aproba_malla",
+    ]
+    with _connect() as conn:
+        filas = conn.execute(
+            """
+            SELECT id_estudiante, nombre, programa, codigo_programa_curso,
+                   cred_aprob_transf, cred_perdidos, cred_pendientes,
+                   cred_totales_malla, porc_aproba_malla
+              FROM AvanceEstudiante
+             WHERE codigo_programa = ?
+             ORDER BY id_estudiante;
             """,
             (codigo_programa,),
+        ).fetchall()
+    return pd.DataFrame.from_records(filas, columns=columnas)
+
+
+def listar_eventos_auditoria_pagina(
+    tamano: int = 100,
+    despues: Optional[str] = None,
+    usuario: Optional[str] = None,
+    desde: Optional[str] = None,
+    hasta: Optional[str] = None,
+    filtro: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Página de eventos de auditoría (más recientes primero) con los filtros de
+    `listar_eventos_auditoria`, paginada por clave (fecha_ts, id_evento).
+
+    - despues: token `siguiente` de la página anterior (None = primera página)
+    Retorna {"filas": DataFrame columnar, "siguiente": token | None}.
+    """
+    clave = _decodificar_token("auditoria", despues)
+    sql, params = _sql_eventos_auditoria(
+        int(tamano) + 1, usuario, desde, hasta, filtro, clave
+    )
+    df = _leer_columnar(sql, params, _TIPOS_EVENTOS_AUDITORIA)
+
+    siguiente = None
+    if len(df) > tamano:
+        df = df.iloc[:tamano]
+        ultima = df.iloc[-1]
+        siguiente = _codificar_token(
+            "auditoria", [int(ultima["fecha_ts"]), int(ultima["id_evento"])]
         )
-        rows = cur.fetchall()
-    return [dict(r) for r in rows]
+    return {"filas": df.drop(columns="fecha_ts"), "siguiente": siguiente}
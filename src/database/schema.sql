@@ -2,6 +2,10 @@
 -- SIA Database Schema (v0.3)
 -- Fecha: 2025-11-08
 -- Autor: Coordinador del Proyecto SIA
+--
+-- Este archivo es la migración 1 de database/migraciones.py. Columnas e
+-- índices posteriores se agregan como migraciones numeradas (PRAGMA
+-- user_version), que también reciben las bases ya existentes.
 -- ========================================
 
 PRAGMA foreign_keys = ON;
@@ -62,6 +66,9 @@ CREATE TABLE IF NOT EXISTS Inscripcion (
     codigo_alfanumerico TEXT,
     nombre_curso TEXT,
 
+    -- v0.4: huella del contenido de origen (clave + nota + snapshot) del último cargue
+    huella_fila INTEGER,
+
     FOREIGN KEY (id_estudiante) REFERENCES Estudiante(id_estudiante) ON DELETE CASCADE,
     FOREIGN KEY (id_curso) REFERENCES Curso(id_curso),
     FOREIGN KEY (id_periodo) REFERENCES PeriodoAcademico(id_periodo)
@@ -96,6 +103,40 @@ CREATE TABLE IF NOT EXISTS MallaCurso (
 CREATE INDEX IF NOT EXISTS idx_malla_curso
     ON MallaCurso(id_malla, codigo_curso);
 
+-- Tabla: ArchivoCargado (v0.4: huella SHA-256 de cada archivo ARGOS ya cargado)
+CREATE TABLE IF NOT EXISTS ArchivoCargado (
+    huella_archivo TEXT PRIMARY KEY,
+    nombre_archivo TEXT,
+    total_registros INTEGER,
+    fecha_cargue TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Tabla: TrabajoCargue (v0.5: cargues ARGOS en segundo plano, reanudables por bloque)
+CREATE TABLE IF NOT EXISTS TrabajoCargue (
+    id_trabajo INTEGER PRIMARY KEY AUTOINCREMENT,
+    nombre_archivo TEXT,
+    ruta_archivo TEXT,                 -- Copia del archivo subido (para reanudar)
+    huella_archivo TEXT,
+    estado TEXT NOT NULL DEFAULT 'pendiente',
+        -- pendiente | validando | cargando | completado | omitido | error | interrumpido
+    total_registros INTEGER,           -- Conocido tras la validación
+    filas_procesadas INTEGER DEFAULT 0,
+    bloques_confirmados INTEGER DEFAULT 0,
+    nuevos INTEGER DEFAULT 0,
+    actualizados INTEGER DEFAULT 0,
+    sin_cambios INTEGER DEFAULT 0,
+    errores INTEGER DEFAULT 0,
+    transferencias INTEGER DEFAULT 0,
+    duplicados_resueltos INTEGER DEFAULT 0,
+    estrategia_duplicados TEXT DEFAULT 'ultima',   -- ultima | mayor_nota
+    detalle TEXT,                      -- Resultados de validación / error (JSON o texto)
+    fecha_creacion TEXT DEFAULT CURRENT_TIMESTAMP,
+    fecha_actualizacion TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_trabajo_estado
+    ON TrabajoCargue(estado);
+
 -- Tabla: Auditoria
 CREATE TABLE IF NOT EXISTS Auditoria (
     id_evento INTEGER PRIMARY KEY AUTOINCREMENT,
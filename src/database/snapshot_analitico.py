@@ -0,0 +1,271 @@
+"""Snapshot analítico columnar de Inscripcion en disco (NumPy + memmap).
+
+La validación analítica (analisis_datos.validar_datos_analiticos) no necesita
+volver a SQLite y reconstruir DataFrames en cada ejecución: lee este snapshot,
+que se regenera (actualizar_snapshot) después de confirmar cada cargue.
+
+Formato (carpeta `<base>_snapshot/` junto al archivo .db):
+
+    actual.json            → {"generacion": "g000123"} (puntero atómico)
+    g000123/
+        meta.json          → filas, columnas, diccionarios y firma de la base
+        id_periodo.npy     → int32, código en el diccionario de la columna
+        nota.npy           → float64 (NaN = sin nota)
+        version_periodo.npy→ int32 (0 = sin versión)
+
+Solo se exportan las columnas que lee la validación analítica, y la firma
+(contador GeneracionInscripcion) cambia con cualquier cambio de ellas. Cada
+columna de texto queda codificada contra su diccionario (-1 = NULL) con
+ancho fijo, así que `np.load(..., mmap_mode="r")` la abre sin copiarla: la
+carga es casi instantánea y todas las sesiones/procesos comparten las mismas
+páginas del caché del sistema operativo. Una regeneración escribe una
+generación nueva y solo después mueve el puntero; los lectores que aún tienen
+abierta la anterior no se ven afectados.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from database.conexion import conexion
+
+# Columnas del snapshot: nombre → expresión SQL y tipo ("codigo" = diccionario)
+COLUMNAS_SNAPSHOT = {
+    "id_periodo": ("id_periodo", "codigo"),
+    "nota": ("nota", "real"),
+    "version_periodo": ("version_periodo", "entero"),
+}
+
+TAMANO_LOTE_SNAPSHOT = 50000
+
+_DTYPES = {"codigo": np.int32, "real": np.float64, "entero": np.int32}
+_ABIERTOS: Dict[tuple, Dict[str, Any]] = {}
+
+
+# -------------------------------------------------
+# Rutas y firma
+# -------------------------------------------------
+def ruta_snapshot(ruta_bd: str | Path) -> Path:
+    """Carpeta del snapshot de la base `ruta_bd`."""
+    ruta_bd = Path(ruta_bd)
+    return ruta_bd.with_name(f"{ruta_bd.stem}_snapshot")
+
+
+def _ruta_bd(conn: sqlite3.Connection) -> Path:
+    """Archivo de la base principal de `conn`."""
+    return Path(conn.execute("PRAGMA database_list;").fetchone()[2])
+
+
+def firma_inscripciones(conn: sqlite3.Connection) -> List[Any]:
+    """
+    Firma del contenido exportado de Inscripcion: el contador que los triggers
+    de GeneracionInscripcion suben con cada alta, baja o cambio de nota,
+    periodo o versión (cualquier columna de COLUMNAS_SNAPSHOT).
+    """
+    fila = conn.execute(
+        "SELECT generacion FROM GeneracionInscripcion WHERE id = 1;"
+    ).fetchone()
+    return [fila[0] if fila else 0]
+
+
+# -------------------------------------------------
+# Exportación
+# -------------------------------------------------
+def _codificar(valores: tuple, mapa: Dict[Any, int]) -> np.ndarray:
+    """Códigos int32 de `valores` en `mapa` (lo amplía con valores nuevos; -1 = NULL)."""
+    codigos, unicos = pd.factorize(np.asarray(valores, dtype=object), use_na_sentinel=True)
+    traduccion = np.fromiter(
+        (mapa.setdefault(u, len(mapa)) for u in unicos), dtype=np.int32, count=len(unicos)
+    )
+    salida = np.full(len(codigos), -1, dtype=np.int32)
+    validos = codigos >= 0
+    salida[validos] = traduccion[codigos[validos]]
+    return salida
+
+
+def exportar_snapshot(conn: sqlite3.Connection) -> Dict[str, Any]:
+    """
+    Escribe una generación nueva del snapshot de Inscripcion leyendo el cursor
+    por lotes: la memoria usada no depende del tamaño de la tabla. Lee dentro
+    de una transacción (solo lectura) para que firma, conteo y filas sean
+    consistentes aunque haya otro cargue; debe llamarse con los cambios ya
+    confirmados, fuera de la transacción de escritura del cargue.
+
+    Retorna {"generacion", "filas", "ruta"}.
+    """
+    base = ruta_snapshot(_ruta_bd(conn))
+    base.mkdir(parents=True, exist_ok=True)
+
+    propia = not conn.in_transaction
+    if propia:
+        conn.execute("BEGIN;")
+    try:
+        total = conn.execute("SELECT COUNT(*) FROM Inscripcion;").fetchone()[0]
+        firma = firma_inscripciones(conn)
+
+        generaciones = [int(p.name[1:]) for p in base.glob("g*") if p.name[1:].isdigit()]
+        generacion = f"g{max(generaciones, default=0) + 1:06d}"
+        destino = base / generacion
+        destino.mkdir()
+
+        columnas = list(COLUMNAS_SNAPSHOT)
+        salidas = {
+            nombre: np.lib.format.open_memmap(
+                destino / f"{nombre}.npy", mode="w+", dtype=_DTYPES[tipo], shape=(total,)
+            )
+            for nombre, (_, tipo) in COLUMNAS_SNAPSHOT.items()
+        }
+        diccionarios: Dict[str, Dict[Any, int]] = {
+            nombre: {} for nombre, (_, tipo) in COLUMNAS_SNAPSHOT.items() if tipo == "codigo"
+        }
+
+        cur = conn.execute(
+            f"""
+            SELECT {", ".join(expr for expr, _ in COLUMNAS_SNAPSHOT.values())}
+              FROM Inscripcion
+             ORDER BY id_inscripcion;
+            """
+        )
+        inicio = 0
+        while True:
+            lote = cur.fetchmany(TAMANO_LOTE_SNAPSHOT)
+            if not lote:
+                break
+            fin = inicio + len(lote)
+            for nombre, valores in zip(columnas, zip(*lote)):
+                tipo = COLUMNAS_SNAPSHOT[nombre][1]
+                if tipo == "codigo":
+                    salidas[nombre][inicio:fin] = _codificar(valores, diccionarios[nombre])
+                elif tipo == "real":
+                    salidas[nombre][inicio:fin] = np.array(valores, dtype=np.float64)
+                else:
+                    salidas[nombre][inicio:fin] = [v or 0 for v in valores]
+            inicio = fin
+    finally:
+        if propia:
+            conn.commit()
+
+    for arreglo in salidas.values():
+        arreglo.flush()
+    del salidas
+
+    meta = {
+        "filas": inicio,
+        "columnas": {nombre: tipo for nombre, (_, tipo) in COLUMNAS_SNAPSHOT.items()},
+        "diccionarios": {nombre: list(mapa) for nombre, mapa in diccionarios.items()},
+        "firma": firma,
+    }
+    (destino / "meta.json").write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+
+    # Puntero atómico a la generación nueva
+    temporal = base / "actual.json.tmp"
+    temporal.write_text(json.dumps({"generacion": generacion}), encoding="utf-8")
+    os.replace(temporal, base / "actual.json")
+
+    # Generaciones viejas: se borran si nadie las tiene abiertas (en Windows
+    # un archivo mapeado no se puede borrar; queda para la próxima vez)
+    for anterior in base.glob("g*"):
+        if anterior.name != generacion:
+            shutil.rmtree(anterior, ignore_errors=True)
+
+    print(f"🧊 Snapshot analítico {generacion}: {inicio} inscripciones.")
+    return {"generacion": generacion, "filas": inicio, "ruta": str(destino)}
+
+
+def actualizar_snapshot(ruta_bd: str | Path) -> Optional[Dict[str, Any]]:
+    """
+    Regenera el snapshot de `ruta_bd` si su firma ya no coincide con la base.
+    Se llama después de confirmar un cargue, fuera de cualquier transacción.
+    Si falla, los análisis vuelven a SQLite: el cargue no se invalida.
+    Retorna el resultado de exportar_snapshot o None si no hizo falta.
+    """
+    try:
+        if snapshot_vigente(ruta_bd) is not None:
+            return None
+        with conexion(ruta_bd) as conn:
+            return exportar_snapshot(conn)
+    except Exception as e:
+        print(f"⚠️ No se pudo regenerar el snapshot analítico: {e}")
+        return None
+
+
+def eliminar_snapshot(ruta_bd: str | Path) -> None:
+    """Borra el snapshot de la base (al reiniciarla)."""
+    _ABIERTOS.clear()
+    shutil.rmtree(ruta_snapshot(ruta_bd), ignore_errors=True)
+
+
+# -------------------------------------------------
+# Lectura
+# -------------------------------------------------
+def abrir_snapshot(ruta_bd: str | Path) -> Optional[Dict[str, Any]]:
+    """
+    Abre (memmap, solo lectura) la generación actual del snapshot de `ruta_bd`.
+    Retorna None si no existe. Cada generación se abre una vez por proceso.
+
+    {"generacion", "filas", "firma",
+     "columnas": {nombre: np.memmap},
+     "diccionarios": {nombre: np.ndarray de valores}}
+    """
+    base = ruta_snapshot(ruta_bd)
+    try:
+        generacion = json.loads((base / "actual.json").read_text(encoding="utf-8"))["generacion"]
+        clave = (str(base.resolve()), generacion)
+        if clave in _ABIERTOS:
+            return _ABIERTOS[clave]
+        carpeta = base / generacion
+        meta = json.loads((carpeta / "meta.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError, KeyError):
+        return None
+
+    snapshot = {
+        "generacion": generacion,
+        "filas": meta["filas"],
+        "firma": meta["firma"],
+        "columnas": {
+            nombre: np.load(carpeta / f"{nombre}.npy", mmap_mode="r")
+            for nombre in meta["columnas"]
+        },
+        "diccionarios": {
+            nombre: np.array(valores, dtype=object)
+            for nombre, valores in meta["diccionarios"].items()
+        },
+    }
+    # Solo se conserva la generación vigente de cada base
+    for vieja in [c for c in _ABIERTOS if c[0] == clave[0]]:
+        del _ABIERTOS[vieja]
+    _ABIERTOS[clave] = snapshot
+    return snapshot
+
+
+def snapshot_vigente(ruta_bd: str | Path) -> Optional[Dict[str, Any]]:
+    """Snapshot de `ruta_bd` solo si su firma coincide con la base actual."""
+    snapshot = abrir_snapshot(ruta_bd)
+    if snapshot is None:
+        return None
+    try:
+        with conexion(ruta_bd) as conn:
+            firma = firma_inscripciones(conn)
+    except sqlite3.Error:
+        return None
+    return snapshot if firma == snapshot["firma"] else None
+
+
+__all__ = [
+    "COLUMNAS_SNAPSHOT",
+    "abrir_snapshot",
+    "actualizar_snapshot",
+    "eliminar_snapshot",
+    "exportar_snapshot",
+    "firma_inscripciones",
+    "ruta_snapshot",
+    "snapshot_vigente",
+]
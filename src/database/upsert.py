@@ -1,6 +1,9 @@
 import sqlite3
 from pathlib import Path
 
+from database.cache_dimensiones import CacheDimensiones
+from database.conexion import conexion
+
 # ======================================================
 # CONFIGURACIÓN DE RUTA BASE
 # ======================================================
@@ -28,6 +31,64 @@ def registrar_evento(conn: sqlite3.Connection, usuario: str, accion: str) -> Non
         print(f"⚠️ Error registrando evento en auditoría: {e}")
 
 
+# ======================================================
+# RETENCIÓN DE LA AUDITORÍA
+# ======================================================
+DIAS_RETENCION_AUDITORIA = 365
+"""Eventos más antiguos que este horizonte salen de la tabla activa Auditoria."""
+
+
+def archivar_auditoria(
+    conn: sqlite3.Connection, dias: int = DIAS_RETENCION_AUDITORIA
+) -> dict:
+    """
+    Mueve a AuditoriaArchivo los eventos con más de `dias` días y acumula su
+    resumen por día y usuario en AuditoriaDiaria, para que Auditoria (la que
+    listan y paginan las vistas) solo conserve el horizonte reciente.
+    El corte es un rango sobre idx_auditoria_ts. Sin commit.
+
+    Retorna {"archivados": n, "corte": 'YYYY-MM-DD HH:MM:SS' (UTC)}.
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT CAST(strftime('%s', 'now', ?) AS INTEGER), datetime('now', ?);",
+        (f"-{int(dias)} days",) * 2,
+    )
+    corte_ts, corte = cursor.fetchone()
+
+    cursor.execute(
+        """
+        INSERT INTO AuditoriaDiaria (dia, usuario, eventos, primer_ts, ultimo_ts)
+        SELECT date(fecha_ts, 'unixepoch'), COALESCE(usuario, ''),
+               COUNT(*), MIN(fecha_ts), MAX(fecha_ts)
+          FROM Auditoria
+         WHERE fecha_ts < ?
+         GROUP BY 1, 2
+        ON CONFLICT(dia, usuario) DO UPDATE SET
+            eventos = eventos + excluded.eventos,
+            primer_ts = MIN(primer_ts, excluded.primer_ts),
+            ultimo_ts = MAX(ultimo_ts, excluded.ultimo_ts);
+        """,
+        (corte_ts,),
+    )
+    cursor.execute(
+        """
+        INSERT OR REPLACE INTO AuditoriaArchivo
+            (id_evento, usuario, accion, fecha_evento, fecha_ts)
+        SELECT id_evento, usuario, accion, fecha_evento, fecha_ts
+          FROM Auditoria
+         WHERE fecha_ts < ?;
+        """,
+        (corte_ts,),
+    )
+    cursor.execute("DELETE FROM Auditoria WHERE fecha_ts < ?;", (corte_ts,))
+    archivados = cursor.rowcount
+
+    if archivados:
+        print(f"🗄️ {archivados} eventos de auditoría anteriores a {corte} archivados.")
+    return {"archivados": archivados, "corte": corte}
+
+
 def upsert_programa(
     conn: sqlite3.Connection,
     codigo_programa: str,
@@ -144,6 +205,70 @@ def upsert_curso(
     print(f"📘 Curso actualizado/insertado: {id_curso} → {codigo_alfanumerico or 'N/A'}")
 
 
+# ======================================================
+# CÓDIGO Y NOMBRE CANÓNICOS DE LA INSCRIPCIÓN
+# ======================================================
+# Materializan lo que antes cada consulta recalculaba con un JOIN a Curso:
+# el snapshot de la inscripción o, si está vacío, el catálogo Curso. El código
+# queda en mayúsculas y sin espacios extremos (la forma que usa la malla).
+SQL_CANONICOS = """
+    codigo_canonico = NULLIF(UPPER(TRIM(COALESCE(
+        NULLIF(TRIM(Inscripcion.codigo_alfanumerico), ''),
+        (SELECT c.codigo_alfanumerico FROM Curso c WHERE c.id_curso = Inscripcion.id_curso),
+        ''
+    ))), ''),
+    nombre_canonico = COALESCE(
+        NULLIF(TRIM(Inscripcion.nombre_curso), ''),
+        (SELECT c.nombre FROM Curso c WHERE c.id_curso = Inscripcion.id_curso)
+    )
+"""
+
+
+def actualizar_canonicos(
+    conn: sqlite3.Connection, id_estudiante: str, id_curso: str, id_periodo: str
+) -> None:
+    """Recalcula codigo_canonico / nombre_canonico de una inscripción (sin commit)."""
+    conn.execute(
+        f"""
+        UPDATE Inscripcion SET {SQL_CANONICOS}
+         WHERE id_estudiante = ? AND id_curso = ? AND id_periodo = ?
+        """,
+        (id_estudiante, id_curso, id_periodo),
+    )
+
+
+# ======================================================
+# MEMBRESÍA ESTUDIANTE–PROGRAMA
+# ======================================================
+# Un estudiante pertenece a un programa si tiene alguna inscripción en un curso
+# de ese programa (Curso.codigo_programa). El cargue nunca borra inscripciones,
+# así que basta con agregar membresías y ampliar el rango de periodos; si un
+# curso cambia de programa, un trigger sobre Curso recalcula a sus estudiantes
+# (migración 6).
+SQL_MEMBRESIA_CONFLICTO = """
+    ON CONFLICT(codigo_programa, id_estudiante) DO UPDATE SET
+        primer_periodo = MIN(EstudiantePrograma.primer_periodo, excluded.primer_periodo),
+        ultimo_periodo = MAX(EstudiantePrograma.ultimo_periodo, excluded.ultimo_periodo)
+"""
+
+
+def registrar_membresia(
+    conn: sqlite3.Connection, id_estudiante: str, id_curso: str, id_periodo: str
+) -> None:
+    """Agrega / amplía la membresía del estudiante en el programa del curso (sin commit)."""
+    conn.execute(
+        f"""
+        INSERT INTO EstudiantePrograma
+            (id_estudiante, codigo_programa, primer_periodo, ultimo_periodo)
+        SELECT ?, c.codigo_programa, ?, ?
+          FROM Curso c
+         WHERE c.id_curso = ? AND c.codigo_programa IS NOT NULL
+        {SQL_MEMBRESIA_CONFLICTO}
+        """,
+        (id_estudiante, id_periodo, id_periodo, id_curso),
+    )
+
+
 # ======================================================
 # FUNCIÓN: UPSERT INSCRIPCIÓN (con snapshot del curso)
 # ======================================================
@@ -158,6 +283,7 @@ def upsert_inscripcion(
     numeri: str | None = None,
     nombre_curso: str | None = None,
     codigo_alfanumerico: str | None = None,
+    huella_fila: int | None = None,
 ) -> str:
     """
     Inserta o actualiza una inscripción según la clave (id_estudiante, id_curso, id_periodo)
@@ -165,6 +291,12 @@ def upsert_inscripcion(
 
     🔹 Ahora admite id_curso simbólicos (ej. TRANSF-ISOFV033)
     para registrar cursos por transferencia sin NRC numérico.
+    🔹 `huella_fila` es el hash de COLUMNAS_HUELLA calculado por transformar_argos;
+    se guarda en ambas ramas para que un recargue masivo reconozca la fila como
+    sin cambios. Si coincide con la guardada, la fila no se escribe (ni sube
+    version_periodo) y se retorna "sin_cambios", igual que en la fusión masiva.
+
+    Retorna "insertado", "actualizado" o "sin_cambios".
     """
     cursor = conn.cursor()
 
@@ -187,7 +319,8 @@ def upsert_inscripcion(
 
     cursor.execute(
         """
-        SELECT id_inscripcion, version_periodo, alfa, numeri, codigo_alfanumerico, nombre_curso
+        SELECT id_inscripcion, version_periodo, alfa, numeri, codigo_alfanumerico, nombre_curso,
+               huella_fila
           FROM Inscripcion
          WHERE id_estudiante = ? AND id_curso = ? AND id_periodo = ?
         """,
@@ -196,7 +329,12 @@ def upsert_inscripcion(
     registro = cursor.fetchone()
 
     if registro:
-        id_inscripcion, version_actual, alfa_db, numeri_db, codigo_db, nombre_db = registro
+        (
+            id_inscripcion, version_actual, alfa_db, numeri_db, codigo_db, nombre_db, huella_db
+        ) = registro
+        if huella_fila is not None and huella_db == huella_fila:
+            return "sin_cambios"
+
         nueva_version = (version_actual or 1) + 1
 
         set_alfa = alfa_db or alfa or None
@@ -212,11 +350,16 @@ def upsert_inscripcion(
                    alfa = COALESCE(alfa, ?),
                    numeri = COALESCE(numeri, ?),
                    codigo_alfanumerico = COALESCE(codigo_alfanumerico, ?),
-                   nombre_curso = COALESCE(nombre_curso, ?)
+                   nombre_curso = COALESCE(nombre_curso, ?),
+                   huella_fila = ?
              WHERE id_inscripcion = ?
             """,
-            (nota, nueva_version, set_alfa, set_numeri, set_codigo, set_nombre, id_inscripcion),
+            (
+                nota, nueva_version, set_alfa, set_numeri, set_codigo, set_nombre,
+                huella_fila, id_inscripcion,
+            ),
         )
+        actualizar_canonicos(conn, id_estudiante, id_curso, id_periodo)
         conn.commit()
         print(f"🔁 Actualizada inscripción de {id_estudiante} en curso {id_curso}.")
         return "actualizado"
@@ -225,8 +368,9 @@ def upsert_inscripcion(
         cursor.execute(
             """
             INSERT INTO Inscripcion
-                (id_estudiante, id_curso, id_periodo, nota, alfa, numeri, codigo_alfanumerico, nombre_curso)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                (id_estudiante, id_curso, id_periodo, nota, alfa, numeri, codigo_alfanumerico,
+                 nombre_curso, huella_fila)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
             """,
             (
                 id_estudiante,
@@ -237,18 +381,488 @@ def upsert_inscripcion(
                 numeri or None,
                 codigo_alfanumerico or None,
                 nombre_curso or None,
+                huella_fila,
             ),
         )
+        actualizar_canonicos(conn, id_estudiante, id_curso, id_periodo)
+        registrar_membresia(conn, id_estudiante, id_curso, id_periodo)
         conn.commit()
         print(f"🆕 Nueva inscripción de {id_estudiante} en curso {id_curso}.")
         return "insertado"
 
 
+# ======================================================
+# CARGUE MASIVO: STAGING + SENTENCIAS POR CONJUNTOS
+# ======================================================
+COLUMNAS_STAGING_ARGOS = [
+    "rn",
+    "id_estudiante",
+    "nombre_estudiante",
+    "programa_visible",
+    "codigo_programa",
+    "descripcion_programa",
+    "rectoria",
+    "descripcion_rectoria",
+    "sede",
+    "descripcion_sede",
+    "facultad",
+    "descripcion_facultad",
+    "nivel",
+    "descripcion_nivel",
+    "id_curso",
+    "nombre_curso",
+    "alfa",
+    "numeri",
+    "codigo_alfanumerico",
+    "id_periodo",
+    "anio",
+    "periodo",
+    "nota",
+    "huella_fila",
+]
+
+
+def crear_staging_argos(conn: sqlite3.Connection) -> None:
+    """
+    Crea (o vacía) la tabla temporal `stg_argos` donde se deposita el archivo
+    ARGOS ya normalizado antes de fusionarlo con las tablas definitivas.
+    La tabla es TEMP: vive solo en esta conexión y no deja rastro en sia.db.
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        f"""
+        CREATE TEMP TABLE IF NOT EXISTS stg_argos (
+            rn INTEGER PRIMARY KEY,
+            {", ".join(COLUMNAS_STAGING_ARGOS[1:])}
+        )
+        """
+    )
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS temp.idx_stg_argos_clave
+            ON stg_argos(id_estudiante, id_curso, id_periodo, rn)
+        """
+    )
+    cursor.execute("DELETE FROM stg_argos;")
+
+
+def insertar_staging_argos(conn: sqlite3.Connection, filas) -> int:
+    """
+    Inserta en `stg_argos` un iterable de tuplas en el orden de
+    COLUMNAS_STAGING_ARGOS. No hace commit: el llamador controla la transacción.
+    """
+    placeholders = ", ".join("?" for _ in COLUMNAS_STAGING_ARGOS)
+    cursor = conn.cursor()
+    cursor.executemany(
+        f"INSERT INTO stg_argos ({', '.join(COLUMNAS_STAGING_ARGOS)}) VALUES ({placeholders})",
+        filas,
+    )
+    return cursor.rowcount
+
+
+def _agrupar_staging_inscripciones(cursor: sqlite3.Cursor) -> None:
+    """Crea `stg_insc`: una fila por clave natural con repeticiones y última fila."""
+    cursor.execute("DROP TABLE IF EXISTS temp.stg_insc;")
+    cursor.execute(
+        """
+        CREATE TEMP TABLE stg_insc AS
+        SELECT id_estudiante, id_curso, id_periodo,
+               COUNT(*) AS repeticiones,
+               MAX(rn) AS ultimo_rn
+          FROM stg_argos
+         GROUP BY id_estudiante, id_curso, id_periodo;
+        """
+    )
+
+
+def simular_fusion_staging_argos(conn: sqlite3.Connection) -> dict:
+    """
+    Calcula, SIN escribir en las tablas definitivas, lo que haría
+    fusionar_staging_argos con el contenido actual de `stg_argos`.
+
+    Un único anti-join (LEFT JOIN por el índice único uq_insc_clave) entre las
+    claves del archivo e Inscripcion clasifica cada clave en nueva, sin cambios
+    (misma huella_fila) o actualizada. Solo se crean tablas TEMP.
+
+    Retorna {"nuevos", "actualizados", "sin_cambios"} con la misma forma de
+    conteo que fusionar_staging_argos.
+    """
+    cursor = conn.cursor()
+    _agrupar_staging_inscripciones(cursor)
+    cursor.execute(
+        """
+        SELECT COALESCE(SUM(k.repeticiones), 0),
+               COALESCE(SUM(i.id_inscripcion IS NULL), 0),
+               COALESCE(SUM(CASE WHEN i.huella_fila = s.huella_fila
+                                 THEN k.repeticiones ELSE 0 END), 0)
+          FROM stg_insc k
+          JOIN stg_argos s ON s.rn = k.ultimo_rn
+          LEFT JOIN Inscripcion i
+                 ON i.id_estudiante = k.id_estudiante
+                AND i.id_curso = k.id_curso
+                AND i.id_periodo = k.id_periodo;
+        """
+    )
+    total_filas, nuevos, sin_cambios = cursor.fetchone()
+    cursor.execute("DROP TABLE IF EXISTS temp.stg_insc;")
+    return {
+        "nuevos": nuevos,
+        "actualizados": total_filas - nuevos - sin_cambios,
+        "sin_cambios": sin_cambios,
+    }
+
+
+def fusionar_staging_argos(
+    conn: sqlite3.Connection, cache: CacheDimensiones | None = None
+) -> dict:
+    """
+    Fusiona `stg_argos` con Programa, Estudiante, Curso, PeriodoAcademico e
+    Inscripcion usando sentencias por conjuntos, sin commit intermedio.
+
+    Reproduce la semántica del cargue fila a fila:
+    - Programa y Curso: gana la última fila del archivo (upsert).
+    - Estudiante y PeriodoAcademico: gana la primera fila (INSERT OR IGNORE).
+    - Las dimensiones pasan por `cache` (CacheDimensiones del cargue; se crea
+      una si no se entrega): solo se escriben entidades nuevas o modificadas.
+    - Inscripcion: la nota es la de la última fila de cada clave, el snapshot
+      (alfa, numeri, codigo_alfanumerico, nombre_curso) solo completa vacíos,
+      codigo_canonico / nombre_canonico se recalculan para las claves escritas,
+      EstudiantePrograma se amplía con sus programas y
+      version_periodo aumenta una vez por cada fila repetida de la clave
+      (los cargues resuelven duplicados antes de llegar a staging, así que en
+      la práctica hay una fila por clave y la versión sube una vez por cargue).
+
+    Cargue incremental: las claves que ya existen en Inscripcion con la misma
+    `huella_fila` (mismo contenido de origen que la última fila del archivo)
+    no se reescriben ni incrementan version_periodo.
+
+    Retorna {"nuevos", "actualizados", "sin_cambios"} contando filas, igual que
+    el cargue fila a fila (cada fila repetida de una clave cuenta como actualización).
+    """
+    cursor = conn.cursor()
+
+    # --- Dimensiones: una escritura por entidad nueva o modificada ---
+    if cache is None:
+        cache = CacheDimensiones(conn)
+    cache.sincronizar_staging()
+
+    # --- Inscripcion: una fila por clave natural ---
+    _agrupar_staging_inscripciones(cursor)
+
+    cursor.execute("SELECT COALESCE(SUM(repeticiones), 0) FROM stg_insc;")
+    total_filas = cursor.fetchone()[0]
+
+    # --- Delta: descartar claves cuyo contenido no cambió desde el último cargue ---
+    cursor.execute(
+        """
+        DELETE FROM stg_insc
+         WHERE EXISTS (
+                SELECT 1
+                  FROM Inscripcion i
+                  JOIN stg_argos s ON s.rn = stg_insc.ultimo_rn
+                 WHERE i.id_estudiante = stg_insc.id_estudiante
+                   AND i.id_curso = stg_insc.id_curso
+                   AND i.id_periodo = stg_insc.id_periodo
+                   AND i.huella_fila = s.huella_fila
+               );
+        """
+    )
+    cursor.execute("SELECT COALESCE(SUM(repeticiones), 0) FROM stg_insc;")
+    sin_cambios = total_filas - cursor.fetchone()[0]
+
+    cursor.execute(
+        """
+        SELECT COUNT(*)
+          FROM stg_insc k
+         WHERE NOT EXISTS (
+                SELECT 1 FROM Inscripcion i
+                 WHERE i.id_estudiante = k.id_estudiante
+                   AND i.id_curso = k.id_curso
+                   AND i.id_periodo = k.id_periodo
+               );
+        """
+    )
+    nuevos = cursor.fetchone()[0]
+
+    # Una inserción nueva con N filas repetidas queda con version_periodo = N
+    # (1 al insertar + 1 por cada actualización posterior); una existente suma N.
+    cursor.execute(
+        """
+        INSERT INTO Inscripcion
+            (id_estudiante, id_curso, id_periodo, nota, version_periodo,
+             alfa, numeri, codigo_alfanumerico, nombre_curso, huella_fila)
+        SELECT k.id_estudiante,
+               k.id_curso,
+               k.id_periodo,
+               (SELECT s.nota FROM stg_argos s WHERE s.rn = k.ultimo_rn),
+               k.repeticiones,
+               (SELECT s.alfa FROM stg_argos s
+                 WHERE s.id_estudiante = k.id_estudiante AND s.id_curso = k.id_curso
+                   AND s.id_periodo = k.id_periodo AND s.alfa IS NOT NULL
+                 ORDER BY s.rn LIMIT 1),
+               (SELECT s.numeri FROM stg_argos s
+                 WHERE s.id_estudiante = k.id_estudiante AND s.id_curso = k.id_curso
+                   AND s.id_periodo = k.id_periodo AND s.numeri IS NOT NULL
+                 ORDER BY s.rn LIMIT 1),
+               (SELECT s.codigo_alfanumerico FROM stg_argos s
+                 WHERE s.id_estudiante = k.id_estudiante AND s.id_curso = k.id_curso
+                   AND s.id_periodo = k.id_periodo AND s.codigo_alfanumerico IS NOT NULL
+                 ORDER BY s.rn LIMIT 1),
+               (SELECT s.nombre_curso FROM stg_argos s
+                 WHERE s.id_estudiante = k.id_estudiante AND s.id_curso = k.id_curso
+                   AND s.id_periodo = k.id_periodo AND s.nombre_curso IS NOT NULL
+                 ORDER BY s.rn LIMIT 1),
+               (SELECT s.huella_fila FROM stg_argos s WHERE s.rn = k.ultimo_rn)
+          FROM stg_insc k
+         WHERE 1
+        ON CONFLICT(id_estudiante, id_curso, id_periodo) DO UPDATE SET
+            nota = excluded.nota,
+            version_periodo = COALESCE(Inscripcion.version_periodo, 1) + excluded.version_periodo,
+            alfa = COALESCE(Inscripcion.alfa, excluded.alfa),
+            numeri = COALESCE(Inscripcion.numeri, excluded.numeri),
+            codigo_alfanumerico = COALESCE(Inscripcion.codigo_alfanumerico, excluded.codigo_alfanumerico),
+            nombre_curso = COALESCE(Inscripcion.nombre_curso, excluded.nombre_curso),
+            huella_fila = excluded.huella_fila;
+        """
+    )
+
+    # Código / nombre canónicos solo de las claves escritas en este lote
+    cursor.execute(
+        f"""
+        UPDATE Inscripcion SET {SQL_CANONICOS}
+          FROM stg_insc k
+         WHERE Inscripcion.id_estudiante = k.id_estudiante
+           AND Inscripcion.id_curso = k.id_curso
+           AND Inscripcion.id_periodo = k.id_periodo;
+        """
+    )
+
+    # Membresías estudiante–programa de las claves nuevas / modificadas
+    cursor.execute(
+        f"""
+        INSERT INTO EstudiantePrograma
+            (id_estudiante, codigo_programa, primer_periodo, ultimo_periodo)
+        SELECT k.id_estudiante, c.codigo_programa, MIN(k.id_periodo), MAX(k.id_periodo)
+          FROM stg_insc k
+          JOIN Curso c ON c.id_curso = k.id_curso
+         WHERE c.codigo_programa IS NOT NULL
+         GROUP BY k.id_estudiante, c.codigo_programa
+        {SQL_MEMBRESIA_CONFLICTO};
+        """
+    )
+
+    cursor.execute("DROP TABLE IF EXISTS temp.stg_insc;")
+
+    return {
+        "nuevos": nuevos,
+        "actualizados": total_filas - nuevos - sin_cambios,
+        "sin_cambios": sin_cambios,
+    }
+
+
+def registrar_archivo_cargado(
+    conn: sqlite3.Connection,
+    huella_archivo: str,
+    nombre_archivo: str | None,
+    total_registros: int,
+) -> None:
+    """Guarda la huella SHA-256 de un archivo ARGOS cargado (sin commit)."""
+    conn.execute(
+        """
+        INSERT INTO ArchivoCargado (huella_archivo, nombre_archivo, total_registros)
+        VALUES (?, ?, ?)
+        ON CONFLICT(huella_archivo) DO UPDATE SET
+            nombre_archivo = excluded.nombre_archivo,
+            total_registros = excluded.total_registros,
+            fecha_cargue = CURRENT_TIMESTAMP;
+        """,
+        (huella_archivo, nombre_archivo, total_registros),
+    )
+
+
+# ======================================================
+# FUNCIÓN: GUARDAR MALLA CURRICULAR
+# ======================================================
+def guardar_malla(conn: sqlite3.Connection, malla: dict, huella: str) -> int:
+    """
+    Guarda (o reemplaza) la malla normalizada de un programa en
+    MallaCurricular/MallaCurso, sin commit. Cada curso recibe su posición en
+    el plan; un curso con varios códigos ocupa una fila por código, en orden.
+    Retorna el id_malla.
+    """
+    codigo_programa = malla["codigo_programa"]
+    conn.execute(
+        "INSERT OR IGNORE INTO Programa (codigo_programa, descripcion_programa) VALUES (?, ?);",
+        (codigo_programa, malla.get("programa") or malla.get("nombre_malla")),
+    )
+    conn.execute(
+        """
+        INSERT INTO MallaCurricular
+            (codigo_programa, nombre_malla, programa, creditos_totales, huella, fecha_actualizacion)
+        VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(codigo_programa) DO UPDATE SET
+            nombre_malla = excluded.nombre_malla,
+            programa = excluded.programa,
+            creditos_totales = excluded.creditos_totales,
+            huella = excluded.huella,
+            fecha_actualizacion = CURRENT_TIMESTAMP;
+        """,
+        (
+            codigo_programa,
+            malla["nombre_malla"],
+            malla.get("programa"),
+            malla.get("creditos_totales"),
+            huella,
+        ),
+    )
+    id_malla = conn.execute(
+        "SELECT id_malla FROM MallaCurricular WHERE codigo_programa = ?;", (codigo_programa,)
+    ).fetchone()[0]
+
+    filas = []
+    posicion = 0
+    for bloque in malla.get("plan", []):
+        for curso in bloque.get("cursos", []):
+            codigos = curso["codigo"] if isinstance(curso["codigo"], list) else [curso["codigo"]]
+            for orden, codigo in enumerate(codigos):
+                filas.append(
+                    (
+                        id_malla,
+                        codigo,
+                        curso.get("nombre"),
+                        curso.get("creditos"),
+                        bloque.get("cuatrimestre"),
+                        posicion,
+                        orden,
+                    )
+                )
+            posicion += 1
+
+    conn.execute("DELETE FROM MallaCurso WHERE id_malla = ?;", (id_malla,))
+    conn.executemany(
+        """
+        INSERT INTO MallaCurso
+            (id_malla, codigo_curso, nombre_oficial, creditos, cuatrimestre, posicion, orden_alias)
+        VALUES (?, ?, ?, ?, ?, ?, ?);
+        """,
+        filas,
+    )
+    return id_malla
+
+
+# ======================================================
+# AVANCE EN CRÉDITOS PERSISTIDO (AvanceEstudiante)
+# ======================================================
+def preparar_avance_programa(
+    conn: sqlite3.Connection, codigo_programa: str, huella_malla: str
+) -> dict:
+    """
+    Deja listo el recálculo incremental del avance de un programa, sin commit:
+
+    - Si la malla cambió (otra huella), marca pendientes todas sus filas.
+    - Borra las filas de estudiantes que ya no están en EstudiantePrograma.
+    - Devuelve los estudiantes por recalcular: los marcados por los triggers
+      y los de la cohorte que aún no tienen fila.
+
+    Retorna {"malla_cambiada": int, "eliminados": int, "pendientes": [id, ...]}.
+    """
+    malla_cambiada = conn.execute(
+        """
+        UPDATE AvanceEstudiante
+           SET pendiente = 1
+         WHERE codigo_programa = ? AND huella_malla IS NOT ? AND pendiente = 0;
+        """,
+        (codigo_programa, huella_malla),
+    ).rowcount
+    eliminados = conn.execute(
+        """
+        DELETE FROM AvanceEstudiante
+         WHERE codigo_programa = ?
+           AND NOT EXISTS (
+               SELECT 1 FROM EstudiantePrograma ep
+                WHERE ep.codigo_programa = AvanceEstudiante.codigo_programa
+                  AND ep.id_estudiante = AvanceEstudiante.id_estudiante
+           );
+        """,
+        (codigo_programa,),
+    ).rowcount
+    pendientes = [
+        fila[0]
+        for fila in conn.execute(
+            """
+            SELECT ep.id_estudiante
+              FROM EstudiantePrograma ep
+              LEFT JOIN AvanceEstudiante a
+                ON a.codigo_programa = ep.codigo_programa
+               AND a.id_estudiante = ep.id_estudiante
+             WHERE ep.codigo_programa = ?
+               AND (a.id_estudiante IS NULL OR a.pendiente = 1);
+            """,
+            (codigo_programa,),
+        )
+    ]
+    return {"malla_cambiada": malla_cambiada, "eliminados": eliminados, "pendientes": pendientes}
+
+
+def guardar_avance_programa(
+    conn: sqlite3.Connection, codigo_programa: str, huella_malla: str, filas
+) -> int:
+    """
+    Guarda el avance recalculado (dicts con las columnas de
+    credit_progress.COLUMNAS_AVANCE) y borra las filas que siguen pendientes:
+    estudiantes de la cohorte que ya no tienen inscripciones. Sin commit.
+    Retorna el número de filas guardadas.
+    """
+    guardadas = conn.executemany(
+        """
+        INSERT INTO AvanceEstudiante (
+            codigo_programa, id_estudiante, nombre, programa, codigo_programa_curso,
+            cred_aprob_transf, cred_perdidos, cred_pendientes, cred_totales_malla,
+            porc_aproba_malla, huella_malla, pendiente, fecha_calculo
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0, CURRENT_TIMESTAMP)
+        ON CONFLICT(codigo_programa, id_estudiante) DO UPDATE SET
+            nombre = excluded.nombre,
+            programa = excluded.programa,
+            codigo_programa_curso = excluded.codigo_programa_curso,
+            cred_aprob_transf = excluded.cred_aprob_transf,
+            cred_perdidos = excluded.cred_perdidos,
+            cred_pendientes = excluded.cred_pendientes,
+            cred_totales_malla = excluded.cred_totales_malla,
+            porc_aproba_malla = excluded.porc_aproba_malla,
+            huella_malla = excluded.huella_malla,
+            pendiente = 0,
+            fecha_calculo = CURRENT_TIMESTAMP;
+        """,
+        (
+            (
+                codigo_programa,
+                f["id_estudiante"],
+                f["nombre"],
+                f["programa"],
+                f["codigo_programa"],
+                int(f["cred_aprob_transf"]),
+                int(f["cred_perdidos"]),
+                int(f["cred_pendientes"]),
+                int(f["cred_totales_malla"]),
+                float(f["porc_aproba_malla"]),
+                huella_malla,
+            )
+            for f in filas
+        ),
+    ).rowcount
+    conn.execute(
+        "DELETE FROM AvanceEstudiante WHERE codigo_programa = ? AND pendiente = 1;",
+        (codigo_programa,),
+    )
+    return guardadas
+
+
 # ======================================================
 # PRUEBA LOCAL
 # ======================================================
 if __name__ == "__main__":
-    with sqlite3.connect(DB_PATH) as conn:
+    with conexion(DB_PATH) as conn:
         upsert_curso(conn, "TRANSF-ISOFV033", "Transferencia de curso ISOF", 3, "ISOF", "V033")
         accion = upsert_inscripcion(
             conn,
@@ -1,65 +1,353 @@
-import sqlite3
-import pandas as pd
+import hashlib
+import os
+import pickle
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from io import BytesIO
-from modules.validators import resumen_validacion
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+from modules.validators import (
+    CLAVE_NATURAL,
+    MOTIVOS_BLOQUEANTES,
+    filas_rechazadas,
+    normalizar_encabezados,
+    validar_contenido,
+    validar_encabezados,
+    validar_filas,
+)
 from database.upsert import (
+    COLUMNAS_STAGING_ARGOS,
+    archivar_auditoria,
+    crear_staging_argos,
+    fusionar_staging_argos,
+    insertar_staging_argos,
+    registrar_archivo_cargado,
+    simular_fusion_staging_argos,
     upsert_inscripcion,
-    upsert_curso,
     registrar_evento,
-    upsert_programa,
 )
-from database.db_init import DB_PATH
+from database.cache_dimensiones import CacheDimensiones
+from database.conexion import conexion
+from database.db_init import DB_PATH, asegurar_esquema
+from database.migraciones import actualizar_estadisticas
+from database.snapshot_analitico import actualizar_snapshot
+from modules.argos_transform import (
+    claves_resolucion,
+    descartes_duplicados,
+    resolver_duplicados,
+    transformar_argos,
+    tuplas_staging,
+)
 
 
 # -------------------------------------------------
-# CARGA Y VALIDACIÓN DEL EXCEL ARGOS
+# LECTURA EN STREAMING (MEMORIA ACOTADA)
 # -------------------------------------------------
-def cargar_y_validar_excel(file_buffer: BytesIO):
+TAMANO_BLOQUE = 5000
+"""Filas por bloque al leer un ARGOS en streaming."""
+
+
+def calcular_huella_archivo(file_buffer) -> str:
+    """SHA-256 del contenido binario del archivo, leído en bloques de 1 MB."""
+    if hasattr(file_buffer, "seek"):
+        file_buffer.seek(0)
+    sha = hashlib.sha256()
+    for trozo in iter(lambda: file_buffer.read(1024 * 1024), b""):
+        sha.update(trozo)
+    file_buffer.seek(0)
+    return sha.hexdigest()
+
+
+def _celda_a_texto(valor):
+    """Convierte una celda de openpyxl al texto que produciría read_excel(dtype=str)."""
+    if valor is None:
+        return None
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    texto = str(valor)
+    return texto if texto.strip() else None
+
+
+def _abrir_hoja(file_buffer, hoja: str | None = None):
+    """Abre el libro en modo solo lectura y devuelve (libro, hoja)."""
+    if hasattr(file_buffer, "seek"):
+        file_buffer.seek(0)
+    libro = load_workbook(file_buffer, read_only=True, data_only=True)
+    hoja_ws = libro[hoja] if hoja else libro.worksheets[0]
+    return libro, hoja_ws
+
+
+def sondear_encabezado_argos(file_buffer, hoja: str | None = None) -> dict:
     """
-    Lee el Excel ARGOS, valida estructura y formatos,
-    y retorna (df, resultados dict) o (None, errores dict).
+    Lee ÚNICAMENTE la fila de encabezados y la valida contra LAYOUT_ARGOS /
+    POSICIONES_CLAVE. Permite rechazar un layout incorrecto sin parsear datos.
+
+    Retorna el dict de validar_encabezados más la clave `columnas`
+    (encabezados normalizados).
     """
+    libro, hoja_ws = _abrir_hoja(file_buffer, hoja)
     try:
-        df = pd.read_excel(file_buffer, dtype=str)
-        df.columns = df.columns.str.strip().str.upper()
+        primera = next(hoja_ws.iter_rows(max_row=1, values_only=True), ())
+    finally:
+        libro.close()
 
-        resultados = resumen_validacion(df)
-        resultados["total_registros"] = len(df)
+    columnas = normalizar_encabezados(
+        f"UNNAMED: {i}" if valor is None else valor for i, valor in enumerate(primera)
+    )
+    return {**validar_encabezados(columnas), "columnas": columnas}
 
-        if (
-            resultados.get("columnas_validas")
-            and resultados.get("notas_validas")
-            and resultados.get("periodos_validos")
-        ):
-            return df, resultados
-        else:
-            return None, resultados
+
+def iterar_bloques_argos(
+    file_buffer,
+    tamano_bloque: int = TAMANO_BLOQUE,
+    hoja: str | None = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Recorre el Excel ARGOS en bloques de `tamano_bloque` filas con encabezados
+    ya normalizados. Solo un bloque vive en memoria a la vez.
+    """
+    libro, hoja_ws = _abrir_hoja(file_buffer, hoja)
+    try:
+        filas = hoja_ws.iter_rows(values_only=True)
+        encabezado = next(filas, ())
+        columnas = normalizar_encabezados(
+            f"UNNAMED: {i}" if valor is None else valor
+            for i, valor in enumerate(encabezado)
+        )
+        ancho = len(columnas)
+
+        bloque = []
+        for fila in filas:
+            valores = [_celda_a_texto(v) for v in fila[:ancho]]
+            if all(v is None for v in valores):
+                continue
+            valores.extend([None] * (ancho - len(valores)))
+            bloque.append(valores)
+            if len(bloque) >= tamano_bloque:
+                yield pd.DataFrame(bloque, columns=columnas, dtype=object)
+                bloque = []
+
+        if bloque:
+            yield pd.DataFrame(bloque, columns=columnas, dtype=object)
+    finally:
+        libro.close()
+
+
+def validar_excel_por_bloques(
+    file_buffer,
+    tamano_bloque: int = TAMANO_BLOQUE,
+    hoja: str | None = None,
+    al_avanzar: Callable[[int], None] | None = None,
+) -> tuple[bool, dict]:
+    """
+    Valida un ARGOS en streaming: sondea el encabezado (rechazo inmediato si
+    el layout no corresponde) y luego valida el contenido bloque a bloque sin
+    retener el archivo en memoria.
+
+    Para detectar duplicados entre bloques solo se conserva un hash entero por
+    clave (ID_ESTUDIANTE, NRCS, PERIODO).
+
+    Solo la estructura invalida el archivo. Las filas con problemas se cuentan
+    por código de motivo en `errores_por_tipo` y `filas_invalidas`; el cargue
+    las omite. Las claves repetidas se informan en `duplicados_resueltos`, con
+    la misma forma que el resumen del cargue real (ver desglose_errores).
+
+    `al_avanzar(filas_leidas)`, si se indica, se llama tras cada bloque
+    (latido de los trabajos en segundo plano).
+
+    Retorna (es_valido, resultados).
+    """
+    try:
+        resultados = sondear_encabezado_argos(file_buffer, hoja)
+        resultados.pop("columnas", None)
+        if not resultados["columnas_validas"]:
+            resultados.update(
+                {"notas_validas": None, "periodos_validos": None, "duplicados": None,
+                 "filas_invalidas": 0, "total_registros": 0, **desglose_errores({})}
+            )
+            return False, resultados
+
+        total = 0
+        notas_validas = True
+        periodos_validos = True
+        errores_por_tipo: dict[str, int] = {}
+        filas_invalidas = 0
+        claves_vistas: set[int] = set()
+        duplicadas = 0
+
+        for bloque in iterar_bloques_argos(file_buffer, tamano_bloque, hoja):
+            parcial = validar_contenido(bloque)
+            total += len(bloque)
+            notas_validas = notas_validas and parcial["notas_validas"]
+            periodos_validos = periodos_validos and parcial["periodos_validos"]
+            filas_invalidas += parcial["filas_invalidas"]
+            for codigo, cantidad in parcial["errores_por_tipo"].items():
+                errores_por_tipo[codigo] = errores_por_tipo.get(codigo, 0) + cantidad
+
+            # Duplicados entre bloques: filas (con clave completa) cuya clave ya apareció antes
+            claves = bloque[CLAVE_NATURAL]
+            huellas = pd.util.hash_pandas_object(
+                claves[claves.notna().all(axis=1)].astype(str), index=False
+            )
+            antes = len(claves_vistas)
+            claves_vistas.update(huellas.tolist())
+            duplicadas += len(huellas) - (len(claves_vistas) - antes)
+            if al_avanzar is not None:
+                al_avanzar(total)
+
+        resultados.update(
+            {
+                "notas_validas": notas_validas,
+                "periodos_validos": periodos_validos,
+                "duplicados": duplicadas > 0,
+                "filas_invalidas": filas_invalidas,
+                "total_registros": total,
+                **desglose_errores(errores_por_tipo, duplicadas),
+            }
+        )
+        return True, resultados
 
     except Exception as e:
-        return None, {"error": str(e)}
+        return False, {"error": str(e)}
 
 
 # -------------------------------------------------
 # PROCESAMIENTO SIMULADO (modo de prueba)
 # -------------------------------------------------
-def procesar_argos(df: pd.DataFrame):
-    """Simula métricas de procesamiento."""
-    total = len(df)
-    nuevos = int(total * 0.6)
-    actualizados = int(total * 0.35)
-    errores = total - (nuevos + actualizados)
+def procesar_argos(df: pd.DataFrame, estrategia_duplicados: str = "ultima"):
+    """Simulación real (sin escritura) del cargue de un DataFrame ARGOS."""
+    df = df.copy()
+    df.columns = df.columns.str.upper()
+    return procesar_argos_por_bloques([df], estrategia_duplicados)
+
+
+def procesar_argos_por_bloques(
+    bloques: Iterable[pd.DataFrame], estrategia_duplicados: str = "ultima"
+):
+    """
+    Simulación del cargue recorriendo el archivo por bloques: calcula los
+    conteos REALES de nuevos, actualizados, sin cambios y errores contra la
+    base de datos, sin escribir en ella.
+
+    Cada bloque se transforma igual que en el cargue real y se deposita en la
+    tabla TEMP `stg_argos`; luego un anti-join por conjuntos contra
+    Inscripcion (índice único de la clave natural) clasifica las filas.
+    Al final se hace rollback.
+    """
+    total = 0
+    acumulado: dict = {}
+    claves: list[pd.DataFrame] = []
+
+    with conexion(DB_PATH) as conn:
+        asegurar_esquema(conn)
+        crear_staging_argos(conn)
+        for bloque in bloques:
+            lote = filas_staging(bloque, total, estrategia_duplicados)
+            insertar_staging_argos(conn, lote["filas"])
+            total += len(bloque)
+            _acumular_lote(acumulado, lote)
+            claves.append(lote["claves"])
+
+        acumulado["duplicados_resueltos"] = acumulado.get(
+            "duplicados_resueltos", 0
+        ) + _resolver_duplicados_entre_bloques(conn, claves, estrategia_duplicados)
+        conteos = simular_fusion_staging_argos(conn)
+        conn.rollback()
+
     return {
         "total": total,
-        "nuevos": nuevos,
+        "nuevos": conteos["nuevos"],
+        "actualizados": conteos["actualizados"],
+        "sin_cambios": conteos["sin_cambios"],
+        "errores": acumulado.get("errores", 0),
+        "transferencias": acumulado.get("transferencias", 0),
+        **desglose_errores(
+            acumulado.get("errores_por_tipo"), acumulado.get("duplicados_resueltos", 0)
+        ),
+    }
+
+
+def desglose_errores(errores_por_tipo: dict | None, duplicados_resueltos: int = 0) -> dict:
+    """
+    Desglose de filas con problemas con la MISMA forma en la validación, la
+    simulación y el cargue real: `errores_por_tipo` solo con motivos
+    bloqueantes de conteo mayor a cero y las claves repetidas aparte, en
+    `duplicados_resueltos` (no son error: se fusionan con la fila ganadora).
+    """
+    return {
+        "errores_por_tipo": {
+            codigo: int(cantidad)
+            for codigo, cantidad in (errores_por_tipo or {}).items()
+            if cantidad and codigo in MOTIVOS_BLOQUEANTES
+        },
+        "duplicados_resueltos": int(duplicados_resueltos),
+    }
+
+
+def acumular_motivos(acumulado: dict[str, int], motivos: dict[str, int]) -> None:
+    """Suma conteos por código de motivo (bloques / archivos)."""
+    for codigo, cantidad in motivos.items():
+        acumulado[codigo] = acumulado.get(codigo, 0) + cantidad
+
+
+def resumen_cargue(
+    conn,
+    total,
+    insertados,
+    actualizados,
+    errores,
+    transferencias,
+    sin_cambios=0,
+    errores_por_tipo=None,
+    duplicados_resueltos=0,
+) -> dict:
+    """
+    Registra el evento de auditoría del cargue (archivando los eventos fuera
+    del horizonte de retención) y arma el resumen estándar.
+    """
+    desglose = desglose_errores(errores_por_tipo, duplicados_resueltos)
+    errores_por_tipo = desglose["errores_por_tipo"]
+    detalle_errores = (
+        " [" + ", ".join(f"{k}: {v}" for k, v in errores_por_tipo.items()) + "]"
+        if errores_por_tipo
+        else ""
+    )
+    resumen_txt = (
+        f"Cargue ARGOS – {total} registros procesados "
+        f"({insertados} nuevos, {actualizados} actualizados, {sin_cambios} sin cambios, "
+        f"{duplicados_resueltos} duplicados resueltos, "
+        f"{errores} errores{detalle_errores}, {transferencias} cursos por transferencia)"
+    )
+    registrar_evento(conn, "coordinador_academico", resumen_txt)
+    print("📦", resumen_txt)
+    archivar_auditoria(conn)
+
+    # Las tablas crecieron: estadísticas frescas para el planificador
+    if insertados:
+        actualizar_estadisticas(conn)
+
+    return {
+        "total": total,
+        "nuevos": insertados,
         "actualizados": actualizados,
         "errores": errores,
+        "transferencias": transferencias,
+        "sin_cambios": sin_cambios,
+        **desglose,
+        "omitido": False,
     }
 
 
 # -------------------------------------------------
 # CARGUE REAL A LA BASE DE DATOS
 # -------------------------------------------------
-def cargar_a_bd(df: pd.DataFrame):
+def cargar_a_bd(df: pd.DataFrame, masivo: bool = True, estrategia_duplicados: str = "ultima"):
     """
     Inserta/actualiza datos en:
       - Estudiante
@@ -70,154 +358,668 @@ def cargar_a_bd(df: pd.DataFrame):
 
     🔸 Ahora también procesa cursos con NRCS == 'TRANSFERENCIA'
     asignándoles un NRC simbólico 'TRANSF-{ALFA}{NUMERI}'.
+
+    🔸 masivo=True (por defecto): deposita todo el archivo en una tabla temporal
+    y lo fusiona con sentencias por conjuntos dentro de UNA sola transacción.
+    Las inscripciones cuyo contenido no cambió desde el último cargue se omiten
+    (clave "sin_cambios" del resumen).
+    masivo=False conserva el cargue fila a fila (un commit por upsert).
+
+    🔸 Duplicados de clave natural (estudiante, NRC, periodo) dentro del archivo:
+    se colapsan ANTES de escribir según `estrategia_duplicados` ("ultima" o
+    "mayor_nota", ver argos_transform.ESTRATEGIAS_DUPLICADOS). Cada clave se
+    escribe una sola vez y version_periodo aumenta una sola vez por cargue.
+    """
+    df = df.copy()
+    df.columns = df.columns.str.upper()
+
+    if masivo:
+        resumen = _cargar_a_bd_masivo(df, estrategia_duplicados)
+    else:
+        resumen = _cargar_a_bd_fila_a_fila(df, estrategia_duplicados)
+    # Cargue ya confirmado: el snapshot analítico se regenera fuera de su transacción
+    actualizar_snapshot(DB_PATH)
+    return resumen
+
+
+def _filas_rechazadas(df: pd.DataFrame, rechazo_transformacion) -> tuple:
+    """
+    Combina el rechazo de la transformación con la validación por fila.
+    Retorna (mascara_rechazo, conteo por motivo bloqueante).
+    """
+    mascaras = validar_filas(df)
+    rechazo = rechazo_transformacion | filas_rechazadas(mascaras)
+    motivos = {codigo: int(mascaras[codigo].sum()) for codigo in MOTIVOS_BLOQUEANTES}
+    return rechazo, motivos
+
+
+def filas_staging(
+    df: pd.DataFrame,
+    rn_inicial: int = 0,
+    estrategia_duplicados: str = "ultima",
+    excluir=None,
+) -> dict:
+    """
+    Transforma (vectorizado) un DataFrame o bloque ARGOS en tuplas listas para
+    `stg_argos`:
+    - Las filas con motivo bloqueante (nota fuera de rango, periodo inválido,
+      clave faltante) se descartan y solo se cuentan.
+    - Los duplicados de clave natural DENTRO del lote se colapsan según
+      `estrategia_duplicados` antes de tocar la base de datos.
+    - `excluir`: números de fila (rn) ya resueltos como perdedores en un
+      pre-cálculo sobre todo el archivo.
+
+    Retorna un lote: {"filas", "errores", "transferencias", "errores_por_tipo",
+    "duplicados_resueltos", "claves"} donde `claves` (rn, clave, nota de las
+    filas escritas) permite resolver duplicados entre bloques.
+    """
+    filas, rechazo = transformar_argos(df, rn_inicial)
+    rechazo, motivos = _filas_rechazadas(df, rechazo)
+    errores = int(rechazo.sum())
+    if errores:
+        print(
+            f"⚠️ {errores} filas descartadas {motivos}: "
+            f"{(filas.loc[rechazo, 'rn'] + 1).tolist()[:20]}"
+        )
+
+    escribir = ~rechazo
+    duplicados = 0
+    if excluir is not None and len(excluir):
+        excluidas = filas["rn"].isin(excluir).to_numpy() & escribir
+        duplicados += int(excluidas.sum())
+        escribir &= ~excluidas
+    escribir, resueltos = resolver_duplicados(filas, escribir, estrategia_duplicados)
+    duplicados += resueltos
+
+    return {
+        "filas": list(tuplas_staging(filas, escribir)),
+        "errores": errores,
+        "transferencias": int(filas["es_transferencia"].sum()),
+        "errores_por_tipo": motivos,
+        "duplicados_resueltos": duplicados,
+        "claves": claves_resolucion(filas, escribir),
+    }
+
+
+def _acumular_lote(acumulado: dict, lote: dict) -> None:
+    """Suma los contadores de un lote (bloque / hoja) al acumulado."""
+    for clave in ("errores", "transferencias", "duplicados_resueltos"):
+        acumulado[clave] = acumulado.get(clave, 0) + lote[clave]
+    acumular_motivos(acumulado.setdefault("errores_por_tipo", {}), lote["errores_por_tipo"])
+
+
+def descartes_duplicados_archivo(
+    file_buffer,
+    tamano_bloque: int = TAMANO_BLOQUE,
+    estrategia_duplicados: str = "ultima",
+    hoja: str | None = None,
+    al_avanzar: Callable[[int], None] | None = None,
+):
+    """
+    Pre-cálculo en streaming de las filas (rn) perdedoras por duplicado en TODO
+    el archivo. Solo retiene (rn, hash de clave, nota) por fila válida, así que
+    sirve a cargues que confirman bloque a bloque (trabajos en segundo plano).
+    `al_avanzar(filas_leidas)` se llama tras cada bloque, como en
+    validar_excel_por_bloques.
+    """
+    claves: list[pd.DataFrame] = []
+    total = 0
+    for bloque in iterar_bloques_argos(file_buffer, tamano_bloque, hoja):
+        filas, rechazo = transformar_argos(bloque, total)
+        rechazo, _ = _filas_rechazadas(bloque, rechazo)
+        claves.append(claves_resolucion(filas, ~rechazo))
+        total += len(bloque)
+        if al_avanzar is not None:
+            al_avanzar(total)
+    if not claves:
+        return np.array([], dtype=np.int64)
+    return descartes_duplicados(pd.concat(claves, ignore_index=True), estrategia_duplicados)
+
+
+def _resolver_duplicados_entre_bloques(
+    conn, claves: list[pd.DataFrame], estrategia_duplicados: str
+) -> int:
+    """
+    Resuelve (vectorizado) los duplicados que cruzan bloques ya depositados
+    en `stg_argos` y elimina las filas perdedoras. Retorna cuántas eliminó.
+    """
+    if len(claves) < 2:
+        return 0
+    descartes = descartes_duplicados(pd.concat(claves, ignore_index=True), estrategia_duplicados)
+    conn.executemany("DELETE FROM stg_argos WHERE rn = ?", ((int(rn),) for rn in descartes))
+    return len(descartes)
+
+
+def _cargar_a_bd_masivo(df: pd.DataFrame, estrategia_duplicados: str = "ultima") -> dict:
+    """Cargue por conjuntos: staging temporal + fusión en una transacción."""
+    lote = filas_staging(df, estrategia_duplicados=estrategia_duplicados)
+
+    with conexion(DB_PATH) as conn:
+        asegurar_esquema(conn)
+        crear_staging_argos(conn)
+        insertar_staging_argos(conn, lote["filas"])
+        conteos = fusionar_staging_argos(conn)
+        conn.execute("DELETE FROM stg_argos;")
+
+        # registrar_evento hace el único commit de toda la transacción
+        return resumen_cargue(
+            conn,
+            len(df),
+            conteos["nuevos"],
+            conteos["actualizados"],
+            lote["errores"],
+            lote["transferencias"],
+            conteos["sin_cambios"],
+            lote["errores_por_tipo"],
+            lote["duplicados_resueltos"],
+        )
+
+
+def resumen_archivo_omitido(conn, previo: dict, nombre_archivo: str | None) -> dict:
+    """Resumen (y evento de auditoría) para un archivo idéntico ya cargado."""
+    total = previo["total_registros"] or 0
+    registrar_evento(
+        conn,
+        "coordinador_academico",
+        f"Cargue ARGOS omitido – {nombre_archivo or previo['nombre_archivo']}: "
+        f"archivo idéntico ya cargado el {previo['fecha_cargue']} ({total} registros sin cambios)",
+    )
+    return {
+        "total": total,
+        "nuevos": 0,
+        "actualizados": 0,
+        "errores": 0,
+        "transferencias": 0,
+        "sin_cambios": total,
+        "omitido": True,
+        "fecha_cargue_previo": previo["fecha_cargue"],
+    }
+
+
+def cargar_a_bd_por_bloques(
+    file_buffer,
+    tamano_bloque: int = TAMANO_BLOQUE,
+    hoja: str | None = None,
+    nombre_archivo: str | None = None,
+    forzar: bool = False,
+    estrategia_duplicados: str = "ultima",
+) -> tuple[dict | None, dict]:
+    """
+    Cargue real en streaming: sondea el encabezado, valida cada bloque fila a
+    fila y deposita las filas válidas en `stg_argos`; al final fusiona todo en
+    UNA transacción. Solo un encabezado inválido rechaza el archivo; las filas
+    con motivo bloqueante se omiten y se cuentan en `errores_por_tipo`.
+
+    Cargue incremental:
+    - Si la huella SHA-256 del archivo ya está en ArchivoCargado (y no se pide
+      `forzar`), se omite el cargue sin parsear el Excel.
+    - Dentro del archivo, solo se escriben las inscripciones cuyo contenido cambió.
+
+    Los duplicados de clave se colapsan por bloque al transformar y, los que
+    cruzan bloques, con una resolución vectorizada antes de la fusión.
+
+    Retorna (resumen, resultados_validacion); resumen es None si hubo rechazo.
+    """
+    huella = calcular_huella_archivo(file_buffer)
+    # Sin nombre explícito, el de un UploadedFile de Streamlit (si lo tiene)
+    nombre_archivo = nombre_archivo or getattr(file_buffer, "name", None)
+
+    with conexion(DB_PATH) as conn:
+        asegurar_esquema(conn)
+        previo = conn.execute(
+            """
+            SELECT nombre_archivo, total_registros, fecha_cargue
+              FROM ArchivoCargado WHERE huella_archivo = ?
+            """,
+            (huella,),
+        ).fetchone()
+        if previo and not forzar:
+            previo = dict(zip(("nombre_archivo", "total_registros", "fecha_cargue"), previo))
+            return resumen_archivo_omitido(conn, previo, nombre_archivo), {
+                "huella_archivo": huella
+            }
+
+    sondeo = sondear_encabezado_argos(file_buffer, hoja)
+    sondeo.pop("columnas", None)
+    if not sondeo["columnas_validas"]:
+        return None, sondeo
+
+    total = 0
+    acumulado: dict = {"errores": 0, "transferencias": 0, "duplicados_resueltos": 0}
+    claves: list[pd.DataFrame] = []
+
+    with conexion(DB_PATH) as conn:
+        crear_staging_argos(conn)
+
+        for bloque in iterar_bloques_argos(file_buffer, tamano_bloque, hoja):
+            # Las filas inválidas se omiten; el resto del bloque se carga
+            lote = filas_staging(bloque, total, estrategia_duplicados)
+            insertar_staging_argos(conn, lote["filas"])
+            total += len(bloque)
+            _acumular_lote(acumulado, lote)
+            claves.append(lote["claves"])
+
+        acumulado["duplicados_resueltos"] += _resolver_duplicados_entre_bloques(
+            conn, claves, estrategia_duplicados
+        )
+        conteos = fusionar_staging_argos(conn)
+        conn.execute("DELETE FROM stg_argos;")
+        registrar_archivo_cargado(conn, huella, nombre_archivo, total)
+
+        resumen = resumen_cargue(
+            conn,
+            total,
+            conteos["nuevos"],
+            conteos["actualizados"],
+            acumulado["errores"],
+            acumulado["transferencias"],
+            conteos["sin_cambios"],
+            acumulado.get("errores_por_tipo"),
+            acumulado["duplicados_resueltos"],
+        )
+
+    actualizar_snapshot(DB_PATH)
+    sondeo["total_registros"] = total
+    sondeo["huella_archivo"] = huella
+    return resumen, sondeo
+
+
+# -------------------------------------------------
+# CARGUE MÚLTIPLE (VARIOS ARCHIVOS Y HOJAS)
+# -------------------------------------------------
+def listar_hojas_argos(file_buffer) -> list[str]:
+    """Nombres de las hojas del libro (sin leer sus datos)."""
+    if hasattr(file_buffer, "seek"):
+        file_buffer.seek(0)
+    libro = load_workbook(file_buffer, read_only=True)
+    try:
+        return list(libro.sheetnames)
+    finally:
+        libro.close()
+
+
+def preparar_archivo_argos(
+    nombre_archivo: str,
+    contenido: bytes,
+    tamano_bloque: int = TAMANO_BLOQUE,
+    estrategia_duplicados: str = "ultima",
+    directorio_bloques: str | None = None,
+) -> dict:
+    """
+    Parsea, valida y transforma TODAS las hojas ARGOS de un archivo sin tocar
+    la base de datos. Es una función de nivel de módulo para poder ejecutarse
+    en un proceso aparte (ProcessPoolExecutor).
+
+    - Las hojas cuyo encabezado no corresponde al layout ARGOS se omiten
+      (p. ej. hojas de notas o resúmenes) y se informan en `hojas`.
+    - En las hojas ARGOS se omiten solo las filas inválidas (conteo por motivo
+      en `errores_por_tipo`).
+    - Cada bloque validado se escribe en un archivo temporal propio dentro de
+      `directorio_bloques` (por defecto, el temporal del sistema): el
+      trabajador nunca retiene ni devuelve las filas de todo el archivo.
+    - Los duplicados de clave se colapsan dentro de cada bloque; los que
+      cruzan bloques u hojas los resuelve el escritor en `stg_argos` con
+      `claves` (rn, hash de clave y nota por fila escrita).
+
+    Retorna un dict con `archivo`, `es_valido`, `hojas`, `total`, `errores`,
+    `errores_por_tipo`, `duplicados_resueltos`, `transferencias`, `bloques`
+    (rutas de los archivos de bloque, en orden), `claves`, `directorio` (se
+    libera con descartar_bloques) y `detalle` si falló.
+    """
+    resultado = {
+        "archivo": nombre_archivo,
+        "es_valido": False,
+        "hojas": [],
+        "total": 0,
+        "errores": 0,
+        "errores_por_tipo": {},
+        "duplicados_resueltos": 0,
+        "transferencias": 0,
+        "bloques": [],
+        "claves": [],
+    }
+    directorio = Path(tempfile.mkdtemp(prefix="argos_bloques_", dir=directorio_bloques))
+    resultado["directorio"] = str(directorio)
+    try:
+        buffer = BytesIO(contenido)
+        for hoja in listar_hojas_argos(buffer):
+            sondeo = sondear_encabezado_argos(buffer, hoja)
+            sondeo.pop("columnas", None)
+            if not sondeo["columnas_validas"]:
+                resultado["hojas"].append({"hoja": hoja, "estado": "Omitida (layout no ARGOS)"})
+                continue
+
+            registros_hoja = 0
+            for bloque in iterar_bloques_argos(buffer, tamano_bloque, hoja):
+                lote = filas_staging(bloque, resultado["total"], estrategia_duplicados)
+                ruta = directorio / f"bloque_{len(resultado['bloques']):05d}.pkl"
+                with ruta.open("wb") as archivo:
+                    pickle.dump(lote["filas"], archivo, protocol=pickle.HIGHEST_PROTOCOL)
+                resultado["bloques"].append(str(ruta))
+                resultado["total"] += len(bloque)
+                _acumular_lote(resultado, lote)
+                resultado["claves"].append(lote["claves"])
+                registros_hoja += len(bloque)
+
+            resultado["hojas"].append(
+                {"hoja": hoja, "estado": "Válida", "registros": registros_hoja}
+            )
+
+        if not any(h["estado"] == "Válida" for h in resultado["hojas"]):
+            resultado["detalle"] = "Ninguna hoja tiene el layout ARGOS (A–W)."
+            descartar_bloques(resultado)
+            return resultado
+
+        resultado["es_valido"] = True
+        return resultado
+
+    except Exception as e:
+        descartar_bloques(resultado)
+        resultado["detalle"] = str(e)
+        return resultado
+
+
+def descartar_bloques(preparado: dict) -> None:
+    """Borra la carpeta de bloques de un archivo preparado."""
+    if preparado.get("directorio"):
+        shutil.rmtree(preparado["directorio"], ignore_errors=True)
+    preparado["bloques"] = []
+    preparado["claves"] = []
+
+
+def _leer_bloque(ruta: str) -> list[tuple]:
+    """Filas (tuplas de stg_argos) de un archivo de bloque."""
+    with open(ruta, "rb") as archivo:
+        return pickle.load(archivo)
+
+
+def _preparar_archivos(
+    archivos: list[tuple[str, bytes]],
+    max_procesos: int | None,
+    estrategia_duplicados: str = "ultima",
+    directorio_bloques: str | None = None,
+) -> Iterator[dict]:
+    """
+    Prepara los archivos en un pool de procesos y los entrega EN ORDEN de
+    entrada (el escritor único respeta así la semántica "gana la última fila").
+    Cada trabajador devuelve solo rutas de bloques y contadores, no filas.
+    Si el pool no está disponible (entornos sin fork/spawn), se procesan en
+    serie en el proceso actual.
+    """
+    nombres = [nombre for nombre, _ in archivos]
+    contenidos = [contenido for _, contenido in archivos]
+    tamanos = [TAMANO_BLOQUE] * len(archivos)
+    estrategias = [estrategia_duplicados] * len(archivos)
+    directorios = [directorio_bloques] * len(archivos)
+    procesos = min(len(archivos), max_procesos or os.cpu_count() or 1)
+
+    entregados = 0
+    if procesos > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=procesos) as pool:
+                for preparado in pool.map(
+                    preparar_archivo_argos, nombres, contenidos, tamanos, estrategias, directorios
+                ):
+                    entregados += 1
+                    yield preparado
+            return
+        except (OSError, RuntimeError, NotImplementedError) as e:
+            print(f"⚠️ Pool de procesos no disponible ({e}); se continúa en serie.")
+
+    for nombre, contenido in archivos[entregados:]:
+        yield preparar_archivo_argos(
+            nombre, contenido, TAMANO_BLOQUE, estrategia_duplicados, directorio_bloques
+        )
+
+
+def cargar_archivos_argos(
+    archivos: list[tuple[str, bytes]],
+    max_procesos: int | None = None,
+    forzar: bool = False,
+    estrategia_duplicados: str = "ultima",
+) -> dict:
+    """
+    Cargue de varios archivos ARGOS (cada uno con una o más hojas).
+
+    El parseo, la validación y la transformación corren en paralelo en un pool
+    de procesos que deja cada bloque validado en un archivo temporal; la
+    escritura la hace un ÚNICO escritor SQLite que lee esos bloques uno a uno,
+    con una transacción por archivo: un archivo inválido o cuya escritura
+    falla se deshace solo a él ("Error en validación" / "Error en carga") y
+    el cargue sigue con los demás. La memoria no crece con el tamaño de los
+    archivos.
+    Los archivos idénticos a uno ya cargado se omiten sin parsearlos.
+
+    Parameters
+    ----------
+    archivos:
+        Lista de (nombre_archivo, contenido en bytes).
+    max_procesos:
+        Límite de procesos del pool (por defecto, núcleos disponibles).
+    forzar:
+        Recarga aunque la huella del archivo ya esté registrada.
+    estrategia_duplicados:
+        Resolución de claves repetidas dentro de cada archivo ("ultima" o "mayor_nota").
+
+    Returns
+    -------
+    dict con `archivos` (resultado por archivo, en orden de entrada) y
+    `combinado` (totales de los archivos cargados).
+    """
+    por_archivo: dict[int, dict] = {}
+    pendientes: list[tuple[int, str, str, bytes]] = []
+
+    with conexion(DB_PATH) as conn, tempfile.TemporaryDirectory(
+        prefix="argos_cargue_"
+    ) as directorio_bloques:
+        asegurar_esquema(conn)
+        for posicion, (nombre, contenido) in enumerate(archivos):
+            huella = hashlib.sha256(contenido).hexdigest()
+            previo = conn.execute(
+                """
+                SELECT nombre_archivo, total_registros, fecha_cargue
+                  FROM ArchivoCargado WHERE huella_archivo = ?
+                """,
+                (huella,),
+            ).fetchone()
+            if previo and not forzar:
+                previo = dict(zip(("nombre_archivo", "total_registros", "fecha_cargue"), previo))
+                resumen = resumen_archivo_omitido(conn, previo, nombre)
+                por_archivo[posicion] = {
+                    "archivo": nombre, "estado": "Omitido (sin cambios)", "resumen": resumen,
+                }
+            else:
+                pendientes.append((posicion, nombre, huella, contenido))
+
+        # Una sola caché de dimensiones para todos los archivos del cargue
+        cache = CacheDimensiones(conn)
+        preparados = _preparar_archivos(
+            [(nombre, contenido) for _, nombre, _, contenido in pendientes],
+            max_procesos,
+            estrategia_duplicados,
+            directorio_bloques,
+        )
+        for (posicion, nombre, huella, _), preparado in zip(pendientes, preparados):
+            if not preparado["es_valido"]:
+                por_archivo[posicion] = {
+                    "archivo": nombre,
+                    "estado": "Error en validación",
+                    "hojas": preparado["hojas"],
+                    "detalle": preparado.get("detalle"),
+                    "resumen": None,
+                }
+                continue
+
+            # Escritor único: una transacción por archivo, un bloque en memoria a la vez
+            conn.commit()
+            try:
+                crear_staging_argos(conn)
+                for ruta in preparado["bloques"]:
+                    insertar_staging_argos(conn, _leer_bloque(ruta))
+                    os.remove(ruta)
+                preparado["duplicados_resueltos"] += _resolver_duplicados_entre_bloques(
+                    conn, preparado["claves"], estrategia_duplicados
+                )
+                conteos = fusionar_staging_argos(conn, cache)
+                conn.execute("DELETE FROM stg_argos;")
+                registrar_archivo_cargado(conn, huella, nombre, preparado["total"])
+                conn.commit()
+            except Exception as e:
+                # Solo se deshace este archivo; la caché pudo registrar filas deshechas
+                conn.rollback()
+                cache.reiniciar()
+                print(f"⚠️ Archivo {nombre} no cargado: {e}")
+                por_archivo[posicion] = {
+                    "archivo": nombre,
+                    "estado": "Error en carga",
+                    "hojas": preparado["hojas"],
+                    "detalle": str(e),
+                    "resumen": None,
+                }
+                continue
+            finally:
+                descartar_bloques(preparado)
+
+            resumen = resumen_cargue(
+                conn,
+                preparado["total"],
+                conteos["nuevos"],
+                conteos["actualizados"],
+                preparado["errores"],
+                preparado["transferencias"],
+                conteos["sin_cambios"],
+                preparado["errores_por_tipo"],
+                preparado["duplicados_resueltos"],
+            )
+            por_archivo[posicion] = {
+                "archivo": nombre, "estado": "Éxito", "hojas": preparado["hojas"], "resumen": resumen,
+            }
+
+        resultados = [por_archivo[i] for i in range(len(archivos))]
+        combinado = {
+            clave: sum(
+                r["resumen"][clave]
+                for r in resultados
+                if r["resumen"] and not r["resumen"]["omitido"]
+            )
+            for clave in (
+                "total",
+                "nuevos",
+                "actualizados",
+                "sin_cambios",
+                "duplicados_resueltos",
+                "errores",
+                "transferencias",
+            )
+        }
+        combinado["errores_por_tipo"] = {}
+        for r in resultados:
+            if r["resumen"] and not r["resumen"]["omitido"]:
+                acumular_motivos(combinado["errores_por_tipo"], r["resumen"]["errores_por_tipo"])
+        combinado["archivos"] = len(resultados)
+        combinado["archivos_cargados"] = sum(r["estado"] == "Éxito" for r in resultados)
+        combinado["archivos_omitidos"] = sum(r["estado"].startswith("Omitido") for r in resultados)
+        combinado["archivos_con_error"] = sum(r["resumen"] is None for r in resultados)
+
+        registrar_evento(
+            conn,
+            "coordinador_academico",
+            f"Cargue ARGOS múltiple – {combinado['archivos']} archivos "
+            f"({combinado['archivos_cargados']} cargados, {combinado['archivos_omitidos']} omitidos, "
+            f"{combinado['archivos_con_error']} con error): {combinado['total']} registros "
+            f"({combinado['nuevos']} nuevos, {combinado['actualizados']} actualizados, "
+            f"{combinado['sin_cambios']} sin cambios, {combinado['errores']} errores)",
+        )
+
+    # Una sola regeneración del snapshot analítico para todos los archivos
+    actualizar_snapshot(DB_PATH)
+    return {"archivos": resultados, "combinado": combinado}
+
+
+def _cargar_a_bd_fila_a_fila(df: pd.DataFrame, estrategia_duplicados: str = "ultima") -> dict:
+    """
+    Cargue histórico fila a fila (un upsert y un commit por inscripción).
+    Las dimensiones pasan por CacheDimensiones: cada programa, curso,
+    estudiante y periodo se escribe como máximo una vez por valor distinto.
+    Los duplicados de clave se resuelven antes del recorrido.
     """
     total = len(df)
     insertados = 0
     actualizados = 0
+    sin_cambios = 0
     errores = 0
-    transferencias = 0
 
-    df = df.copy()
-    df.columns = df.columns.str.upper()
+    filas, rechazo = transformar_argos(df)
+    rechazo, motivos = _filas_rechazadas(df, rechazo)
+    transferencias = int(filas["es_transferencia"].sum())
+    escribir, duplicados_resueltos = resolver_duplicados(filas, ~rechazo, estrategia_duplicados)
+    duplicada = ~rechazo & ~escribir
 
-    with sqlite3.connect(DB_PATH) as conn:
-        cursor = conn.cursor()
+    with conexion(DB_PATH) as conn:
+        asegurar_esquema(conn)
+        cache = CacheDimensiones(conn)
 
-        for idx, fila in df.iterrows():
-            try:
-                # --- Extracción de campos de estudiante ---
-                id_estudiante = str(fila.get("ID_ESTUDIANTE", "")).strip()
-                nombre_estudiante = str(
-                    fila.get("NOMBRE_ESTUDIANTE", "Desconocido")
-                ).strip()
-
-                # --- Datos de programa / contexto institucional ---
-                codigo_programa = str(fila.get("PROGRAMA", "")).strip().upper()
-                descripcion_programa = str(
-                    fila.get("DESCRIPCION_PROGRAMA", "Pendiente")
-                ).strip()
-
-                rectoria = str(fila.get("RECTORIA", "")).strip() or None
-                descripcion_rectoria = (
-                    str(fila.get("DESCRIPCION_RECTORIA", "")).strip() or None
-                )
-                sede = str(fila.get("SEDE", "")).strip() or None
-                descripcion_sede = (
-                    str(fila.get("DESCRIPCION_SEDE", "")).strip() or None
-                )
-                facultad = str(
-                    fila.get("FACULTA") or fila.get("FACULTAD") or ""
-                ).strip() or None
-                descripcion_facultad = (
-                    str(fila.get("DESCRIPCION_FACULTAD", "")).strip() or None
-                )
-                nivel = str(fila.get("NIVEL", "")).strip() or None
-                descripcion_nivel = (
-                    str(fila.get("DESCRIPCION_NIVEL", "")).strip() or None
-                )
+        for datos, rechazada, es_duplicada in zip(
+            filas.to_dict(orient="records"), rechazo, duplicada
+        ):
+            idx = datos["rn"]
+            if es_duplicada:
+                continue
+            if rechazada:
+                print(f"⚠️ Fila {idx + 1} descartada (nota, periodo o clave inválidos).")
+                errores += 1
+                continue
 
-                # Lo que se guarda en Estudiante.programa es el nombre legible
-                programa_visible = descripcion_programa or codigo_programa or "Pendiente"
-                correo = None  # No viene en ARGOS
-
-                # --- Curso / NRC / código alfanumérico ---
-                nrc_valor = str(fila.get("NRCS", "")).strip().upper()
-                alfa = str(fila.get("ALFA", "")).strip()
-                numeri = str(fila.get("NUMERI", "")).strip()
-                nombre_curso = str(
-                    fila.get("DESCRIPCION")
-                    or fila.get("DESCRIPION")
-                    or "Curso sin nombre"
-                ).strip()
-
-                # --- Detección de cursos de transferencia ---
-                if nrc_valor == "TRANSFERENCIA":
-                    id_curso = f"TRANSF-{alfa}{numeri or 'GEN'}"
-                    transferencias += 1
-                else:
-                    id_curso = nrc_valor
-
-                # --- Periodo y nota ---
-                id_periodo = str(fila.get("PERIODO", "")).strip()
-                anio = (
-                    int(id_periodo[:4])
-                    if len(id_periodo) >= 4 and id_periodo[:4].isdigit()
-                    else None
+            datos = {k: (None if pd.isna(v) else v) for k, v in datos.items()}
+            try:
+                # --- Dimensiones (caché del cargue: solo entidades nuevas o modificadas) ---
+                cache.registrar(
+                    "Programa",
+                    datos["codigo_programa"],
+                    (
+                        datos["descripcion_programa"],
+                        datos["rectoria"],
+                        datos["descripcion_rectoria"],
+                        datos["sede"],
+                        datos["descripcion_sede"],
+                        datos["facultad"],
+                        datos["descripcion_facultad"],
+                        datos["nivel"],
+                        datos["descripcion_nivel"],
+                    ),
                 )
-                periodo = (
-                    int(id_periodo[4:])
-                    if len(id_periodo) > 4 and id_periodo[4:].isdigit()
-                    else None
+                cache.registrar(
+                    "Estudiante",
+                    datos["id_estudiante"],
+                    (datos["nombre_estudiante"], datos["programa_visible"], None),
                 )
-
-                nota_str = str(fila.get("DEFINITIVA", "0")).replace(",", ".")
-                try:
-                    nota = float(nota_str)
-                except ValueError:
-                    nota = 0.0
-
-                # --- Programa (catálogo) ---
-                if codigo_programa:
-                    upsert_programa(
-                        conn,
-                        codigo_programa=codigo_programa,
-                        descripcion_programa=descripcion_programa or None,
-                        rectoria=rectoria,
-                        descripcion_rectoria=descripcion_rectoria,
-                        sede=sede,
-                        descripcion_sede=descripcion_sede,
-                        facultad=facultad,
-                        descripcion_facultad=descripcion_facultad,
-                        nivel=nivel,
-                        descripcion_nivel=descripcion_nivel,
-                    )
-
-                # --- Estudiante ---
-                cursor.execute(
-                    """
-                    INSERT OR IGNORE INTO Estudiante (id_estudiante, nombre, programa, correo_institucional)
-                    VALUES (?, ?, ?, ?)
-                    """,
-                    (id_estudiante, nombre_estudiante, programa_visible, correo),
+                cache.registrar(
+                    "Curso",
+                    datos["id_curso"].upper(),
+                    (datos["nombre_curso"], None, datos["codigo_alfanumerico"], datos["codigo_programa"]),
                 )
-
-                # --- Curso (catálogo actual, asociado a un programa) ---
-                upsert_curso(
-                    conn,
-                    id_curso,
-                    nombre_curso,
-                    creditos=None,
-                    alfa=alfa,
-                    numeri=numeri,
-                    codigo_programa=codigo_programa or None,
-                )
-
-                # --- Periodo académico ---
-                cursor.execute(
-                    """
-                    INSERT OR IGNORE INTO PeriodoAcademico (id_periodo, anio, periodo)
-                    VALUES (?, ?, ?)
-                    """,
-                    (id_periodo, anio, periodo),
+                cache.registrar(
+                    "PeriodoAcademico", datos["id_periodo"], (datos["anio"], datos["periodo"])
                 )
 
                 # --- Inscripción (con snapshot del curso) ---
                 accion = upsert_inscripcion(
                     conn,
-                    id_estudiante=id_estudiante,
-                    id_curso=id_curso,
-                    id_periodo=id_periodo,
-                    nota=nota,
-                    alfa=alfa or None,
-                    numeri=numeri or None,
-                    nombre_curso=nombre_curso or None,
-                    codigo_alfanumerico=(
-                        f"{alfa} {numeri}".strip() if (alfa or numeri) else None
-                    ),
+                    id_estudiante=datos["id_estudiante"],
+                    id_curso=datos["id_curso"],
+                    id_periodo=datos["id_periodo"],
+                    nota=datos["nota"],
+                    alfa=datos["alfa"],
+                    numeri=datos["numeri"],
+                    nombre_curso=datos["nombre_curso"],
+                    codigo_alfanumerico=datos["codigo_alfanumerico"],
+                    huella_fila=int(datos["huella_fila"]),
                 )
 
                 if accion == "insertado":
                     insertados += 1
+                elif accion == "sin_cambios":
+                    sin_cambios += 1
                 else:
                     actualizados += 1
 
@@ -225,23 +1027,15 @@ def cargar_a_bd(df: pd.DataFrame):
                 print(f"⚠️ Error procesando fila {idx + 1}: {e}")
                 errores += 1
 
-        resumen_txt = (
-            f"Cargue ARGOS – {total} registros procesados "
-            f"({insertados} nuevos, {actualizados} actualizados, {errores} errores, "
-            f"{transferencias} cursos por transferencia)"
+        resumen = resumen_cargue(
+            conn, total, insertados, actualizados, errores, transferencias,
+            sin_cambios=sin_cambios,
+            errores_por_tipo=motivos,
+            duplicados_resueltos=duplicados_resueltos,
         )
-        registrar_evento(conn, "coordinador_academico", resumen_txt)
         conn.commit()
 
-    print("📦", resumen_txt)
-
-    return {
-        "total": total,
-        "nuevos": insertados,
-        "actualizados": actualizados,
-        "errores": errores,
-        "transferencias": transferencias,
-    }
+    return resumen
 
 
 # -------------------------------------------------
@@ -0,0 +1,255 @@
+"""Transformación vectorizada de filas ARGOS.
+
+Convierte un DataFrame (o un bloque) ARGOS con encabezados canónicos en
+columnas tipadas listas para insertar en `stg_argos`, junto con una máscara
+de rechazo por fila. Toda la normalización (strip/upper de IDs, nota con coma
+decimal, partición del PERIODO, NRC simbólico de transferencias y fallbacks
+FACULTA/FACULTAD, DESCRIPCION/DESCRIPION) se hace columna a columna con
+pandas/NumPy, sin recorrer filas en Python.
+"""
+
+from __future__ import annotations
+
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+from database.upsert import COLUMNAS_STAGING_ARGOS
+
+# Campos que definen el contenido de una inscripción: si ninguno cambia entre
+# cargues, la fila ARGOS se considera idéntica y no se reescribe.
+COLUMNAS_HUELLA = [
+    "id_estudiante",
+    "id_curso",
+    "id_periodo",
+    "nota",
+    "alfa",
+    "numeri",
+    "codigo_alfanumerico",
+    "nombre_curso",
+]
+
+
+def _texto(df: pd.DataFrame, columna: str, defecto: str = "") -> pd.Series:
+    """Columna como texto sin espacios extremos; ausente o NaN → defecto."""
+    if columna not in df.columns:
+        return pd.Series(defecto, index=df.index, dtype=object)
+    serie = df[columna]
+    return serie.where(serie.notna(), defecto).astype(str).str.strip().astype(object)
+
+
+def _vacio_a_none(serie: pd.Series) -> pd.Series:
+    """Reemplaza cadenas vacías por None (NULL en SQLite)."""
+    return serie.where(serie != "", None)
+
+
+def _primero_no_vacio(*series: pd.Series) -> pd.Series:
+    """Primer valor no vacío entre varias columnas de texto (fallback de alias)."""
+    resultado = series[0]
+    for alternativa in series[1:]:
+        resultado = resultado.where(resultado != "", alternativa)
+    return resultado
+
+
+def transformar_argos(df: pd.DataFrame, rn_inicial: int = 0) -> tuple[pd.DataFrame, np.ndarray]:
+    """
+    Transforma un DataFrame ARGOS en columnas tipadas listas para staging.
+
+    Parameters
+    ----------
+    df:
+        DataFrame con encabezados canónicos en mayúsculas.
+    rn_inicial:
+        Número de fila del primer registro (para bloques en streaming).
+
+    Returns
+    -------
+    (filas, rechazo)
+        - filas: DataFrame con las columnas de COLUMNAS_STAGING_ARGOS más
+          `es_transferencia` (bool). Textos vacíos quedan como None, `nota` es
+          float64 y `anio`/`periodo` son Int64 (nulos si el PERIODO no es numérico).
+          `huella_fila` (int64) es el hash de COLUMNAS_HUELLA.
+        - rechazo: np.ndarray[bool], True en filas sin id_estudiante,
+          id_curso o id_periodo.
+    """
+    # --- Estudiante ---
+    id_estudiante = _texto(df, "ID_ESTUDIANTE")
+    nombre_estudiante = _texto(df, "NOMBRE_ESTUDIANTE")
+    nombre_estudiante = nombre_estudiante.where(nombre_estudiante != "", "Desconocido")
+
+    # --- Programa / contexto institucional ---
+    codigo_programa = _texto(df, "PROGRAMA").str.upper().astype(object)
+    descripcion_programa = _texto(df, "DESCRIPCION_PROGRAMA", "Pendiente")
+
+    # Lo que se guarda en Estudiante.programa es el nombre legible
+    programa_visible = _primero_no_vacio(
+        descripcion_programa,
+        codigo_programa,
+        pd.Series("Pendiente", index=df.index, dtype=object),
+    )
+
+    # --- Curso / NRC / código alfanumérico ---
+    nrc_valor = _texto(df, "NRCS").str.upper()
+    alfa = _texto(df, "ALFA")
+    numeri = _texto(df, "NUMERI")
+    nombre_curso = _primero_no_vacio(
+        _texto(df, "DESCRIPCION"),
+        _texto(df, "DESCRIPION"),
+        pd.Series("Curso sin nombre", index=df.index, dtype=object),
+    )
+
+    # --- Detección de cursos de transferencia ---
+    es_transferencia = (nrc_valor == "TRANSFERENCIA").to_numpy()
+    id_transferencia = ("TRANSF-" + alfa + numeri.where(numeri != "", "GEN")).str.upper()
+    id_curso = pd.Series(
+        np.where(es_transferencia, id_transferencia, nrc_valor),
+        index=df.index,
+        dtype=object,
+    )
+
+    codigo_alfanumerico = (alfa + " " + numeri).str.strip().astype(object)
+
+    # --- Periodo y nota ---
+    id_periodo = _texto(df, "PERIODO")
+    anio_txt = id_periodo.str[:4]
+    periodo_txt = id_periodo.str[4:]
+    anio = pd.to_numeric(
+        anio_txt.where(anio_txt.str.fullmatch(r"\d{4}"), None), errors="coerce"
+    ).astype("Int64")
+    periodo = pd.to_numeric(
+        periodo_txt.where(periodo_txt.str.fullmatch(r"\d+"), None), errors="coerce"
+    ).astype("Int64")
+
+    nota = (
+        pd.to_numeric(
+            _texto(df, "DEFINITIVA", "0").str.replace(",", ".", regex=False),
+            errors="coerce",
+        )
+        .fillna(0.0)
+        .astype("float64")
+    )
+
+    filas = pd.DataFrame(
+        {
+            "rn": np.arange(rn_inicial, rn_inicial + len(df), dtype=np.int64),
+            "id_estudiante": id_estudiante,
+            "nombre_estudiante": nombre_estudiante,
+            "programa_visible": programa_visible,
+            "codigo_programa": _vacio_a_none(codigo_programa),
+            "descripcion_programa": _vacio_a_none(descripcion_programa),
+            "rectoria": _vacio_a_none(_texto(df, "RECTORIA")),
+            "descripcion_rectoria": _vacio_a_none(_texto(df, "DESCRIPCION_RECTORIA")),
+            "sede": _vacio_a_none(_texto(df, "SEDE")),
+            "descripcion_sede": _vacio_a_none(_texto(df, "DESCRIPCION_SEDE")),
+            "facultad": _vacio_a_none(
+                _primero_no_vacio(_texto(df, "FACULTA"), _texto(df, "FACULTAD"))
+            ),
+            "descripcion_facultad": _vacio_a_none(_texto(df, "DESCRIPCION_FACULTAD")),
+            "nivel": _vacio_a_none(_texto(df, "NIVEL")),
+            "descripcion_nivel": _vacio_a_none(_texto(df, "DESCRIPCION_NIVEL")),
+            "id_curso": id_curso,
+            "nombre_curso": nombre_curso,
+            "alfa": _vacio_a_none(alfa),
+            "numeri": _vacio_a_none(numeri),
+            "codigo_alfanumerico": _vacio_a_none(codigo_alfanumerico),
+            "id_periodo": id_periodo,
+            "anio": anio,
+            "periodo": periodo,
+            "nota": nota,
+            "es_transferencia": es_transferencia,
+        },
+        index=df.index,
+    )
+
+    # Huella del contenido de origen (clave natural + nota + snapshot del curso)
+    filas["huella_fila"] = (
+        pd.util.hash_pandas_object(filas[COLUMNAS_HUELLA], index=False)
+        .to_numpy()
+        .view(np.int64)
+    )
+
+    rechazo = (
+        (id_estudiante == "") | (id_curso == "") | (id_periodo == "")
+    ).to_numpy()
+
+    return filas, rechazo
+
+
+# Estrategias de resolución de duplicados (misma clave natural dentro del cargue)
+ESTRATEGIAS_DUPLICADOS = {
+    "ultima": "Gana la última fila del archivo",
+    "mayor_nota": "Gana la fila con la mayor DEFINITIVA (empate: la última)",
+}
+CLAVE_INSCRIPCION = ["id_estudiante", "id_curso", "id_periodo"]
+
+
+def claves_resolucion(filas: pd.DataFrame, mascara: np.ndarray | None = None) -> pd.DataFrame:
+    """
+    Columnas mínimas para resolver duplicados sin retener el bloque completo:
+    rn, hash entero de la clave natural y nota (solo filas seleccionadas).
+    """
+    seleccion = filas if mascara is None else filas[mascara]
+    return pd.DataFrame(
+        {
+            "rn": seleccion["rn"].to_numpy(),
+            "clave": pd.util.hash_pandas_object(
+                seleccion[CLAVE_INSCRIPCION], index=False
+            ).to_numpy(),
+            "nota": seleccion["nota"].to_numpy(),
+        }
+    )
+
+
+def descartes_duplicados(claves: pd.DataFrame, estrategia: str = "ultima") -> np.ndarray:
+    """
+    Números de fila (rn) que pierden frente a otra fila con la misma clave.
+
+    Vectorizado: se ordena por (clave, criterio, rn) y se conserva la última
+    fila de cada clave. Determinista para un mismo archivo.
+    """
+    if estrategia not in ESTRATEGIAS_DUPLICADOS:
+        raise ValueError(
+            f"Estrategia de duplicados desconocida: {estrategia!r} "
+            f"(válidas: {', '.join(ESTRATEGIAS_DUPLICADOS)})"
+        )
+    orden = ["clave", "nota", "rn"] if estrategia == "mayor_nota" else ["clave", "rn"]
+    ordenadas = claves.sort_values(orden, kind="stable")
+    perdedoras = ordenadas["clave"].duplicated(keep="last").to_numpy()
+    return ordenadas["rn"].to_numpy()[perdedoras]
+
+
+def resolver_duplicados(
+    filas: pd.DataFrame, mascara: np.ndarray, estrategia: str = "ultima"
+) -> tuple[np.ndarray, int]:
+    """
+    Colapsa los duplicados de clave natural de un lote en memoria.
+    Retorna (mascara de filas a escribir, cantidad de duplicados descartados).
+    """
+    descartes = descartes_duplicados(claves_resolucion(filas, mascara), estrategia)
+    if len(descartes) == 0:
+        return mascara, 0
+    return mascara & ~filas["rn"].isin(descartes).to_numpy(), len(descartes)
+
+
+def tuplas_staging(filas: pd.DataFrame, mascara: np.ndarray | None = None) -> Iterator[tuple]:
+    """
+    Recorre las filas seleccionadas por `mascara` como tuplas en el orden de
+    COLUMNAS_STAGING_ARGOS, con None en lugar de NaN/NA (listas para executemany).
+    """
+    seleccion = filas if mascara is None else filas[mascara]
+    columnas = seleccion[COLUMNAS_STAGING_ARGOS].astype(object)
+    columnas = columnas.where(columnas.notna(), None)
+    return columnas.itertuples(index=False, name=None)
+
+
+__all__ = [
+    "CLAVE_INSCRIPCION",
+    "COLUMNAS_HUELLA",
+    "ESTRATEGIAS_DUPLICADOS",
+    "claves_resolucion",
+    "descartes_duplicados",
+    "resolver_duplicados",
+    "transformar_argos",
+    "tuplas_staging",
+]
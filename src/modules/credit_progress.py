@@ -1,33 +1,46 @@
+import copy
 from typing import Any
 
+import numpy as np
+import pandas as pd
+
 from modules.load_data import (
-    obtener_malla_isov_virtual,
-    validar_y_normalizar_malla,
+    IndiceMalla,
+    compilar_malla,
+    indice_malla_isov_virtual,
     mapear_malla_con_historico,
 )
+from modules.mallas import indice_malla_guardada
 from database import queries
+from database.conexion import conexion
+from database.upsert import guardar_avance_programa, preparar_avance_programa
 
 
 def listar_programas_soportados() -> list[dict]:
     """
-    Devuelve la lista de programas para los cuales existe lógica de malla soportada.
-
-    Primera versión:
-    - Debe incluir al menos el programa de Ingeniería de Software (ISOF),
-      identificando:
-      - codigo_programa: str (por ejemplo, "ISOF")
-      - nombre_programa: str (por ejemplo, "Ingeniería de Software – UNIMINUTO Virtual")
+    Devuelve la lista de programas para los cuales existe malla soportada:
+    los que tienen malla guardada en la base (MallaCurricular) más
+    Ingeniería de Software (ISOF), que usa la malla embebida si no tiene una
+    guardada.
+
+    Cada elemento identifica:
+    - codigo_programa: str (por ejemplo, "ISOF")
+    - nombre_programa: str (por ejemplo, "Ingeniería de Software – UNIMINUTO Virtual")
     """
-    # Usamos la malla embebida y normalizada de ISOF como única fuente de verdad
-    malla_isof = validar_y_normalizar_malla(obtener_malla_isov_virtual())
-    return [
-        {
-            "codigo_programa": malla_isof["codigo_programa"],
-            "nombre_programa": malla_isof.get("programa")
-            or malla_isof.get("nombre_malla")
-            or malla_isof["codigo_programa"],
+    programas = {
+        m["codigo_programa"]: {
+            "codigo_programa": m["codigo_programa"],
+            "nombre_programa": m["programa"] or m["nombre_malla"] or m["codigo_programa"],
         }
-    ]
+        for m in queries.listar_mallas_guardadas()
+    }
+    # La malla embebida de ISOF se normaliza una sola vez (índice en caché)
+    indice = indice_malla_isov_virtual()
+    programas.setdefault(
+        indice.codigo_programa,
+        {"codigo_programa": indice.codigo_programa, "nombre_programa": indice.programa},
+    )
+    return sorted(programas.values(), key=lambda p: p["codigo_programa"])
 
 
 def obtener_malla_para_programa(
@@ -36,10 +49,10 @@ def obtener_malla_para_programa(
     """
     Devuelve la malla curricular normalizada para el programa indicado.
 
-    Primera versión:
-    - Para codigo_programa == "ISOF", debe reutilizar la malla embebida y
-      la lógica de normalización existente en load_data.py
-      (por ejemplo, obtener_malla_isov_virtual + validar_y_normalizar_malla).
+    - Si el programa tiene malla guardada en la base, se usa esa.
+    - Si no, para codigo_programa == "ISOF" se usa la malla embebida
+      normalizada (obtener_malla_isov_virtual + validar_y_normalizar_malla).
+    - Cualquier otro programa lanza NotImplementedError.
 
     Estructura esperada (resumen):
     - codigo_programa: str
@@ -53,13 +66,25 @@ def obtener_malla_para_programa(
         - nombre: str
         - creditos: int
     """
+    # Copia de la malla normalizada en caché: quien la recibe puede modificarla
+    return copy.deepcopy(obtener_indice_malla_programa(codigo_programa).malla)
+
+
+def obtener_indice_malla_programa(codigo_programa: str) -> IndiceMalla:
+    """
+    IndiceMalla (compilado y en caché) de la malla normalizada del programa.
+    Mismos programas soportados que obtener_malla_para_programa.
+    """
     codigo = (codigo_programa or "").strip().upper()
+    indice = indice_malla_guardada(codigo)
+    if indice is not None:
+        return indice
     if codigo == "ISOF":
-        # Normalizamos siempre la malla embebida de ISOF para garantizar estructura consistente
-        return validar_y_normalizar_malla(obtener_malla_isov_virtual())
+        return indice_malla_isov_virtual()
 
     raise NotImplementedError(
-        f"No hay lógica de malla soportada aún para el programa '{codigo_programa}'"
+        f"No hay malla guardada para el programa '{codigo_programa}'. "
+        "Impórtala desde la página Malla o Administración."
     )
 
 
@@ -78,9 +103,215 @@ def _resumen_creditos_malla(malla_cruzada: list[dict]) -> dict[str, int]:
     return resumen
 
 
+# -------------------------------------------------
+# Motor vectorizado de avance por cohorte
+# -------------------------------------------------
+# Mismas reglas que mapear_malla_con_historico + _estado_global_curso, pero
+# para toda la cohorte a la vez: cada inscripción recibe una prioridad
+# (TRANSFERENCIA 3 > APROBADO 2 > PERDIDO 1; 0 = PENDIENTE sin inscripción),
+# se consolida con un máximo en una matriz estudiante × curso de la malla y
+# los créditos salen de productos matriz-vector.
+_PRIORIDAD_PERDIDO = 1
+_PRIORIDAD_APROBADO = 2
+_PRIORIDAD_TRANSFERENCIA = 3
+
+COLUMNAS_AVANCE = [
+    "id_estudiante",
+    "nombre",
+    "programa",
+    "codigo_programa",
+    "cred_aprob_transf",
+    "cred_perdidos",
+    "cred_pendientes",
+    "cred_totales_malla",
+    "porc_aproba_malla",
+]
+
+
+def _como_categoria(serie: pd.Series) -> pd.Categorical:
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie.array
+    return pd.Categorical(serie)
+
+
+def _totales_y_porcentaje(
+    indice: IndiceMalla,
+    cred_aprob_transf: np.ndarray,
+    cred_perdidos: np.ndarray,
+    cred_pendientes: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Créditos totales de la malla por estudiante y porcentaje aprobado."""
+    n_est = len(cred_aprob_transf)
+    if indice.creditos_totales > 0:
+        cred_totales = np.full(n_est, indice.creditos_totales, dtype=np.int64)
+    else:
+        cred_totales = cred_aprob_transf + cred_perdidos + cred_pendientes
+    porcentaje = np.divide(
+        cred_aprob_transf * 100.0,
+        cred_totales,
+        out=np.zeros(n_est, dtype=float),
+        where=cred_totales > 0,
+    )
+    return cred_totales, porcentaje
+
+
+def calcular_avance_programa_df(
+    historial: pd.DataFrame,
+    malla_programa: dict[str, Any] | IndiceMalla,
+) -> pd.DataFrame:
+    """
+    Avance en créditos de toda la cohorte en una sola pasada vectorizada.
+
+    - historial: DataFrame con id_estudiante, nombre, programa,
+      codigo_programa, nrc, codigo_curso y nota (por ejemplo
+      queries.obtener_historial_programa_columnar).
+    - malla_programa: malla normalizada (obtener_malla_para_programa) o su
+      IndiceMalla (obtener_indice_malla_programa).
+
+    Retorna un DataFrame con COLUMNAS_AVANCE, un estudiante por fila en el
+    orden en que aparece en el historial.
+    """
+    if historial is None or historial.empty:
+        return pd.DataFrame(columns=COLUMNAS_AVANCE)
+
+    indice = compilar_malla(malla_programa)
+
+    # --- Estudiantes (códigos 0..k-1 en orden de aparición) ---
+    # La limpieza (strip) se hace una vez por valor distinto, no por fila
+    ids = _como_categoria(historial["id_estudiante"])
+    limpios, valores_limpios = pd.factorize(
+        np.asarray([str(c).strip() for c in ids.categories] + [""], dtype=object)
+    )
+    id_fila = limpios[ids.codes]  # código -1 (NULL) → "" (último valor)
+    validas = valores_limpios[id_fila] != ""
+    hist = historial.loc[validas]
+    est, orden = pd.factorize(id_fila[validas], sort=False)
+    ids_unicos = valores_limpios[orden]
+    n_est = len(ids_unicos)
+
+    # --- Prioridad de cada inscripción (se evalúa una vez por valor distinto) ---
+    nrc = _como_categoria(hist["nrc"])
+    es_transf = np.asarray(
+        [str(c).upper().strip().startswith("TRANSF-") for c in nrc.categories], dtype=bool
+    )
+    transf = np.zeros(len(hist), dtype=bool)
+    con_nrc = nrc.codes >= 0
+    transf[con_nrc] = es_transf[nrc.codes[con_nrc]]
+    nota = pd.to_numeric(hist["nota"], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    prioridad = np.where(
+        transf,
+        _PRIORIDAD_TRANSFERENCIA,
+        np.where(np.nan_to_num(nota, nan=0.0) >= 3.0, _PRIORIDAD_APROBADO, _PRIORIDAD_PERDIDO),
+    ).astype(np.int8)
+
+    # --- Cruce código → curso(s) de la malla ---
+    alias, alias_posicion = indice.pares_alias()
+    creditos = indice.creditos
+    n_cursos = len(indice)
+    codigo = _como_categoria(hist["codigo_curso"])
+    alias_codigo = pd.Index(codigo.categories).get_indexer(alias)
+    conocidos = alias_codigo >= 0
+    pares = pd.DataFrame(
+        {"codigo": alias_codigo[conocidos], "posicion": alias_posicion[conocidos]}
+    )
+    filas = pd.DataFrame({"codigo": codigo.codes.astype(np.int64), "fila": np.arange(len(hist))})
+    cruce = filas.merge(pares, on="codigo", how="inner")
+
+    # --- Matriz estudiante × curso con la mejor prioridad ---
+    matriz = np.zeros(n_est * max(n_cursos, 1), dtype=np.int8)
+    fila = cruce["fila"].to_numpy()
+    np.maximum.at(matriz, est[fila] * n_cursos + cruce["posicion"].to_numpy(), prioridad[fila])
+    matriz = matriz[: n_est * n_cursos].reshape(n_est, n_cursos)
+
+    cred_aprob_transf = (matriz >= _PRIORIDAD_APROBADO) @ creditos
+    cred_perdidos = (matriz == _PRIORIDAD_PERDIDO) @ creditos
+    cred_pendientes = (matriz == 0) @ creditos
+
+    cred_totales, porcentaje = _totales_y_porcentaje(
+        indice, cred_aprob_transf, cred_perdidos, cred_pendientes
+    )
+
+    # --- Datos básicos: primer registro de cada estudiante ---
+    _, primeros = np.unique(est, return_index=True)
+    base = hist.iloc[primeros]
+    codigo_programa = base["codigo_programa"].astype(object)
+    codigo_programa = codigo_programa.where(
+        codigo_programa.notna() & (codigo_programa != ""),
+        indice.malla.get("codigo_programa", ""),
+    )
+
+    return pd.DataFrame(
+        {
+            "id_estudiante": np.asarray(ids_unicos, dtype=object),
+            "nombre": base["nombre"].astype(object).fillna("").astype(str).to_numpy(),
+            "programa": base["programa"].astype(object).fillna("").astype(str).to_numpy(),
+            "codigo_programa": codigo_programa.fillna("").astype(str).to_numpy(),
+            "cred_aprob_transf": cred_aprob_transf.astype(int),
+            "cred_perdidos": cred_perdidos.astype(int),
+            "cred_pendientes": cred_pendientes.astype(int),
+            "cred_totales_malla": cred_totales.astype(int),
+            "porc_aproba_malla": porcentaje,
+        },
+        columns=COLUMNAS_AVANCE,
+    )
+
+
+def calcular_avance_programa_sql(
+    codigo_programa: str,
+    malla_programa: dict[str, Any] | IndiceMalla,
+    estudiantes: list[str] | None = None,
+) -> pd.DataFrame:
+    """
+    Mismo resultado que calcular_avance_programa_df sobre el historial del
+    programa, pero el cruce con la malla y las sumas de créditos se hacen en
+    SQLite (queries.obtener_creditos_malla_programa): solo sale una fila por
+    estudiante en lugar de todo el historial de la cohorte.
+
+    - estudiantes: si se indica, solo se calculan esos estudiantes.
+    """
+    indice = compilar_malla(malla_programa)
+    alias, posiciones = indice.pares_alias()
+    base = queries.obtener_creditos_malla_programa(
+        (codigo_programa or "").strip().upper(),
+        alias,
+        posiciones.tolist(),
+        indice.creditos.tolist(),
+        estudiantes=estudiantes,
+    )
+    if base.empty:
+        return pd.DataFrame(columns=COLUMNAS_AVANCE)
+
+    cred_aprob_transf = base["cred_aprob_transf"].to_numpy(dtype=np.int64)
+    cred_perdidos = base["cred_perdidos"].to_numpy(dtype=np.int64)
+    cred_pendientes = int(indice.creditos.sum()) - cred_aprob_transf - cred_perdidos
+    cred_totales, porcentaje = _totales_y_porcentaje(
+        indice, cred_aprob_transf, cred_perdidos, cred_pendientes
+    )
+    codigo_programa_est = base["codigo_programa"].astype(object)
+    codigo_programa_est = codigo_programa_est.where(
+        codigo_programa_est.notna() & (codigo_programa_est != ""),
+        indice.malla.get("codigo_programa", ""),
+    )
+
+    return pd.DataFrame(
+        {
+            "id_estudiante": base["id_estudiante"].astype(str).str.strip().to_numpy(dtype=object),
+            "nombre": base["nombre"].fillna("").astype(str).to_numpy(),
+            "programa": base["programa"].fillna("").astype(str).to_numpy(),
+            "codigo_programa": codigo_programa_est.fillna("").astype(str).to_numpy(),
+            "cred_aprob_transf": cred_aprob_transf.astype(int),
+            "cred_perdidos": cred_perdidos.astype(int),
+            "cred_pendientes": cred_pendientes.astype(int),
+            "cred_totales_malla": cred_totales.astype(int),
+            "porc_aproba_malla": porcentaje,
+        },
+        columns=COLUMNAS_AVANCE,
+    )
+
+
 def calcular_avance_estudiantes_programa(
     historial_programa: list[dict],
-    malla_programa: dict[str, Any],
+    malla_programa: dict[str, Any] | IndiceMalla,
 ) -> list[dict]:
     """
     Calcula el avance en créditos de todos los estudiantes de un programa.
@@ -90,14 +321,10 @@ def calcular_avance_estudiantes_programa(
       queries.obtener_historial_estudiantes_por_programa(codigo_programa).
     - malla_programa: estructura de malla devuelta por obtener_malla_para_programa.
 
-    Lógica (cuando se implemente):
-    - Agrupar por id_estudiante.
-    - Para cada estudiante, cruzar malla + historial usando mapear_malla_con_historico
-      de load_data.py.
-    - Calcular créditos aprobados (APROBADO + TRANSFERENCIA), perdidos y pendientes.
-    - Calcular el porcentaje de avance: (cred_aprob_transf * 100.0 / cred_totales_malla).
+    Mismo resultado que cruzar la malla con el historial de cada estudiante
+    (mapear_malla_con_historico); el cálculo lo hace calcular_avance_programa_df.
 
-    Cada dict de salida debe incluir:
+    Cada dict de salida incluye:
     - id_estudiante: str
     - nombre: str
     - programa: str
@@ -111,68 +338,11 @@ def calcular_avance_estudiantes_programa(
     if not historial_programa:
         return []
 
-    # Agrupar historial por estudiante
-    historial_por_estudiante: dict[str, list[dict]] = {}
-    for reg in historial_programa:
-        id_est = str(reg.get("id_estudiante", "") or "").strip()
-        if not id_est:
-            continue
-        historial_por_estudiante.setdefault(id_est, []).append(reg)
-
-    creditos_totales_raw = malla_programa.get("creditos_totales")
-    try:
-        creditos_totales_base = int(creditos_totales_raw)
-    except (TypeError, ValueError):
-        creditos_totales_base = 0
-
-    resultados: list[dict] = []
-
-    for id_estudiante, hist_est in historial_por_estudiante.items():
-        # Cruce de malla con histórico individual
-        malla_cruzada = mapear_malla_con_historico(hist_est, malla_programa)
-        resumen = _resumen_creditos_malla(malla_cruzada)
-
-        cred_aprob_transf = resumen["APROBADO"] + resumen["TRANSFERENCIA"]
-        cred_perdidos = resumen["PERDIDO"]
-        cred_pendientes = resumen["PENDIENTE"]
-
-        cred_totales_malla = creditos_totales_base
-        if not cred_totales_malla or cred_totales_malla <= 0:
-            cred_totales_malla = (
-                resumen["APROBADO"]
-                + resumen["TRANSFERENCIA"]
-                + resumen["PERDIDO"]
-                + resumen["PENDIENTE"]
-            )
-
-        if cred_totales_malla and cred_totales_malla > 0:
-            porc_aproba_malla = (cred_aprob_transf * 100.0) / float(cred_totales_malla)
-        else:
-            porc_aproba_malla = 0.0
-
-        # Tomamos datos básicos del primer registro del historial de este estudiante
-        base = hist_est[0]
-        nombre = base.get("nombre", "")
-        programa = base.get("programa", "")
-        codigo_programa = base.get("codigo_programa") or malla_programa.get(
-            "codigo_programa", ""
-        )
-
-        resultados.append(
-            {
-                "id_estudiante": id_estudiante,
-                "nombre": str(nombre),
-                "programa": str(programa),
-                "codigo_programa": str(codigo_programa or ""),
-                "cred_aprob_transf": int(cred_aprob_transf),
-                "cred_perdidos": int(cred_perdidos),
-                "cred_pendientes": int(cred_pendientes),
-                "cred_totales_malla": int(cred_totales_malla or 0),
-                "porc_aproba_malla": float(porc_aproba_malla),
-            }
-        )
-
-    return resultados
+    historial = pd.DataFrame(
+        historial_programa,
+        columns=["id_estudiante", "nombre", "programa", "codigo_programa", "nrc", "codigo_curso", "nota"],
+    )
+    return calcular_avance_programa_df(historial, malla_programa).to_dict(orient="records")
 
 
 def filtrar_porcentaje_minimo(
@@ -204,18 +374,74 @@ def filtrar_porcentaje_minimo(
     return filtrados
 
 
+# -------------------------------------------------
+# Avance persistido (AvanceEstudiante)
+# -------------------------------------------------
+def actualizar_avance_programa(codigo_programa: str) -> dict[str, Any]:
+    """
+    Pone al día AvanceEstudiante para el programa recalculando solo lo
+    necesario: los estudiantes marcados por los triggers (historial, nombre o
+    programa de curso cambiados), los nuevos en la cohorte y, si la malla
+    cambió de huella, todo el programa. Sin pendientes solo cuesta unas
+    lecturas por índice.
+
+    Todo ocurre en una transacción IMMEDIATE: un cargue en paralelo espera y
+    sus marcas no se pierden.
+
+    Retorna {"codigo_programa", "recalculados", "eliminados", "malla_cambiada"}.
+    """
+    cod = (codigo_programa or "").strip().upper()
+    indice = obtener_indice_malla_programa(cod)
+
+    with conexion(queries.DB_PATH) as conn:
+        if not conn.in_transaction:
+            conn.execute("BEGIN IMMEDIATE;")
+        estado = preparar_avance_programa(conn, cod, indice.huella)
+        recalculados = 0
+        if estado["pendientes"]:
+            avance = calcular_avance_programa_sql(cod, indice, estudiantes=estado["pendientes"])
+            recalculados = guardar_avance_programa(
+                conn, cod, indice.huella, avance.to_dict(orient="records")
+            )
+
+    if recalculados or estado["eliminados"]:
+        print(
+            f"📈 Avance {cod}: {recalculados} estudiantes recalculados, "
+            f"{estado['eliminados']} retirados"
+            + (" (malla nueva)" if estado["malla_cambiada"] else "")
+            + "."
+        )
+    return {
+        "codigo_programa": cod,
+        "recalculados": recalculados,
+        "eliminados": estado["eliminados"],
+        "malla_cambiada": bool(estado["malla_cambiada"]),
+    }
+
+
+MOTORES_AVANCE = ("tabla", "sql", "vectorizado")
+"""Formas de obtener el avance: "tabla" (AvanceEstudiante actualizado de
+forma incremental), "sql" (sumas en SQLite, una fila por estudiante) o
+"vectorizado" (historial completo en pandas/NumPy)."""
+
+
 def generar_reporte_avance_creditos(
     codigo_programa: str,
     porcentaje_min: float,
+    motor: str = "tabla",
 ) -> dict[str, Any]:
     """
     Servicio de alto nivel que orquesta todo el flujo del reporte de avance.
 
-    Flujo (cuando se implemente):
-    - malla = obtener_malla_para_programa(codigo_programa)
-    - historial = queries.obtener_historial_estudiantes_por_programa(codigo_programa)
-    - todos = calcular_avance_estudiantes_programa(historial, malla)
-    - filtrados = filtrar_porcentaje_minimo(todos, porcentaje_min)
+    Flujo:
+    - malla = obtener_indice_malla_programa(codigo_programa)
+    - todos = según `motor`:
+      - "tabla": actualizar_avance_programa(codigo_programa) y lectura
+        de AvanceEstudiante
+      - "sql": calcular_avance_programa_sql(codigo_programa, malla)
+      - "vectorizado": calcular_avance_programa_df(
+            queries.obtener_historial_programa_columnar(codigo_programa), malla)
+    - filtrados = todos con porc_aproba_malla >= porcentaje_min
 
     Debe devolver un dict con:
     - codigo_programa: str
@@ -227,24 +453,28 @@ def generar_reporte_avance_creditos(
     - estudiantes_todos: list[dict]
     - estudiantes_filtrados: list[dict]
     """
+    if motor not in MOTORES_AVANCE:
+        raise ValueError(f"Motor de avance desconocido: {motor!r} (usa {MOTORES_AVANCE}).")
+
     # Normalizar código de programa
     cod = (codigo_programa or "").strip().upper()
 
-    # Obtener malla y nombre legible del programa
-    malla = obtener_malla_para_programa(cod)
-    nombre_programa = (
-        malla.get("programa")
-        or malla.get("nombre_malla")
-        or malla.get("codigo_programa")
-        or cod
-    )
-    nombre_programa = str(nombre_programa)
-
-    # Obtener historial masivo de inscripciones del programa
-    historial = queries.obtener_historial_estudiantes_por_programa(cod)
-
-    # Calcular avance de todos los estudiantes
-    estudiantes_todos = calcular_avance_estudiantes_programa(historial, malla)
+    # Índice compilado de la malla y nombre legible del programa
+    malla = obtener_indice_malla_programa(cod)
+    nombre_programa = str(malla.programa or cod)
+
+    if motor == "tabla":
+        # Solo se recalculan los estudiantes pendientes; el resto se lee
+        actualizar_avance_programa(cod)
+        avance = queries.leer_avance_programa(cod)
+    elif motor == "sql":
+        # Cruce y sumas en SQLite: una fila por estudiante
+        avance = calcular_avance_programa_sql(cod, malla)
+    else:
+        # Historial masivo de inscripciones del programa (columnar) y avance
+        # de toda la cohorte en una pasada vectorizada
+        historial = queries.obtener_historial_programa_columnar(cod)
+        avance = calcular_avance_programa_df(historial, malla)
 
     # Normalizar porcentaje mínimo
     try:
@@ -252,29 +482,17 @@ def generar_reporte_avance_creditos(
     except (TypeError, ValueError):
         porcentaje_minimo = 0.0
 
-    estudiantes_filtrados = filtrar_porcentaje_minimo(
-        estudiantes_todos, porcentaje_minimo
-    )
+    filtrados = avance[avance["porc_aproba_malla"] >= porcentaje_minimo]
+    estudiantes_todos = avance.to_dict(orient="records")
+    estudiantes_filtrados = filtrados.to_dict(orient="records")
 
-    total_estudiantes_programa = len(estudiantes_todos)
-    total_con_avance_mayor_igual = len(estudiantes_filtrados)
+    total_estudiantes_programa = len(avance)
+    total_con_avance_mayor_igual = len(filtrados)
 
-    # Calcular promedio de porcentaje de los filtrados
-    promedio_porcentaje_filtrados: float | None
-    if estudiantes_filtrados:
-        suma = 0.0
-        count = 0
-        for est in estudiantes_filtrados:
-            valor = est.get("porc_aproba_malla")
-            try:
-                porc = float(valor)
-            except (TypeError, ValueError):
-                porc = 0.0
-            suma += porc
-            count += 1
-        promedio_porcentaje_filtrados = suma / count if count > 0 else None
-    else:
-        promedio_porcentaje_filtrados = None
+    # Promedio de porcentaje de los filtrados
+    promedio_porcentaje_filtrados: float | None = (
+        float(filtrados["porc_aproba_malla"].mean()) if len(filtrados) else None
+    )
 
     return {
         "codigo_programa": str(cod),
@@ -1,6 +1,12 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
 
 
 MALLA_ISOV_VIRTUAL: Dict[str, Any] = {
@@ -371,6 +377,162 @@ def validar_y_normalizar_malla(malla: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
+# -------------------------------------------------
+# Índice compilado de malla (caché por contenido)
+# -------------------------------------------------
+# Cruzar una malla con el histórico exige, por cada curso, normalizar el
+# código (upper/strip), expandir la lista de alias y leer los créditos del
+# dict anidado. IndiceMalla hace ese trabajo una sola vez por contenido de
+# malla y lo deja en arreglos por posición ("slot") de curso, en el orden
+# en que se recorre el plan. Los índices se guardan en un caché LRU por
+# huella del contenido, así que la Malla, el avance por cohorte y los
+# reportes reutilizan el mismo índice mientras la malla no cambie.
+MAX_INDICES_MALLA = 16
+
+_INDICES_MALLA: "OrderedDict[Tuple[str, bool], IndiceMalla]" = OrderedDict()
+_BLOQUEO_INDICES = threading.Lock()
+
+
+class IndiceMalla:
+    """
+    Malla compilada. Por cada curso (slot 0..n-1):
+
+    - codigos[slot]: código visible (el primero si hay alias)
+    - nombres[slot], creditos_mostrar[slot]: tal como vienen en la malla
+    - creditos[slot], cuatrimestres[slot]: np.ndarray int64
+    - alias_curso[slot]: tupla de códigos normalizados sin repetir
+
+    Además `alias` (código → slots), `bloques` [(cuatrimestre, inicio, fin)],
+    los datos generales del programa y la malla de origen (`malla`).
+    """
+
+    __slots__ = (
+        "huella",
+        "malla",
+        "codigo_programa",
+        "nombre_malla",
+        "programa",
+        "creditos_totales",
+        "codigos",
+        "nombres",
+        "creditos_mostrar",
+        "creditos",
+        "cuatrimestres",
+        "alias_curso",
+        "alias",
+        "bloques",
+    )
+
+    def __init__(self, malla: Dict[str, Any], huella: str):
+        self.huella = huella
+        self.malla = malla
+        self.codigo_programa = str(malla.get("codigo_programa") or "")
+        self.nombre_malla = str(malla.get("nombre_malla") or "")
+        self.programa = str(malla.get("programa") or self.nombre_malla or self.codigo_programa)
+        try:
+            self.creditos_totales = int(malla.get("creditos_totales"))
+        except (TypeError, ValueError):
+            self.creditos_totales = 0
+
+        codigos: List[str] = []
+        nombres: List[Any] = []
+        creditos_mostrar: List[Any] = []
+        creditos: List[int] = []
+        cuatrimestres: List[int] = []
+        alias_curso: List[Tuple[str, ...]] = []
+        alias: Dict[str, List[int]] = {}
+        bloques: List[Tuple[int, int, int]] = []
+
+        for bloque in malla.get("plan", []) or []:
+            cuat = int(bloque.get("cuatrimestre", 0))
+            inicio = len(codigos)
+            for curso in bloque.get("cursos", []) or []:
+                slot = len(codigos)
+                cod_raw = curso.get("codigo")
+                lista = cod_raw if isinstance(cod_raw, list) else [cod_raw]
+                propios = tuple(dict.fromkeys(str(c).upper().strip() for c in lista))
+                for codigo in propios:
+                    alias.setdefault(codigo, []).append(slot)
+
+                codigos.append(propios[0] if propios else "")
+                nombres.append(curso.get("nombre"))
+                creditos_mostrar.append(curso.get("creditos"))
+                try:
+                    creditos.append(
+                        int(curso.get("creditos")) if curso.get("creditos") is not None else 0
+                    )
+                except (TypeError, ValueError):
+                    creditos.append(0)
+                cuatrimestres.append(cuat)
+                alias_curso.append(propios)
+            bloques.append((cuat, inicio, len(codigos)))
+
+        self.codigos = codigos
+        self.nombres = nombres
+        self.creditos_mostrar = creditos_mostrar
+        self.creditos = np.array(creditos, dtype=np.int64)
+        self.cuatrimestres = np.array(cuatrimestres, dtype=np.int64)
+        self.alias_curso = alias_curso
+        self.alias = {codigo: tuple(slots) for codigo, slots in alias.items()}
+        self.bloques = bloques
+
+    def __len__(self) -> int:
+        return len(self.codigos)
+
+    def pares_alias(self) -> Tuple[List[str], np.ndarray]:
+        """Códigos alias y el slot de cada uno (un par por alias y curso)."""
+        codigos = [c for c, slots in self.alias.items() for _ in slots]
+        slots = np.fromiter(
+            (s for ss in self.alias.values() for s in ss), dtype=np.int64, count=len(codigos)
+        )
+        return codigos, slots
+
+
+def huella_malla(malla: Dict[str, Any]) -> str:
+    """SHA-256 del contenido de la malla (JSON canónico, claves ordenadas)."""
+    contenido = json.dumps(malla, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+
+def compilar_malla(malla: Dict[str, Any] | IndiceMalla, normalizar: bool = False) -> IndiceMalla:
+    """
+    IndiceMalla de `malla`, reutilizando el del caché si el contenido ya se
+    compiló. Con normalizar=True la malla pasa antes por
+    validar_y_normalizar_malla (ValueError si no es válida) y `indice.malla`
+    es la versión normalizada.
+    """
+    if isinstance(malla, IndiceMalla):
+        return malla
+
+    clave = (huella_malla(malla), normalizar)
+    with _BLOQUEO_INDICES:
+        indice = _INDICES_MALLA.get(clave)
+        if indice is not None:
+            _INDICES_MALLA.move_to_end(clave)
+            return indice
+
+    base = validar_y_normalizar_malla(malla) if normalizar else malla
+    indice = IndiceMalla(base, clave[0])
+
+    with _BLOQUEO_INDICES:
+        _INDICES_MALLA[clave] = indice
+        _INDICES_MALLA.move_to_end(clave)
+        while len(_INDICES_MALLA) > MAX_INDICES_MALLA:
+            _INDICES_MALLA.popitem(last=False)
+    return indice
+
+
+def indice_malla_isov_virtual() -> IndiceMalla:
+    """Índice (normalizado) de la malla embebida de Ingeniería de Software."""
+    return compilar_malla(MALLA_ISOV_VIRTUAL, normalizar=True)
+
+
+def limpiar_cache_mallas() -> None:
+    """Descarta los índices compilados."""
+    with _BLOQUEO_INDICES:
+        _INDICES_MALLA.clear()
+
+
 def _clasificar_estado_inscripcion(registro: Dict[str, Any]) -> str:
     """Clasifica una inscripción individual como APROBADO, PERDIDO o TRANSFERENCIA.
 
@@ -436,7 +598,7 @@ def _estado_global_curso(registros: List[Dict[str, Any]]) -> Dict[str, Any]:
 
 def mapear_malla_con_historico(
     historial: List[Dict[str, Any]],
-    malla: Dict[str, Any] | None = None,
+    malla: Dict[str, Any] | IndiceMalla | None = None,
 ) -> List[Dict[str, Any]]:
     """Cruza la malla curricular con el histórico del estudiante.
 
@@ -445,7 +607,8 @@ def mapear_malla_con_historico(
     historial:
         Lista de dicts tal como la retorna [database.queries.historial_estudiante].
     malla:
-        Estructura de malla. Si es None, se usa la malla embebida de Ingeniería de Software.
+        Estructura de malla (o su IndiceMalla ya compilado). Si es None, se usa
+        la malla embebida de Ingeniería de Software.
 
     Returns
     -------
@@ -455,42 +618,34 @@ def mapear_malla_con_historico(
         - cursos: lista de dicts con `codigo`, `nombre`, `creditos`, `estado`, `nota`, `id_periodo`.
     """
 
-    if malla is None:
-        malla = MALLA_ISOV_VIRTUAL
+    indice_malla = indice_malla_isov_virtual() if malla is None else compilar_malla(malla)
 
+    # codigo_curso ya llega canónico (Inscripcion.codigo_canonico: mayúsculas,
+    # sin espacios extremos), así que se usa tal cual como llave
     indice: Dict[str, List[Dict[str, Any]]] = {}
     for reg in historial:
-        codigo_hist = str(reg.get("codigo_curso", "")).upper().strip()
-        if not codigo_hist:
+        codigo_hist = reg.get("codigo_curso")
+        if not codigo_hist or codigo_hist not in indice_malla.alias:
             continue
         indice.setdefault(codigo_hist, []).append(reg)
 
     resultado: List[Dict[str, Any]] = []
 
-    for bloque in malla.get("plan", []):
-        cuat = int(bloque.get("cuatrimestre", 0))
+    for cuat, inicio, fin in indice_malla.bloques:
         cursos_bloque: List[Dict[str, Any]] = []
 
-        for curso in bloque.get("cursos", []):
-            cod_raw = curso.get("codigo")
-            if isinstance(cod_raw, list):
-                codigos_malla = [str(c).upper().strip() for c in cod_raw]
-                codigo_mostrar = codigos_malla[0]
-            else:
-                codigo_mostrar = str(cod_raw).upper().strip()
-                codigos_malla = [codigo_mostrar]
-
+        for slot in range(inicio, fin):
             registros_curso: List[Dict[str, Any]] = []
-            for alias in codigos_malla:
+            for alias in indice_malla.alias_curso[slot]:
                 registros_curso.extend(indice.get(alias, []))
 
             estado_info = _estado_global_curso(registros_curso)
 
             cursos_bloque.append(
                 {
-                    "codigo": codigo_mostrar,
-                    "nombre": curso.get("nombre"),
-                    "creditos": curso.get("creditos"),
+                    "codigo": indice_malla.codigos[slot],
+                    "nombre": indice_malla.nombres[slot],
+                    "creditos": indice_malla.creditos_mostrar[slot],
                     "estado": estado_info["estado"],
                     "nota": estado_info["nota"],
                     "id_periodo": estado_info["id_periodo"],
@@ -504,6 +659,11 @@ def mapear_malla_con_historico(
 
 __all__ = [
     "MALLA_ISOV_VIRTUAL",
+    "IndiceMalla",
+    "compilar_malla",
+    "huella_malla",
+    "indice_malla_isov_virtual",
+    "limpiar_cache_mallas",
     "obtener_malla_isov_virtual",
     "validar_y_normalizar_malla",
     "mapear_malla_con_historico",
@@ -0,0 +1,138 @@
+"""Mallas curriculares guardadas en la base (MallaCurricular / MallaCurso).
+
+Las mallas dejan de vivir solo en el dict embebido de ISOF o en la sesión de
+la página Malla: se validan con validar_y_normalizar_malla y se guardan por
+programa, ya sea una a una (página Malla) o en bloque desde una carpeta de
+archivos JSON (página Administración o `python -m modules.mallas <carpeta>`).
+
+La lectura pasa por un caché por programa que se valida contra la huella
+guardada en MallaCurricular: mientras la malla no cambie en la base no se
+vuelven a leer sus cursos ni a compilar su IndiceMalla.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from database import queries
+from database.conexion import conexion
+from database.upsert import guardar_malla, registrar_evento
+from modules.load_data import IndiceMalla, compilar_malla, huella_malla
+
+_MALLAS_GUARDADAS: Dict[tuple, tuple] = {}
+_BLOQUEO = threading.Lock()
+
+
+# -------------------------------------------------
+# Escritura
+# -------------------------------------------------
+def guardar_malla_programa(
+    malla: Dict[str, Any], usuario: str = "coordinador_academico"
+) -> Dict[str, Any]:
+    """
+    Valida, normaliza y guarda la malla de un programa (reemplaza la
+    anterior). Si la base ya tiene exactamente esa malla no escribe nada.
+
+    Retorna {"codigo_programa", "huella", "estado": "guardada" | "sin_cambios"}.
+    Lanza ValueError si la malla no es válida.
+    """
+    indice = compilar_malla(malla, normalizar=True)
+    malla_norm = indice.malla
+    huella = huella_malla(malla_norm)
+    codigo = malla_norm["codigo_programa"]
+
+    if queries.huella_malla_guardada(codigo) == huella:
+        return {"codigo_programa": codigo, "huella": huella, "estado": "sin_cambios"}
+
+    with conexion(queries.DB_PATH) as conn:
+        guardar_malla(conn, malla_norm, huella)
+        conn.commit()
+        registrar_evento(
+            conn,
+            usuario,
+            f"Malla '{malla_norm['nombre_malla']}' guardada para el programa {codigo} "
+            f"({len(indice)} cursos)",
+        )
+    return {"codigo_programa": codigo, "huella": huella, "estado": "guardada"}
+
+
+def importar_mallas_directorio(
+    directorio: str | Path, usuario: str = "coordinador_academico"
+) -> Dict[str, List]:
+    """
+    Importa todos los archivos *.json de `directorio` (uno por malla). Un
+    archivo inválido no detiene a los demás.
+
+    Retorna {"guardadas": [códigos], "sin_cambios": [códigos],
+             "errores": [{"archivo", "error"}]}.
+    """
+    directorio = Path(directorio)
+    if not directorio.is_dir():
+        raise FileNotFoundError(f"No existe la carpeta de mallas: {directorio}")
+
+    resumen: Dict[str, List] = {"guardadas": [], "sin_cambios": [], "errores": []}
+    for archivo in sorted(directorio.glob("*.json")):
+        try:
+            malla = json.loads(archivo.read_text(encoding="utf-8"))
+            resultado = guardar_malla_programa(malla, usuario=usuario)
+        except (OSError, ValueError) as e:
+            resumen["errores"].append({"archivo": archivo.name, "error": str(e)})
+            print(f"⚠️ Malla {archivo.name} no importada: {e}")
+            continue
+        destino = "guardadas" if resultado["estado"] == "guardada" else "sin_cambios"
+        resumen[destino].append(resultado["codigo_programa"])
+
+    print(
+        f"📚 Mallas importadas desde {directorio}: {len(resumen['guardadas'])} guardadas, "
+        f"{len(resumen['sin_cambios'])} sin cambios, {len(resumen['errores'])} con error."
+    )
+    return resumen
+
+
+# -------------------------------------------------
+# Lectura (con caché por huella)
+# -------------------------------------------------
+def indice_malla_guardada(codigo_programa: str) -> Optional[IndiceMalla]:
+    """
+    IndiceMalla de la malla guardada del programa, o None si no hay. Solo
+    consulta la huella en MallaCurricular; los cursos se leen y compilan
+    únicamente cuando la malla cambió desde la última vez.
+    """
+    codigo = (codigo_programa or "").strip().upper()
+    huella = queries.huella_malla_guardada(codigo)
+    if huella is None:
+        return None
+
+    clave = (str(queries.DB_PATH), codigo)
+    with _BLOQUEO:
+        en_cache = _MALLAS_GUARDADAS.get(clave)
+    if en_cache is not None and en_cache[0] == huella:
+        return en_cache[1]
+
+    malla = queries.obtener_malla_guardada(codigo)
+    if malla is None:
+        return None
+    malla.pop("huella", None)
+    indice = compilar_malla(malla)
+    with _BLOQUEO:
+        _MALLAS_GUARDADAS[clave] = (huella, indice)
+    return indice
+
+
+def limpiar_cache_mallas_guardadas() -> None:
+    """Descarta el caché de mallas leídas de la base."""
+    with _BLOQUEO:
+        _MALLAS_GUARDADAS.clear()
+
+
+# -------------------------------------------------
+# PRUEBA LOCAL / IMPORTACIÓN POR CONSOLA
+# -------------------------------------------------
+if __name__ == "__main__":
+    import sys
+
+    carpeta = sys.argv[1] if len(sys.argv) > 1 else queries.BASE_DIR / "data" / "mallas"
+    print(json.dumps(importar_mallas_directorio(carpeta), ensure_ascii=False, indent=2))
@@ -0,0 +1,529 @@
+"""Cargues ARGOS en segundo plano con progreso persistido en SQLite.
+
+Un trabajo de cargue corre en un hilo del servidor de Streamlit, no en el hilo
+del script de la sesión: refrescar el navegador no lo interrumpe y la página
+de Cargue solo consulta su estado en la tabla `TrabajoCargue`.
+
+Flujo de un trabajo:
+1. El archivo subido se copia a `data/trabajos_cargue/` (permite reanudar).
+2. Validación completa por bloques (nada se escribe si el archivo es inválido).
+3. Cargue bloque a bloque: cada bloque se fusiona y se confirma en la MISMA
+   transacción que el avance del trabajo (`bloques_confirmados`, contadores).
+4. Al terminar se registra la huella del archivo y el evento de auditoría.
+
+Cada ejecución tiene un `propietario` (host, pid y lanzamiento) y refresca
+`fecha_actualizacion` en cada bloque (latido). Si el proceso muere a mitad de
+camino el latido se detiene: pasado LATIDO_VENCIDO_SEGUNDOS el trabajo queda
+`interrumpido` y `reanudar_trabajo` continúa desde el último bloque
+confirmado con un propietario nuevo; un ejecutor anterior que siguiera vivo
+deja de poder escribir en cuanto pierde la propiedad.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import uuid
+from pathlib import Path
+
+from database.cache_dimensiones import CacheDimensiones
+from database.conexion import cerrar_conexion_hilo, conexion
+from database.db_init import BASE_DIR, DB_PATH, asegurar_esquema
+from database.snapshot_analitico import actualizar_snapshot
+from database.upsert import (
+    crear_staging_argos,
+    fusionar_staging_argos,
+    insertar_staging_argos,
+    registrar_archivo_cargado,
+    registrar_evento,
+)
+from modules.argos_loader import (
+    TAMANO_BLOQUE,
+    acumular_motivos,
+    calcular_huella_archivo,
+    descartes_duplicados_archivo,
+    filas_staging,
+    iterar_bloques_argos,
+    resumen_archivo_omitido,
+    resumen_cargue,
+    validar_excel_por_bloques,
+)
+
+TRABAJOS_DIR = BASE_DIR / "data" / "trabajos_cargue"
+"""Copias de los archivos subidos mientras su trabajo no termina."""
+
+ESTADOS_ACTIVOS = ("pendiente", "validando", "cargando")
+"""Estados de un trabajo que aún no termina."""
+
+LATIDO_VENCIDO_SEGUNDOS = 120
+"""Un trabajo activo sin latido durante este lapso se considera interrumpido."""
+
+_CONTADORES = (
+    "nuevos",
+    "actualizados",
+    "sin_cambios",
+    "duplicados_resueltos",
+    "errores",
+    "transferencias",
+)
+
+# Hilos de este proceso (id_trabajo → Thread), registrados ANTES de confirmar
+# el estado 'pendiente' y retirados al terminar. Evitan lanzar dos veces el
+# mismo trabajo desde este proceso; la vida de un trabajo entre procesos la
+# decide el latido persistido, no este diccionario.
+_HILOS: dict[int, threading.Thread] = {}
+_BLOQUEO = threading.Lock()
+
+_EJECUTOR = f"{socket.gethostname()}:{os.getpid()}"
+
+
+class _TrabajoReasignado(Exception):
+    """El trabajo pasó a otro propietario (fue reanudado en otra ejecución)."""
+
+
+def _nuevo_propietario() -> str:
+    """Token único de una ejecución de trabajo: host, pid y lanzamiento."""
+    return f"{_EJECUTOR}:{uuid.uuid4().hex[:12]}"
+
+
+def _hilo_vigente(hilo: threading.Thread) -> bool:
+    """True si el hilo corre o está registrado y aún no arranca (ident None)."""
+    return hilo.is_alive() or hilo.ident is None
+
+
+# -------------------------------------------------
+# ESTADO DEL TRABAJO
+# -------------------------------------------------
+def _actualizar_trabajo(
+    conn: sqlite3.Connection, id_trabajo: int, propietario: str, **campos
+) -> None:
+    """
+    Actualiza columnas del trabajo y su latido (sin commit), solo si sigue
+    perteneciendo a `propietario`; si no, lanza _TrabajoReasignado.
+    """
+    asignaciones = "".join(f"{columna} = ?, " for columna in campos)
+    cursor = conn.execute(
+        f"""
+        UPDATE TrabajoCargue
+           SET {asignaciones}fecha_actualizacion = CURRENT_TIMESTAMP
+         WHERE id_trabajo = ? AND propietario = ?
+        """,
+        (*campos.values(), id_trabajo, propietario),
+    )
+    if cursor.rowcount != 1:
+        raise _TrabajoReasignado(f"El trabajo {id_trabajo} ya no pertenece a esta ejecución.")
+
+
+def _marcar_interrumpidos(conn: sqlite3.Connection) -> None:
+    """
+    Marca `interrumpido` los trabajos activos cuyo latido venció (más de
+    LATIDO_VENCIDO_SEGUNDOS sin refrescar `fecha_actualizacion`), salvo los
+    que tienen un hilo vigente en este proceso. Un trabajo que sigue latiendo
+    en otro proceso, o en un hilo que sobrevivió a una recarga del módulo, no
+    se toca. La búsqueda es de solo lectura: sin vencidos no se pide el
+    bloqueo de escritura.
+    """
+    marcadores = ", ".join("?" for _ in ESTADOS_ACTIVOS)
+    vencimiento = f"-{int(LATIDO_VENCIDO_SEGUNDOS)} seconds"
+    vencidos = [
+        fila[0]
+        for fila in conn.execute(
+            f"""
+            SELECT id_trabajo FROM TrabajoCargue
+             WHERE estado IN ({marcadores})
+               AND fecha_actualizacion < datetime('now', ?)
+            """,
+            (*ESTADOS_ACTIVOS, vencimiento),
+        )
+    ]
+    with _BLOQUEO:
+        vencidos = [i for i in vencidos if not (i in _HILOS and _hilo_vigente(_HILOS[i]))]
+    if not vencidos:
+        return
+    # El latido se vuelve a comprobar al escribir: pudo refrescarse entre tanto
+    conn.executemany(
+        f"""
+        UPDATE TrabajoCargue
+           SET estado = 'interrumpido', fecha_actualizacion = CURRENT_TIMESTAMP
+         WHERE id_trabajo = ? AND estado IN ({marcadores})
+           AND fecha_actualizacion < datetime('now', ?)
+        """,
+        [(i, *ESTADOS_ACTIVOS, vencimiento) for i in vencidos],
+    )
+    conn.commit()
+
+
+def _detalle_json(detalle: str | None) -> dict:
+    """`detalle` como dict (vacío si no hay o no es un objeto JSON)."""
+    try:
+        datos = json.loads(detalle) if detalle else {}
+    except json.JSONDecodeError:
+        return {}
+    return datos if isinstance(datos, dict) else {}
+
+
+def _errores_por_tipo(detalle: str | None) -> dict[str, int]:
+    """Conteo por motivo guardado en `detalle` (vacío si no hay o no es JSON)."""
+    return dict(_detalle_json(detalle).get("errores_por_tipo") or {})
+
+
+def obtener_trabajo(id_trabajo: int) -> dict | None:
+    """Estado actual de un trabajo (dict) o None si no existe."""
+    with conexion(DB_PATH) as conn:
+        asegurar_esquema(conn)
+        _marcar_interrumpidos(conn)
+        conn.row_factory = sqlite3.Row
+        fila = conn.execute(
+            "SELECT * FROM TrabajoCargue WHERE id_trabajo = ?", (id_trabajo,)
+        ).fetchone()
+    if fila is None:
+        return None
+    trabajo = dict(fila)
+    trabajo["errores_por_tipo"] = _errores_por_tipo(trabajo["detalle"])
+    return trabajo
+
+
+def listar_trabajos(limite: int = 10) -> list[dict]:
+    """Trabajos más recientes primero (incluye activos de otras sesiones)."""
+    with conexion(DB_PATH) as conn:
+        asegurar_esquema(conn)
+        _marcar_interrumpidos(conn)
+        conn.row_factory = sqlite3.Row
+        filas = conn.execute(
+            "SELECT * FROM TrabajoCargue ORDER BY id_trabajo DESC LIMIT ?", (limite,)
+        ).fetchall()
+    trabajos = [dict(f) for f in filas]
+    for trabajo in trabajos:
+        trabajo["errores_por_tipo"] = _errores_por_tipo(trabajo["detalle"])
+    return trabajos
+
+
+def trabajo_activo(id_trabajo: int) -> bool:
+    """
+    True si el trabajo sigue en curso en cualquier proceso: estado activo con
+    latido vigente, o hilo reservado en este proceso.
+    """
+    trabajo = obtener_trabajo(id_trabajo)
+    return bool(trabajo and trabajo["estado"] in ESTADOS_ACTIVOS)
+
+
+# -------------------------------------------------
+# EJECUCIÓN
+# -------------------------------------------------
+def _ejecutar_trabajo(id_trabajo: int, tamano_bloque: int, propietario: str) -> None:
+    """
+    Cuerpo del hilo: valida (si hace falta) y carga bloque a bloque. Cada
+    escritura del avance comprueba que el trabajo siga siendo de `propietario`.
+    """
+    with conexion(DB_PATH) as conn:
+
+        def latido(_filas_leidas: int) -> None:
+            _actualizar_trabajo(conn, id_trabajo, propietario)
+            conn.commit()
+
+        try:
+            conn.row_factory = sqlite3.Row
+            trabajo = dict(
+                conn.execute(
+                    "SELECT * FROM TrabajoCargue WHERE id_trabajo = ?", (id_trabajo,)
+                ).fetchone()
+            )
+            conn.row_factory = None
+            ruta = Path(trabajo["ruta_archivo"])
+            nombre = trabajo["nombre_archivo"]
+
+            # --- Archivo idéntico a uno ya cargado ---
+            previo = conn.execute(
+                """
+                SELECT nombre_archivo, total_registros, fecha_cargue
+                  FROM ArchivoCargado WHERE huella_archivo = ?
+                """,
+                (trabajo["huella_archivo"],),
+            ).fetchone()
+            if previo and trabajo["bloques_confirmados"] == 0:
+                previo = dict(zip(("nombre_archivo", "total_registros", "fecha_cargue"), previo))
+                resumen = resumen_archivo_omitido(conn, previo, nombre)
+                _actualizar_trabajo(
+                    conn,
+                    id_trabajo,
+                    propietario,
+                    estado="omitido",
+                    total_registros=resumen["total"],
+                    filas_procesadas=resumen["total"],
+                    sin_cambios=resumen["sin_cambios"],
+                    detalle=f"Archivo idéntico ya cargado el {previo['fecha_cargue']}",
+                )
+                conn.commit()
+                ruta.unlink(missing_ok=True)
+                return
+
+            # --- Validación completa antes de escribir el primer bloque ---
+            if trabajo["bloques_confirmados"] == 0:
+                _actualizar_trabajo(conn, id_trabajo, propietario, estado="validando")
+                conn.commit()
+                with ruta.open("rb") as archivo:
+                    es_valido, resultados = validar_excel_por_bloques(
+                        archivo, tamano_bloque, al_avanzar=latido
+                    )
+                if not es_valido:
+                    _actualizar_trabajo(
+                        conn,
+                        id_trabajo,
+                        propietario,
+                        estado="error",
+                        total_registros=resultados.get("total_registros"),
+                        detalle=json.dumps(resultados, ensure_ascii=False),
+                    )
+                    conn.commit()
+                    registrar_evento(
+                        conn,
+                        "coordinador_academico",
+                        f"❌ Cargue fallido: {nombre} – "
+                        f"{json.dumps(resultados, ensure_ascii=False)[:480]}",
+                    )
+                    return
+                trabajo["total_registros"] = resultados["total_registros"]
+
+            _actualizar_trabajo(
+                conn,
+                id_trabajo,
+                propietario,
+                estado="cargando",
+                total_registros=trabajo["total_registros"],
+            )
+            conn.commit()
+
+            # --- Duplicados: perdedores de todo el archivo antes del primer bloque ---
+            estrategia = trabajo["estrategia_duplicados"] or "ultima"
+            with ruta.open("rb") as archivo:
+                descartes = descartes_duplicados_archivo(
+                    archivo, tamano_bloque, estrategia, al_avanzar=latido
+                )
+
+            # --- Cargue por bloques, reanudable ---
+            cache = CacheDimensiones(conn)
+            crear_staging_argos(conn)
+            contadores = {clave: trabajo[clave] or 0 for clave in _CONTADORES}
+            errores_por_tipo = _errores_por_tipo(trabajo["detalle"])
+            filas_procesadas = 0
+            bloques = 0
+
+            with ruta.open("rb") as archivo:
+                for bloque in iterar_bloques_argos(archivo, tamano_bloque):
+                    if bloques < trabajo["bloques_confirmados"]:
+                        # Bloque confirmado en una ejecución anterior
+                        bloques += 1
+                        filas_procesadas += len(bloque)
+                        latido(filas_procesadas)
+                        continue
+
+                    lote = filas_staging(bloque, filas_procesadas, estrategia, descartes)
+                    conn.execute("DELETE FROM stg_argos;")
+                    insertar_staging_argos(conn, lote["filas"])
+                    conteos = fusionar_staging_argos(conn, cache)
+
+                    for clave in ("nuevos", "actualizados", "sin_cambios"):
+                        contadores[clave] += conteos[clave]
+                    for clave in ("duplicados_resueltos", "errores", "transferencias"):
+                        contadores[clave] += lote[clave]
+                    acumular_motivos(errores_por_tipo, lote["errores_por_tipo"])
+                    bloques += 1
+                    filas_procesadas += len(bloque)
+
+                    # Bloque y avance del trabajo en la misma transacción
+                    _actualizar_trabajo(
+                        conn,
+                        id_trabajo,
+                        propietario,
+                        filas_procesadas=filas_procesadas,
+                        bloques_confirmados=bloques,
+                        detalle=json.dumps({"errores_por_tipo": errores_por_tipo}),
+                        **contadores,
+                    )
+                    conn.commit()
+
+            conn.execute("DELETE FROM stg_argos;")
+            registrar_archivo_cargado(conn, trabajo["huella_archivo"], nombre, filas_procesadas)
+            _actualizar_trabajo(conn, id_trabajo, propietario, estado="completado")
+            # resumen_cargue registra la auditoría y confirma la transacción
+            resumen_cargue(
+                conn,
+                filas_procesadas,
+                contadores["nuevos"],
+                contadores["actualizados"],
+                contadores["errores"],
+                contadores["transferencias"],
+                contadores["sin_cambios"],
+                errores_por_tipo,
+                contadores["duplicados_resueltos"],
+            )
+            ruta.unlink(missing_ok=True)
+
+        except _TrabajoReasignado as e:
+            # Otra ejecución reanudó el trabajo: esta se retira sin escribir más
+            conn.rollback()
+            print(f"⚠️ Trabajo de cargue {id_trabajo} detenido: {e}")
+        except Exception as e:
+            conn.rollback()
+            # El mensaje se agrega al JSON del avance: se conservan los conteos por motivo
+            fila = conn.execute(
+                "SELECT detalle FROM TrabajoCargue WHERE id_trabajo = ?", (id_trabajo,)
+            ).fetchone()
+            detalle = _detalle_json(fila[0] if fila else None)
+            detalle["error"] = str(e)
+            try:
+                _actualizar_trabajo(
+                    conn,
+                    id_trabajo,
+                    propietario,
+                    estado="error",
+                    detalle=json.dumps(detalle, ensure_ascii=False),
+                )
+                conn.commit()
+            except _TrabajoReasignado:
+                conn.rollback()
+            print(f"⚠️ Trabajo de cargue {id_trabajo} falló: {e}")
+        finally:
+            with _BLOQUEO:
+                _HILOS.pop(id_trabajo, None)
+
+
+def _hilo_trabajo(id_trabajo: int, tamano_bloque: int, propietario: str) -> None:
+    """Ejecuta el trabajo y libera la conexión del pool propia del hilo."""
+    try:
+        _ejecutar_trabajo(id_trabajo, tamano_bloque, propietario)
+        # Con el trabajo ya confirmado, el snapshot analítico se regenera aparte
+        actualizar_snapshot(DB_PATH)
+    finally:
+        cerrar_conexion_hilo()
+
+
+def _reservar_hilo(
+    id_trabajo: int, tamano_bloque: int, propietario: str
+) -> threading.Thread | None:
+    """
+    Crea el hilo del trabajo y lo registra en _HILOS sin arrancarlo. Se llama
+    antes de confirmar el estado 'pendiente' para que ninguna otra sesión
+    (_marcar_interrumpidos) vea el trabajo activo sin hilo. Retorna None si el
+    trabajo ya tiene un hilo vigente.
+    """
+    with _BLOQUEO:
+        previo = _HILOS.get(id_trabajo)
+        if previo is not None and _hilo_vigente(previo):
+            return None
+        hilo = threading.Thread(
+            target=_hilo_trabajo,
+            args=(id_trabajo, tamano_bloque, propietario),
+            name=f"cargue-argos-{id_trabajo}",
+            daemon=True,
+        )
+        _HILOS[id_trabajo] = hilo
+    return hilo
+
+
+def _liberar_hilo(id_trabajo: int, hilo: threading.Thread) -> None:
+    """Retira un hilo reservado que no llegó a arrancar."""
+    with _BLOQUEO:
+        if _HILOS.get(id_trabajo) is hilo:
+            del _HILOS[id_trabajo]
+
+
+def iniciar_trabajo_cargue(
+    nombre_archivo: str,
+    contenido: bytes,
+    tamano_bloque: int = TAMANO_BLOQUE,
+    estrategia_duplicados: str = "ultima",
+) -> int:
+    """
+    Registra un trabajo de cargue real y lo lanza en segundo plano.
+    `estrategia_duplicados` ("ultima" / "mayor_nota") decide qué fila gana
+    cuando una clave se repite en el archivo.
+    Retorna el id_trabajo para consultar su avance con `obtener_trabajo`.
+    """
+    TRABAJOS_DIR.mkdir(parents=True, exist_ok=True)
+    propietario = _nuevo_propietario()
+
+    with conexion(DB_PATH) as conn:
+        asegurar_esquema(conn)
+        cursor = conn.execute(
+            """
+            INSERT INTO TrabajoCargue
+                (nombre_archivo, estado, estrategia_duplicados, propietario)
+            VALUES (?, 'pendiente', ?, ?)
+            """,
+            (nombre_archivo, estrategia_duplicados, propietario),
+        )
+        id_trabajo = cursor.lastrowid
+        hilo = _reservar_hilo(id_trabajo, tamano_bloque, propietario)
+
+        try:
+            ruta = TRABAJOS_DIR / f"trabajo_{id_trabajo}.xlsx"
+            ruta.write_bytes(contenido)
+            with ruta.open("rb") as archivo:
+                huella = calcular_huella_archivo(archivo)
+            _actualizar_trabajo(
+                conn, id_trabajo, propietario, ruta_archivo=str(ruta), huella_archivo=huella
+            )
+            conn.commit()
+        except BaseException:
+            _liberar_hilo(id_trabajo, hilo)
+            raise
+
+    hilo.start()
+    return id_trabajo
+
+
+def reanudar_trabajo(id_trabajo: int, tamano_bloque: int = TAMANO_BLOQUE) -> bool:
+    """
+    Relanza un trabajo `interrumpido` desde su último bloque confirmado.
+    Retorna False si el trabajo no existe, no está interrumpido o ya no
+    se conserva su archivo.
+    """
+    trabajo = obtener_trabajo(id_trabajo)
+    if not trabajo or trabajo["estado"] != "interrumpido":
+        return False
+    if not trabajo["ruta_archivo"] or not Path(trabajo["ruta_archivo"]).exists():
+        return False
+
+    propietario = _nuevo_propietario()
+    hilo = _reservar_hilo(id_trabajo, tamano_bloque, propietario)
+    if hilo is None:
+        return False
+
+    try:
+        with conexion(DB_PATH) as conn:
+            # Solo una sesión gana la reanudación si dos la piden a la vez; el
+            # propietario nuevo deja sin escritura a cualquier ejecución anterior
+            cursor = conn.execute(
+                """
+                UPDATE TrabajoCargue
+                   SET estado = 'pendiente', propietario = ?,
+                       fecha_actualizacion = CURRENT_TIMESTAMP
+                 WHERE id_trabajo = ? AND estado = 'interrumpido'
+                """,
+                (propietario, id_trabajo),
+            )
+            conn.commit()
+    except BaseException:
+        _liberar_hilo(id_trabajo, hilo)
+        raise
+    if cursor.rowcount != 1:
+        _liberar_hilo(id_trabajo, hilo)
+        return False
+    hilo.start()
+    return True
+
+
+__all__ = [
+    "ESTADOS_ACTIVOS",
+    "LATIDO_VENCIDO_SEGUNDOS",
+    "TRABAJOS_DIR",
+    "iniciar_trabajo_cargue",
+    "listar_trabajos",
+    "obtener_trabajo",
+    "reanudar_trabajo",
+    "trabajo_activo",
+]
@@ -1,4 +1,5 @@
 # src/modules/validators.py
+import numpy as np
 import pandas as pd
 from pathlib import Path
 
@@ -37,25 +38,20 @@ EQUIVALENCIAS = {
 }
 
 
-def resumen_validacion(df: pd.DataFrame) -> dict:
-    """
-    Valida estructura híbrida (por nombre y posición).
-    - Detecta errores de encabezado.
-    - Repara alias comunes.
-    - Evalúa notas, periodos y duplicados.
-    """
-    # Debug: encabezados crudos tal como llegan desde pandas
-    print("🧾 [RAW] Encabezados detectados por pandas:", df.columns.tolist())
+def normalizar_encabezados(columnas) -> list[str]:
+    """Limpia, pasa a mayúsculas y traduce alias a nombres canónicos."""
+    normalizadas = [str(col).strip().upper() for col in columnas]
+    return [EQUIVALENCIAS.get(col, col) for col in normalizadas]
 
-    # Normalizar nombres
-    df.columns = df.columns.str.strip().str.upper()
-    df.rename(columns=EQUIVALENCIAS, inplace=True)
 
-    # Debug: encabezados ya normalizados/canónicos
-    print("🧾 [NORM] Encabezados normalizados:", df.columns.tolist())
+def validar_encabezados(columnas) -> dict:
+    """
+    Valida solo la fila de encabezados (ya normalizada) por nombre y posición.
+    No necesita leer datos, por lo que sirve como sondeo rápido del archivo.
+    """
+    columnas_presentes = list(columnas)
 
     # 1️⃣ Validación nominal (contra layout canónico)
-    columnas_presentes = list(df.columns)
     faltantes = [col for col in LAYOUT_ARGOS if col not in columnas_presentes]
     columnas_validas = len(faltantes) == 0
 
@@ -63,49 +59,146 @@ def resumen_validacion(df: pd.DataFrame) -> dict:
     posicion_correcta = True
     errores_pos = []
     for idx, nombre_esperado in POSICIONES_CLAVE.items():
-        if idx >= len(df.columns):
+        if idx >= len(columnas_presentes):
             posicion_correcta = False
             errores_pos.append(f"Falta columna en posición {idx+1} ({nombre_esperado})")
-        elif df.columns[idx] != nombre_esperado:
+        elif columnas_presentes[idx] != nombre_esperado:
             posicion_correcta = False
             errores_pos.append(
-                f"Columna {idx+1} esperada '{nombre_esperado}' pero se encontró '{df.columns[idx]}'"
+                f"Columna {idx+1} esperada '{nombre_esperado}' pero se encontró '{columnas_presentes[idx]}'"
             )
 
+    return {
+        "columnas_validas": columnas_validas,
+        "faltantes": faltantes,
+        "posicion_correcta": posicion_correcta,
+        "errores_posicion": errores_pos,
+    }
+
+
+# Códigos de motivo por fila (una fila puede tener varios)
+MOTIVOS_FILA = {
+    "NOTA_FUERA_RANGO": "Nota definitiva fuera del rango 0–5",
+    "PERIODO_INVALIDO": "PERIODO no sigue el patrón YYYYPP de periodos conocidos",
+    "CLAVE_FALTANTE": "Falta ID_ESTUDIANTE, NRCS o PERIODO",
+    "DUPLICADO": "Clave (estudiante, NRC, periodo) repetida; prevalece la última fila",
+}
+
+# Motivos que impiden cargar la fila. DUPLICADO es solo advertencia: la fila
+# repetida se fusiona con la última ocurrencia de su clave.
+MOTIVOS_BLOQUEANTES = ("NOTA_FUERA_RANGO", "PERIODO_INVALIDO", "CLAVE_FALTANTE")
+
+PATRON_PERIODO = r"^20\d{2}(05|07|13|16|18|23|25|28)$"
+CLAVE_NATURAL = ["ID_ESTUDIANTE", "NRCS", "PERIODO"]
+
+
+def _texto_limpio(df: pd.DataFrame, columna: str) -> pd.Series:
+    """Columna como texto sin espacios extremos; ausente o nula → ''."""
+    if columna not in df.columns:
+        return pd.Series("", index=df.index, dtype=object)
+    serie = df[columna]
+    return serie.where(serie.notna(), "").astype(str).str.strip()
+
+
+def validar_filas(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Validación vectorizada fila a fila (un solo barrido por columna).
+
+    Retorna un DataFrame booleano con el mismo índice que `df` y una columna por
+    código de MOTIVOS_FILA (True = la fila tiene ese problema).
+    """
+    # Notas: misma limpieza que la validación histórica; lo no numérico no se evalúa
+    notas = pd.to_numeric(
+        _texto_limpio(df, "DEFINITIVA")
+        .str.replace(",", ".", regex=False)
+        .str.replace(r"[^0-9.\-]", "", regex=True),
+        errors="coerce",
+    )
+    nota_fuera_rango = notas.notna() & ~notas.between(0, 5, inclusive="both")
+
+    periodo = _texto_limpio(df, "PERIODO")
+    periodo_invalido = (periodo != "") & ~periodo.str.match(PATRON_PERIODO, na=False)
+
+    claves = pd.DataFrame({col: _texto_limpio(df, col) for col in CLAVE_NATURAL})
+    clave_faltante = (claves == "").any(axis=1)
+    duplicado = ~clave_faltante & claves.duplicated(keep="last")
+
+    return pd.DataFrame(
+        {
+            "NOTA_FUERA_RANGO": nota_fuera_rango.to_numpy(),
+            "PERIODO_INVALIDO": periodo_invalido.to_numpy(),
+            "CLAVE_FALTANTE": clave_faltante.to_numpy(),
+            "DUPLICADO": duplicado.to_numpy(),
+        },
+        index=df.index,
+    )
+
+
+def filas_rechazadas(mascaras: pd.DataFrame) -> np.ndarray:
+    """Máscara de filas con al menos un motivo bloqueante."""
+    return mascaras[list(MOTIVOS_BLOQUEANTES)].any(axis=1).to_numpy()
+
+
+def contar_motivos(mascaras: pd.DataFrame) -> dict[str, int]:
+    """Cantidad de filas por código de motivo."""
+    return {codigo: int(mascaras[codigo].sum()) for codigo in MOTIVOS_FILA}
+
+
+def validar_contenido(df: pd.DataFrame) -> dict:
+    """
+    Evalúa notas, periodos y duplicados de un DataFrame con encabezados
+    ya normalizados (archivo completo o un bloque del archivo).
+
+    Además de los indicadores globales incluye `errores_por_tipo` (conteo por
+    código de MOTIVOS_FILA) y `filas_invalidas` (filas con motivo bloqueante).
+    """
+    mascaras = validar_filas(df)
+    conteos = contar_motivos(mascaras)
+    periodo_vacio = _texto_limpio(df, "PERIODO") == ""
+
     # 3️⃣ Validación de notas
-    if "DEFINITIVA" in df.columns:
-        notas = (
-            df["DEFINITIVA"].astype(str)
-            .str.replace(",", ".", regex=False)
-            .str.replace(r"[^0-9.\-]", "", regex=True)
-            .str.strip()
-        )
-        notas_num = pd.to_numeric(notas, errors="coerce")
-        notas_validas = notas_num.dropna().between(0, 5, inclusive="both").all()
-    else:
-        notas_validas = False
+    notas_validas = "DEFINITIVA" in df.columns and conteos["NOTA_FUERA_RANGO"] == 0
 
     # 4️⃣ Validación de periodos (semestres/trimestres frecuentes)
-    periodos_validos = (
-        df["PERIODO"].astype(str).str.match(r"^20\d{2}(05|07|13|16|18|23|25|28)$", na=False).all()
-        if "PERIODO" in df.columns else False
+    periodos_validos = "PERIODO" in df.columns and not bool(
+        (mascaras["PERIODO_INVALIDO"] | periodo_vacio).any()
     )
 
     # 5️⃣ Duplicados (clave natural: estudiante + NRC + periodo)
     duplicados = (
-        df.duplicated(subset=["ID_ESTUDIANTE", "NRCS", "PERIODO"]).any()
-        if all(col in df.columns for col in ["ID_ESTUDIANTE", "NRCS", "PERIODO"])
+        conteos["DUPLICADO"] > 0
+        if all(col in df.columns for col in CLAVE_NATURAL)
         else None
     )
 
     return {
-        "columnas_validas": columnas_validas,
-        "faltantes": faltantes,
-        "posicion_correcta": posicion_correcta,
-        "errores_posicion": errores_pos,
-        "notas_validas": notas_validas,
-        "periodos_validos": periodos_validos,
+        "notas_validas": bool(notas_validas),
+        "periodos_validos": bool(periodos_validos),
         "duplicados": duplicados,
+        "errores_por_tipo": conteos,
+        "filas_invalidas": int(filas_rechazadas(mascaras).sum()),
+    }
+
+
+def resumen_validacion(df: pd.DataFrame) -> dict:
+    """
+    Valida estructura híbrida (por nombre y posición).
+    - Detecta errores de encabezado.
+    - Repara alias comunes.
+    - Evalúa notas, periodos y duplicados.
+    """
+    # Debug: encabezados crudos tal como llegan desde pandas
+    print("🧾 [RAW] Encabezados detectados por pandas:", df.columns.tolist())
+
+    # Normalizar nombres
+    df.columns = normalizar_encabezados(df.columns)
+
+    # Debug: encabezados ya normalizados/canónicos
+    print("🧾 [NORM] Encabezados normalizados:", df.columns.tolist())
+
+    return {
+        **validar_encabezados(df.columns),
+        **validar_contenido(df),
         "total_registros": len(df)
     }
 
@@ -0,0 +1,88 @@
+"""Fixtures comunes: base SQLite temporal y archivos ARGOS sintéticos."""
+
+from __future__ import annotations
+
+import random
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from database import db_init, queries, upsert  # noqa: E402
+from database.conexion import cerrar_conexiones, conexion  # noqa: E402
+from database.migraciones import aplicar_migraciones  # noqa: E402
+from modules import argos_loader, trabajos_cargue  # noqa: E402
+from modules.validators import LAYOUT_ARGOS  # noqa: E402
+
+
+def generar_argos(n: int = 600, semilla: int = 1) -> pd.DataFrame:
+    """
+    DataFrame ARGOS sintético con el layout oficial: notas con coma decimal,
+    ~5 % de cursos por transferencia, un duplicado de clave y una fila sin
+    ID_ESTUDIANTE.
+    """
+    rnd = random.Random(semilla)
+    filas = []
+    for _ in range(n):
+        estudiante = str(100000 + rnd.randint(0, n // 5))
+        transferencia = rnd.random() < 0.05
+        fila = {columna: "" for columna in LAYOUT_ARGOS}
+        fila.update(
+            {
+                "ID_ESTUDIANTE": estudiante,
+                "NOMBRE_ESTUDIANTE": f"NOMBRE {estudiante}",
+                "PROGRAMA": rnd.choice(["ISOF", "ADMI"]),
+                "DESCRIPCION_PROGRAMA": "Programa",
+                "FACULTAD": "FI",
+                "PERIODO": rnd.choice(["202405", "202413", "202505"]),
+                "NRCS": "TRANSFERENCIA" if transferencia else str(rnd.randint(1000, 1000 + n // 10)),
+                "ALFA": rnd.choice(["ISOF", "uvfi"]),
+                "NUMERI": f"V{rnd.randint(0, 60):03d}",
+                "DESCRIPCION": "Curso",
+                "DEFINITIVA": f"{rnd.uniform(0, 5):.1f}".replace(".", ","),
+            }
+        )
+        filas.append(fila)
+    filas.append(dict(filas[0], DEFINITIVA="4,9"))
+    filas.append(dict(filas[1], ID_ESTUDIANTE=None))
+    df = pd.DataFrame(filas, columns=LAYOUT_ARGOS).astype(object)
+    return df.where(df.notna(), None)
+
+
+@pytest.fixture
+def crear_bd(tmp_path, monkeypatch):
+    """
+    Fábrica de bases SQLite vacías con todas las migraciones. Cada llamada
+    crea `<nombre>.db` y apunta a ella el DB_PATH de todos los módulos.
+    """
+    rutas = []
+
+    def crear(nombre: str = "sia"):
+        ruta = tmp_path / f"{nombre}.db"
+        for modulo in (db_init, queries, upsert, argos_loader, trabajos_cargue):
+            monkeypatch.setattr(modulo, "DB_PATH", ruta)
+        with conexion(ruta) as conn:
+            aplicar_migraciones(conn)
+        rutas.append(ruta)
+        return ruta
+
+    yield crear
+    for ruta in rutas:
+        cerrar_conexiones(ruta)
+
+
+@pytest.fixture
+def bd(crear_bd):
+    """Base SQLite vacía con todas las migraciones, apuntada por todos los módulos."""
+    return crear_bd()
+
+
+@pytest.fixture
+def argos():
+    """Fábrica de archivos ARGOS sintéticos (ver generar_argos)."""
+    return generar_argos
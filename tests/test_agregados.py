@@ -0,0 +1,86 @@
+"""Tablas mantenidas por triggers (AgregadoKPI, EstudiantePrograma, AvanceEstudiante)."""
+
+from __future__ import annotations
+
+import pytest
+
+from database import migraciones
+from database.conexion import conexion
+from modules import argos_loader, credit_progress
+
+
+def _kpi(conn) -> list[tuple]:
+    """AgregadoKPI sin los ámbitos que quedaron en cero."""
+    return conn.execute(
+        """
+        SELECT codigo_programa, id_periodo, inscripciones, notas,
+               ROUND(suma_notas, 6), estudiantes, cursos
+          FROM AgregadoKPI
+         WHERE inscripciones > 0 OR estudiantes > 0 OR cursos > 0
+         ORDER BY codigo_programa, id_periodo
+        """
+    ).fetchall()
+
+
+def _membresia(conn) -> list[tuple]:
+    return conn.execute(
+        "SELECT * FROM EstudiantePrograma ORDER BY codigo_programa, id_estudiante"
+    ).fetchall()
+
+
+def _membresia_esperada(conn) -> list[tuple]:
+    return conn.execute(
+        """
+        SELECT c.codigo_programa, i.id_estudiante, MIN(i.id_periodo), MAX(i.id_periodo)
+          FROM Inscripcion i
+          JOIN Curso c ON c.id_curso = i.id_curso
+         WHERE c.codigo_programa IS NOT NULL
+         GROUP BY c.codigo_programa, i.id_estudiante
+         ORDER BY 1, 2
+        """
+    ).fetchall()
+
+
+@pytest.fixture
+def bd_cargada(bd, argos):
+    """Cargue masivo, recargue fila a fila con cambios y un curso que cambia de programa."""
+    argos_loader.cargar_a_bd(argos(semilla=1), masivo=True)
+    argos_loader.cargar_a_bd(argos(semilla=2), masivo=False)
+    with conexion(bd) as conn:
+        curso = conn.execute(
+            "SELECT id_curso FROM Curso WHERE codigo_programa = 'ISOF' ORDER BY id_curso LIMIT 1"
+        ).fetchone()[0]
+        conn.execute("UPDATE Curso SET codigo_programa = 'ADMI' WHERE id_curso = ?", (curso,))
+    return bd
+
+
+def test_agregados_kpi_coinciden_con_recalculo(bd_cargada):
+    with conexion(bd_cargada) as conn:
+        mantenido = _kpi(conn)
+        assert any(fila[0] == "ISOF" and fila[1] != "*" for fila in mantenido)
+        migraciones._m007_agregados_kpi(conn)
+        recalculado = _kpi(conn)
+        conn.rollback()
+
+    assert mantenido == recalculado
+
+
+def test_membresia_coincide_con_inscripciones(bd_cargada):
+    with conexion(bd_cargada) as conn:
+        assert _membresia(conn) == _membresia_esperada(conn)
+
+
+def test_avance_persistido_sigue_a_los_cambios(bd_cargada, argos):
+    credit_progress.actualizar_avance_programa("ISOF")
+    argos_loader.cargar_a_bd(argos(semilla=3), masivo=True)
+    with conexion(bd_cargada) as conn:
+        pendientes = conn.execute(
+            "SELECT COUNT(*) FROM AvanceEstudiante WHERE pendiente = 1"
+        ).fetchone()[0]
+    assert pendientes > 0
+
+    credit_progress.actualizar_avance_programa("ISOF")
+    tabla = credit_progress.generar_reporte_avance_creditos("ISOF", 0, motor="tabla")
+    sql = credit_progress.generar_reporte_avance_creditos("ISOF", 0, motor="sql")
+    assert tabla["estudiantes_todos"]
+    assert tabla["estudiantes_todos"] == sql["estudiantes_todos"]
@@ -0,0 +1,35 @@
+"""Avance en créditos: los tres motores del reporte dan el mismo resultado."""
+
+from __future__ import annotations
+
+import pytest
+
+from modules import argos_loader, credit_progress
+
+
+def _por_estudiante(reporte: dict) -> dict[str, dict]:
+    return {r["id_estudiante"]: r for r in reporte["estudiantes_todos"]}
+
+
+def test_motores_de_avance_coinciden(bd, argos):
+    argos_loader.cargar_a_bd(argos(n=1500), masivo=True)
+
+    reportes = {
+        motor: credit_progress.generar_reporte_avance_creditos("ISOF", 40, motor=motor)
+        for motor in credit_progress.MOTORES_AVANCE
+    }
+    referencia = _por_estudiante(reportes["vectorizado"])
+    assert referencia
+    assert any(r["cred_aprob_transf"] for r in referencia.values())
+
+    for motor, reporte in reportes.items():
+        obtenido = _por_estudiante(reporte)
+        assert obtenido.keys() == referencia.keys(), motor
+        for id_estudiante, esperado in referencia.items():
+            registro = obtenido[id_estudiante]
+            assert registro["porc_aproba_malla"] == pytest.approx(esperado["porc_aproba_malla"])
+            for campo in esperado.keys() - {"porc_aproba_malla"}:
+                assert registro[campo] == esperado[campo], (motor, id_estudiante, campo)
+        assert reporte["total_con_avance_mayor_igual"] == (
+            reportes["vectorizado"]["total_con_avance_mayor_igual"]
+        )
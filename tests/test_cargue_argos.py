@@ -0,0 +1,167 @@
+"""Cargue ARGOS: equivalencia masivo / fila a fila y detección de cambios."""
+
+from __future__ import annotations
+
+import sqlite3
+import tempfile
+from io import BytesIO
+
+import pandas as pd
+
+from modules import argos_loader
+
+
+def _volcar(ruta) -> dict:
+    """Contenido de las tablas del cargue, sin columnas de auditoría."""
+    omitir = {"id_inscripcion", "fecha_registro", "version_periodo"}
+    tablas = {
+        "Programa": "codigo_programa",
+        "Estudiante": "id_estudiante",
+        "Curso": "id_curso",
+        "PeriodoAcademico": "id_periodo",
+        "Inscripcion": "id_estudiante, id_curso, id_periodo",
+    }
+    with sqlite3.connect(ruta) as conn:
+        volcado = {}
+        for tabla, orden in tablas.items():
+            columnas = [f[1] for f in conn.execute(f"PRAGMA table_info({tabla})") if f[1] not in omitir]
+            volcado[tabla] = conn.execute(
+                f"SELECT {', '.join(columnas)} FROM {tabla} ORDER BY {orden}"
+            ).fetchall()
+    return volcado
+
+
+def test_cargue_masivo_y_fila_a_fila_dejan_la_misma_base(crear_bd, argos):
+    df = argos()
+    resumenes = {}
+    for masivo in (True, False):
+        ruta = crear_bd(f"masivo_{masivo}")
+        resumenes[masivo] = argos_loader.cargar_a_bd(df, masivo=masivo)
+        resumenes[masivo]["volcado"] = _volcar(ruta)
+
+    masivo, fila_a_fila = resumenes[True], resumenes[False]
+    assert masivo["volcado"] == fila_a_fila["volcado"]
+    for clave in ("total", "nuevos", "errores", "errores_por_tipo", "duplicados_resueltos"):
+        assert masivo[clave] == fila_a_fila[clave]
+
+
+def test_recargue_masivo_tras_fila_a_fila_sin_cambios(bd, argos):
+    df = argos()
+    primero = argos_loader.cargar_a_bd(df, masivo=False)
+    validas = primero["nuevos"] + primero["actualizados"]
+
+    recargue = argos_loader.cargar_a_bd(df, masivo=True)
+
+    assert recargue["sin_cambios"] == validas
+    assert recargue["nuevos"] == 0
+    assert recargue["actualizados"] == 0
+
+
+def test_recargue_fila_a_fila_sin_cambios_no_escribe(bd, argos):
+    df = argos()
+    primero = argos_loader.cargar_a_bd(df, masivo=True)
+    validas = primero["nuevos"] + primero["actualizados"]
+    with sqlite3.connect(bd) as conn:
+        versiones = conn.execute(
+            "SELECT id_inscripcion, version_periodo FROM Inscripcion ORDER BY 1"
+        ).fetchall()
+
+    recargue = argos_loader.cargar_a_bd(df, masivo=False)
+
+    assert recargue["sin_cambios"] == validas
+    assert recargue["nuevos"] == 0
+    assert recargue["actualizados"] == 0
+    with sqlite3.connect(bd) as conn:
+        assert conn.execute(
+            "SELECT id_inscripcion, version_periodo FROM Inscripcion ORDER BY 1"
+        ).fetchall() == versiones
+
+
+def _libro_argos(*hojas) -> bytes:
+    """Bytes de un .xlsx con una hoja por DataFrame ARGOS."""
+    buffer = BytesIO()
+    with pd.ExcelWriter(buffer, engine="openpyxl") as libro:
+        for i, hoja in enumerate(hojas):
+            hoja.to_excel(libro, sheet_name=f"ARGOS{i + 1}", index=False)
+    return buffer.getvalue()
+
+
+def test_cargue_multiple_por_bloques_equivale_al_masivo(bd, argos, tmp_path, monkeypatch):
+    monkeypatch.setattr(argos_loader, "TAMANO_BLOQUE", 97)
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    df = argos()
+    mitad = len(df) // 2
+
+    multiple = argos_loader.cargar_archivos_argos(
+        [("argos.xlsx", _libro_argos(df.iloc[:mitad], df.iloc[mitad:]))], max_procesos=1
+    )
+    combinado = multiple["combinado"]
+    assert combinado["archivos_cargados"] == 1
+    assert not list(tmp_path.glob("argos_*"))
+
+    recargue = argos_loader.cargar_a_bd(df, masivo=True)
+    assert recargue["nuevos"] == 0
+    assert recargue["actualizados"] == 0
+    assert recargue["sin_cambios"] == combinado["nuevos"]
+    assert recargue["duplicados_resueltos"] == combinado["duplicados_resueltos"]
+
+
+def test_validacion_simulacion_y_cargue_con_el_mismo_desglose(bd, argos):
+    df = argos()
+    libro = BytesIO(_libro_argos(df))
+
+    _, validacion = argos_loader.validar_excel_por_bloques(libro, tamano_bloque=97)
+    simulacion = argos_loader.procesar_argos_por_bloques(
+        argos_loader.iterar_bloques_argos(libro, 97)
+    )
+    cargue, _ = argos_loader.cargar_a_bd_por_bloques(libro, tamano_bloque=97)
+
+    for resultado in (validacion, simulacion):
+        assert resultado["errores_por_tipo"] == cargue["errores_por_tipo"]
+        assert isinstance(resultado["duplicados_resueltos"], int)
+    assert "DUPLICADO" not in validacion["errores_por_tipo"]
+    assert all(cargue["errores_por_tipo"].values())
+    assert simulacion["duplicados_resueltos"] == cargue["duplicados_resueltos"]
+
+
+def test_falla_de_escritura_deshace_solo_su_archivo(bd, argos, monkeypatch):
+    fusionar = argos_loader.fusionar_staging_argos
+    llamadas = []
+
+    def fusionar_con_falla(conn, cache=None):
+        llamadas.append(1)
+        conteos = fusionar(conn, cache)
+        if len(llamadas) == 2:
+            # Falla después de escribir dimensiones e inscripciones del archivo
+            raise RuntimeError("falla simulada")
+        return conteos
+
+    monkeypatch.setattr(argos_loader, "fusionar_staging_argos", fusionar_con_falla)
+    archivos = [
+        (nombre, _libro_argos(argos(n=200, semilla=semilla)))
+        for nombre, semilla in (("a.xlsx", 1), ("b.xlsx", 2), ("c.xlsx", 3))
+    ]
+
+    resultado = argos_loader.cargar_archivos_argos(archivos, max_procesos=1)
+
+    estados = [r["estado"] for r in resultado["archivos"]]
+    assert estados == ["Éxito", "Error en carga", "Éxito"]
+    assert "falla simulada" in resultado["archivos"][1]["detalle"]
+    combinado = resultado["combinado"]
+    assert combinado["archivos_cargados"] == 2
+    assert combinado["archivos_con_error"] == 1
+    with sqlite3.connect(bd) as conn:
+        cargados = [f[0] for f in conn.execute(
+            "SELECT nombre_archivo FROM ArchivoCargado ORDER BY nombre_archivo"
+        )]
+        inscripciones = conn.execute("SELECT COUNT(*) FROM Inscripcion").fetchone()[0]
+        huerfanas = conn.execute(
+            """
+            SELECT COUNT(*) FROM Inscripcion i
+             WHERE NOT EXISTS (SELECT 1 FROM Estudiante e WHERE e.id_estudiante = i.id_estudiante)
+                OR NOT EXISTS (SELECT 1 FROM Curso c WHERE c.id_curso = i.id_curso)
+            """
+        ).fetchone()[0]
+    assert huerfanas == 0
+    assert cargados == ["a.xlsx", "c.xlsx"]
+    assert inscripciones == combinado["nuevos"]
@@ -0,0 +1,55 @@
+"""Snapshot analítico: se regenera tras confirmar el cargue y su firma lo invalida."""
+
+from __future__ import annotations
+
+import pytest
+
+from database import analisis_datos
+from database.conexion import conexion
+from database.snapshot_analitico import COLUMNAS_SNAPSHOT, snapshot_vigente
+from modules import argos_loader
+
+
+def _metricas(monkeypatch, ruta) -> dict:
+    monkeypatch.setattr(analisis_datos, "DB_PATH", ruta)
+    return analisis_datos.validar_datos_analiticos()
+
+
+def test_snapshot_exporta_solo_lo_que_usa_la_validacion(bd, argos):
+    argos_loader.cargar_a_bd(argos())
+
+    snapshot = snapshot_vigente(bd)
+    assert snapshot is not None
+    assert set(snapshot["columnas"]) == set(COLUMNAS_SNAPSHOT) == {
+        "id_periodo",
+        "nota",
+        "version_periodo",
+    }
+
+
+@pytest.mark.parametrize(
+    "cambio",
+    [
+        "UPDATE Inscripcion SET version_periodo = version_periodo + 1 WHERE id_inscripcion = 1",
+        "UPDATE Inscripcion SET id_periodo = ("
+        "    SELECT MIN(id_periodo) FROM PeriodoAcademico WHERE id_periodo <> Inscripcion.id_periodo"
+        ") WHERE id_inscripcion = 1",
+        "UPDATE Inscripcion SET nota = 5.0 - nota",
+    ],
+)
+def test_cambio_en_columna_exportada_invalida_el_snapshot(bd, argos, monkeypatch, cambio):
+    argos_loader.cargar_a_bd(argos())
+    assert _metricas(monkeypatch, bd)["origen_notas"] == "snapshot"
+
+    with conexion(bd) as conn:
+        conn.execute(cambio)
+        conn.commit()
+
+    assert snapshot_vigente(bd) is None
+    desde_sqlite = _metricas(monkeypatch, bd)
+    assert desde_sqlite["origen_notas"] == "sqlite"
+
+    # Un cargue posterior (aunque no cambie nada) deja el snapshot al día
+    argos_loader.cargar_a_bd(argos(semilla=2))
+    con_snapshot = _metricas(monkeypatch, bd)
+    assert con_snapshot["origen_notas"] == "snapshot"
@@ -0,0 +1,104 @@
+"""Trabajos de cargue en segundo plano: estado, latido y detalle persistidos."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from database.conexion import conexion
+from modules import trabajos_cargue
+
+AJENO = "otro-servidor:4242:abc"
+
+
+def _crear_trabajo(ruta_bd, **campos) -> int:
+    columnas = {
+        "nombre_archivo": "argos.xlsx",
+        "estado": "pendiente",
+        "propietario": AJENO,
+        **campos,
+    }
+    with conexion(ruta_bd) as conn:
+        cursor = conn.execute(
+            f"INSERT INTO TrabajoCargue ({', '.join(columnas)}) "
+            f"VALUES ({', '.join('?' for _ in columnas)})",
+            tuple(columnas.values()),
+        )
+        conn.commit()
+    return cursor.lastrowid
+
+
+def _vencer_latido(ruta_bd, id_trabajo: int) -> None:
+    with conexion(ruta_bd) as conn:
+        conn.execute(
+            "UPDATE TrabajoCargue SET fecha_actualizacion = datetime('now', '-1 hour') "
+            "WHERE id_trabajo = ?",
+            (id_trabajo,),
+        )
+        conn.commit()
+
+
+def test_trabajo_con_hilo_reservado_no_se_marca_interrumpido(bd):
+    id_trabajo = _crear_trabajo(bd)
+    _vencer_latido(bd, id_trabajo)
+    hilo = trabajos_cargue._reservar_hilo(id_trabajo, 100, AJENO)
+    try:
+        assert trabajos_cargue.obtener_trabajo(id_trabajo)["estado"] == "pendiente"
+        assert trabajos_cargue.trabajo_activo(id_trabajo)
+        # Un segundo lanzamiento del mismo trabajo no obtiene hilo
+        assert trabajos_cargue._reservar_hilo(id_trabajo, 100, AJENO) is None
+    finally:
+        trabajos_cargue._liberar_hilo(id_trabajo, hilo)
+
+    assert trabajos_cargue.obtener_trabajo(id_trabajo)["estado"] == "interrumpido"
+
+
+def test_latido_reciente_de_otro_proceso_no_se_interrumpe(bd):
+    # Sin hilo en este proceso (otro servidor o módulo recargado), pero latiendo
+    id_trabajo = _crear_trabajo(bd, estado="cargando")
+
+    assert trabajos_cargue.obtener_trabajo(id_trabajo)["estado"] == "cargando"
+    assert trabajos_cargue.trabajo_activo(id_trabajo)
+
+    _vencer_latido(bd, id_trabajo)
+    assert trabajos_cargue.obtener_trabajo(id_trabajo)["estado"] == "interrumpido"
+
+
+def test_ejecutor_anterior_pierde_el_trabajo_reanudado(bd):
+    id_trabajo = _crear_trabajo(bd, estado="cargando")
+    _vencer_latido(bd, id_trabajo)
+    assert trabajos_cargue.obtener_trabajo(id_trabajo)["estado"] == "interrumpido"
+
+    # Reanudación: otro propietario toma el trabajo
+    with conexion(bd) as conn:
+        conn.execute(
+            "UPDATE TrabajoCargue SET estado = 'pendiente', propietario = 'nuevo' "
+            "WHERE id_trabajo = ?",
+            (id_trabajo,),
+        )
+        conn.commit()
+        with pytest.raises(trabajos_cargue._TrabajoReasignado):
+            trabajos_cargue._actualizar_trabajo(conn, id_trabajo, AJENO, estado="completado")
+        conn.rollback()
+
+    assert trabajos_cargue.obtener_trabajo(id_trabajo)["estado"] == "pendiente"
+
+
+def test_error_conserva_conteos_por_motivo(bd, tmp_path):
+    motivos = {"NOTA_FUERA_RANGO": 3, "CLAVE_FALTANTE": 1}
+    id_trabajo = _crear_trabajo(
+        bd,
+        estado="cargando",
+        ruta_archivo=str(tmp_path / "no_existe.xlsx"),
+        huella_archivo="x",
+        bloques_confirmados=1,
+        detalle=json.dumps({"errores_por_tipo": motivos}),
+    )
+
+    trabajos_cargue._ejecutar_trabajo(id_trabajo, 100, AJENO)
+
+    trabajo = trabajos_cargue.obtener_trabajo(id_trabajo)
+    assert trabajo["estado"] == "error"
+    assert trabajo["errores_por_tipo"] == motivos
+    assert "no_existe.xlsx" in json.loads(trabajo["detalle"])["error"]